@@ -1,22 +1,29 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 import os
-from dotenv import load_dotenv
 
-from models.database import engine, Base
+from models.database import init_db
 from routers import families, members, expenses, payments
 
-# Cargar variables de entorno
-load_dotenv()
+# Modo de verificación del esquema al arrancar:
+# - "startup": crea las tablas que falten en el hook de arranque (por defecto)
+# - "skip": no toca el esquema; se gestiona con `python run_schema.py`
+SCHEMA_MODE = os.getenv("API_SCHEMA_MODE", "startup")
 
-# Crear las tablas en la base de datos
-Base.metadata.create_all(bind=engine)
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Ciclo de vida de la aplicación: verifica el esquema una sola vez al arrancar."""
+    if SCHEMA_MODE == "startup":
+        init_db()
+    yield
 
 # Crear la aplicación
 app = FastAPI(
     title="Family Finance API",
     description="API para gestionar las finanzas familiares",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # Configurar CORS
@@ -0,0 +1,40 @@
+import sys
+import os
+from sqlalchemy import inspect, text
+
+# Añadir el directorio raíz al path para poder importar los módulos
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models.database import engine
+
+def add_version_column(bind=engine):
+    """Añade la columna `version` a la tabla de gastos si todavía no existe.
+
+    Args:
+        bind: Motor de base de datos sobre el que aplicar la migración
+
+    Returns:
+        bool: True si se añadió la columna, False si ya existía
+    """
+    inspector = inspect(bind)
+    if "expenses" not in inspector.get_table_names():
+        return False
+
+    columns = [column["name"] for column in inspector.get_columns("expenses")]
+    if "version" in columns:
+        return False
+
+    with bind.begin() as connection:
+        connection.execute(text("ALTER TABLE expenses ADD COLUMN version INTEGER NOT NULL DEFAULT 1"))
+    return True
+
+def run_migration():
+    """Ejecuta la migración para añadir el control de versiones a los gastos."""
+    print("Iniciando migración de versiones de gastos...")
+    if add_version_column():
+        print("Columna 'version' añadida a la tabla expenses.")
+    else:
+        print("La tabla expenses ya tiene la columna 'version'.")
+
+if __name__ == "__main__":
+    run_migration()
@@ -1,30 +1,142 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import make_url
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 import os
+import sqlite3
 from dotenv import load_dotenv
 
 # Cargar variables de entorno
 load_dotenv()
 
 # Configurar la base de datos SQLite
-DATABASE_URL = "sqlite:///./familyfinance.db"
+DATABASE_URL = os.getenv("SQLALCHEMY_DATABASE_URL", "sqlite:///./familyfinance.db")
+
+# Base de datos secundaria para lecturas (réplica o copia de solo lectura).
+# Si no se configura, las lecturas usan la base de datos principal.
+READ_DATABASE_URL = os.getenv("SQLALCHEMY_READ_DATABASE_URL")
+
+# Tamaño del pool de conexiones. Los endpoints síncronos y get_db se ejecutan
+# en el pool de hilos de Starlette (40 hilos); con menos conexiones que hilos,
+# los hilos que esperan una conexión ocupan los que necesitan las peticiones
+# en curso para cerrar su sesión y el proceso se bloquea hasta pool_timeout.
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "20"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "20"))
+
+def _is_sqlite(url):
+    """Indica si la URL corresponde a una base de datos SQLite."""
+    return make_url(url).get_backend_name() == "sqlite"
+
+def _create_engine(url, read_only=False):
+    """Crea un motor de base de datos.
+
+    Args:
+        url: URL de la base de datos
+        read_only: Si es True y la base de datos es SQLite, las conexiones
+            rechazan cualquier escritura (PRAGMA query_only)
+
+    Returns:
+        Engine: Motor de SQLAlchemy
+    """
+    if not _is_sqlite(url):
+        return create_engine(url, pool_pre_ping=True, pool_size=DB_POOL_SIZE, max_overflow=DB_MAX_OVERFLOW)
+
+    # Las bases de datos en memoria usan una única conexión por hilo, sin pool
+    pool_args = {}
+    if make_url(url).database not in (None, "", ":memory:"):
+        pool_args = {"pool_size": DB_POOL_SIZE, "max_overflow": DB_MAX_OVERFLOW}
+    sqlite_engine = create_engine(url, connect_args={"check_same_thread": False}, **pool_args)
+
+    # Modo de journal opcional (WAL permite lecturas concurrentes con varios workers)
+    journal_mode = os.getenv("SQLITE_JOURNAL_MODE")
+    if journal_mode and not read_only:
+        @event.listens_for(sqlite_engine, "connect")
+        def _set_journal_mode(dbapi_connection, connection_record):
+            cursor = dbapi_connection.cursor()
+            cursor.execute(f"PRAGMA journal_mode = {journal_mode}")
+            cursor.close()
+
+    if read_only:
+        @event.listens_for(sqlite_engine, "connect")
+        def _set_query_only(dbapi_connection, connection_record):
+            cursor = dbapi_connection.cursor()
+            cursor.execute("PRAGMA query_only = ON")
+            cursor.close()
+
+    return sqlite_engine
 
 # Crear el motor de la base de datos
-engine = create_engine( 
-    DATABASE_URL, connect_args={"check_same_thread": False}
-)
+engine = _create_engine(DATABASE_URL)
+
+# Crear el motor de lectura (el mismo motor si no hay réplica configurada)
+if READ_DATABASE_URL:
+    read_engine = _create_engine(READ_DATABASE_URL, read_only=True)
+else:
+    read_engine = engine
 
 # Crear una sesión local
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Crear una sesión local de solo lectura
+ReadSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=read_engine)
+
 # Crear una base para los modelos
 Base = declarative_base()
 
+def init_db():
+    """Crea en la base de datos principal las tablas que todavía no existen."""
+    # Importar los modelos para registrarlos en Base.metadata
+    from models import models  # noqa: F401
+    from migrations.expense_version_migration import add_version_column
+
+    Base.metadata.create_all(bind=engine)
+
+    # Columnas añadidas después de crear las tablas existentes
+    add_version_column(engine)
+
 # Función para obtener una sesión de la base de datos
 def get_db():
     db = SessionLocal()
     try:
         yield db
     finally:
-        db.close() 
\ No newline at end of file
+        db.close()
+
+# Función para obtener una sesión de solo lectura
+def get_read_db():
+    """Obtiene una sesión para endpoints que solo leen datos.
+
+    Usa la réplica de lectura si está configurada; en caso contrario,
+    la base de datos principal.
+    """
+    db = ReadSessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+def sync_sqlite_replica(source_url=DATABASE_URL, target_url=READ_DATABASE_URL):
+    """Copia la base de datos SQLite principal sobre la réplica de lectura.
+
+    Usa la API de copia de seguridad de SQLite, por lo que la copia es
+    consistente aunque haya escrituras en curso en la base de datos principal.
+
+    Args:
+        source_url: URL de la base de datos principal
+        target_url: URL de la réplica de lectura
+    """
+    if not target_url:
+        raise ValueError("No hay una réplica de lectura configurada (SQLALCHEMY_READ_DATABASE_URL)")
+    if not _is_sqlite(source_url) or not _is_sqlite(target_url):
+        raise ValueError("La sincronización solo está disponible entre bases de datos SQLite")
+
+    source_path = make_url(source_url).database
+    target_path = make_url(target_url).database
+
+    source = sqlite3.connect(source_path)
+    target = sqlite3.connect(target_path)
+    try:
+        source.backup(target)
+    finally:
+        target.close()
+        source.close()
@@ -57,6 +57,8 @@ class Expense(Base):
     paid_by = Column(Integer, ForeignKey("members.id"))
     family_id = Column(String(36), ForeignKey("families.id"))
     created_at = Column(DateTime(timezone=True), server_default=func.now())
+    # Versión para el control de concurrencia optimista; se incrementa en cada actualización
+    version = Column(Integer, nullable=False, default=1, server_default="1")
     
     # Relaciones
     paid_by_member = relationship("Member", back_populates="expenses_paid")
@@ -77,4 +79,49 @@ class Payment(Base):
     # Relaciones
     from_member = relationship("Member", foreign_keys=[from_member_id], back_populates="payments_made")
     to_member = relationship("Member", foreign_keys=[to_member_id], back_populates="payments_received")
-    family = relationship("Family", back_populates="payments") 
\ No newline at end of file
+    family = relationship("Family", back_populates="payments") 
+
+class CacheVersion(Base):
+    """Versión de los datos de una familia.
+
+    Se incrementa en la misma transacción que cualquier escritura que afecte
+    a la familia, de modo que todos los workers puedan detectar que sus
+    cachés en proceso han quedado obsoletas.
+    """
+    __tablename__ = "cache_versions"
+
+    scope = Column(String(64), primary_key=True)
+    version = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+class FamilyEvent(Base):
+    """Registro de cambios en gastos y pagos de una familia.
+
+    Se escribe en la misma transacción que el cambio y alimenta el stream
+    de eventos (SSE) de cada familia en todos los workers.
+    """
+    __tablename__ = "family_events"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    family_id = Column(String(36), index=True)
+    entity = Column(String(16))
+    action = Column(String(16))
+    entity_id = Column(String(36))
+    version = Column(Integer)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+class IdempotencyKey(Base):
+    """Clave de idempotencia de una creación de gasto o pago.
+
+    Se guarda en la misma transacción que el recurso creado, de modo que si
+    el cliente reintenta la solicitud con la misma clave (por ejemplo, tras
+    un timeout) la API devuelve el recurso existente en lugar de crearlo
+    otra vez.
+    """
+    __tablename__ = "idempotency_keys"
+
+    key = Column(String(64), primary_key=True)
+    scope = Column(String(16), nullable=False)
+    request_hash = Column(String(64), nullable=False)
+    resource_id = Column(String(36), nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
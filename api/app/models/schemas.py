@@ -1,4 +1,4 @@
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, validator
 from typing import List, Optional
 from datetime import datetime
 
@@ -56,16 +56,31 @@ class ExpenseBase(BaseModel):
 class ExpenseCreate(ExpenseBase):
     split_among: Optional[List[int]] = None
 
+# Gastos que se pueden crear en una sola solicitud a /expenses/bulk
+MAX_BULK_EXPENSES = 100
+
+class ExpenseBulkCreate(BaseModel):
+    expenses: List[ExpenseCreate]
+
+    @validator("expenses")
+    def check_size(cls, value):
+        if not 1 <= len(value) <= MAX_BULK_EXPENSES:
+            raise ValueError(f"Se deben enviar entre 1 y {MAX_BULK_EXPENSES} gastos")
+        return value
+
 class ExpenseUpdate(BaseModel):
     description: Optional[str] = None
     amount: Optional[float] = None
     paid_by: Optional[int] = None
     split_among: Optional[List[int]] = None
+    # Versión leída por el cliente; si no coincide con la actual se responde 409
+    version: Optional[int] = None
 
 class Expense(ExpenseBase):
     id: str
     family_id: str
     created_at: datetime
+    version: int = 1
     split_among: List[Member] = []
 
     class Config:
@@ -86,6 +101,11 @@ class Payment(PaymentBase):
     family_id: str
     created_at: datetime
 
+    # En el modelo, from_member y to_member son las relaciones con Member
+    @validator("from_member", "to_member", pre=True)
+    def member_to_id(cls, value):
+        return getattr(value, "id", value)
+
     class Config:
         orm_mode = True
         from_attributes = True
@@ -110,4 +130,28 @@ class MemberBalance(BaseModel):
 
     class Config:
         allow_population_by_field_name = True
-        populate_by_name = True 
\ No newline at end of file
+        populate_by_name = True
+
+# Balances de varias familias a la vez (resúmenes periódicos)
+MAX_BALANCES_PAGE = 500
+
+class MemberBalanceSummary(BaseModel):
+    member_id: str
+    name: str
+    telegram_id: Optional[str] = None
+    total_debt: float
+    total_owed: float
+    net_balance: float
+
+class FamilyBalances(BaseModel):
+    family_id: str
+    name: str
+    members: List[MemberBalanceSummary] = []
+    # Gastos registrados desde la fecha `since` de la consulta
+    expenses_count: int = 0
+    expenses_total: float = 0.0
+
+class FamilyBalancesPage(BaseModel):
+    families: List[FamilyBalances] = []
+    # Valor de `after` para pedir la página siguiente (None si es la última)
+    next_after: Optional[str] = None
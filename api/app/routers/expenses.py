@@ -1,11 +1,16 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+import logging
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Header, Response
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 from typing import List, Optional
 
-from models.database import get_db
-from models.schemas import Expense, ExpenseCreate, ExpenseUpdate
-from services.expense_service import ExpenseService
+from models.database import get_db, get_read_db
+from models.schemas import Expense, ExpenseCreate, ExpenseBulkCreate, ExpenseUpdate
+from services.expense_service import ExpenseService, ExpenseVersionConflict
 from services.member_service import MemberService
+from services.idempotency_service import IdempotencyService, IdempotencyKeyError
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter(
     prefix="/expenses",
@@ -13,13 +18,51 @@ router = APIRouter(
     responses={404: {"description": "Not found"}},
 )
 
+def _parse_if_match(if_match: Optional[str]) -> Optional[int]:
+    """Extrae la versión de una cabecera If-Match ("3", "\"3\"" o "W/\"3\"")."""
+    if if_match is None or if_match.strip() == "*":
+        return None
+    value = if_match.strip()
+    if value.startswith("W/"):
+        value = value[2:]
+    try:
+        return int(value.strip('"'))
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Cabecera If-Match no válida"
+        )
+
+def _replay_expense(db: Session, idempotency_key: str, request_hash: str):
+    """Devuelve el gasto ya creado con esta clave de idempotencia, o None si la clave es nueva."""
+    try:
+        expense_id = IdempotencyService.find(db, idempotency_key, "expense", request_hash)
+    except IdempotencyKeyError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    if expense_id is None:
+        return None
+    
+    expense = ExpenseService.get_expense(db, expense_id)
+    if not expense:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="El gasto creado con esta clave de idempotencia fue eliminado"
+        )
+    logger.info("Gasto %s devuelto de nuevo por la clave de idempotencia %s", expense_id, idempotency_key)
+    return expense
+
 @router.post("/", response_model=Expense, status_code=status.HTTP_201_CREATED)
 def create_expense(
     expense: ExpenseCreate,
     telegram_id: Optional[str] = Query(None, description="ID de Telegram del usuario"),
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key", description="Clave para reintentar la creación sin duplicarla"),
     db: Session = Depends(get_db)
 ):
-    """Crea un nuevo gasto."""
+    """Crea un nuevo gasto.
+    
+    Si se envía la cabecera Idempotency-Key y ya se creó un gasto con esa
+    clave, se devuelve ese gasto en lugar de crear otro.
+    """
     # Si se proporciona un telegram_id, verificar que el usuario pertenece a la misma familia que el pagador
     if telegram_id:
         requesting_member = MemberService.get_member_by_telegram_id(db, telegram_id)
@@ -31,13 +74,101 @@ def create_expense(
                 detail="No tienes permiso para crear gastos para este miembro"
             )
     
-    return ExpenseService.create_expense(db, expense)
+    if idempotency_key is None:
+        return ExpenseService.create_expense(db, expense)
+    
+    request_hash = IdempotencyService.fingerprint(expense)
+    existing = _replay_expense(db, idempotency_key, request_hash)
+    if existing:
+        return existing
+    try:
+        return ExpenseService.create_expense(db, expense, idempotency_key, request_hash)
+    except IntegrityError:
+        # Otra solicitud con la misma clave se guardó a la vez
+        db.rollback()
+        existing = _replay_expense(db, idempotency_key, request_hash)
+        if not existing:
+            raise
+        return existing
+
+def _replay_expenses(db: Session, idempotency_key: str, request_hash: str, count: int):
+    """Devuelve los gastos ya creados por /bulk con esta clave, o None si la clave es nueva."""
+    try:
+        keys = [IdempotencyService.item_key(idempotency_key, index) for index in range(count)]
+        expense_ids = [IdempotencyService.find(db, key, "expense_bulk", request_hash) for key in keys]
+    except IdempotencyKeyError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    if expense_ids[0] is None:
+        return None
+    
+    expenses = [ExpenseService.get_expense(db, expense_id) for expense_id in expense_ids]
+    if not all(expenses):
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Alguno de los gastos creados con esta clave de idempotencia fue eliminado"
+        )
+    logger.info("%s gastos devueltos de nuevo por la clave de idempotencia %s", count, idempotency_key)
+    return expenses
+
+@router.post("/bulk", response_model=List[Expense], status_code=status.HTTP_201_CREATED)
+def create_expenses(
+    bulk: ExpenseBulkCreate,
+    telegram_id: Optional[str] = Query(None, description="ID de Telegram del usuario"),
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key", description="Clave para reintentar la creación sin duplicarla"),
+    db: Session = Depends(get_db)
+):
+    """Crea varios gastos de una misma familia en una sola transacción.
+    
+    O se crean todos o ninguno. Con la cabecera Idempotency-Key, repetir la
+    solicitud devuelve los gastos ya creados en lugar de crearlos otra vez.
+    """
+    payers = MemberService.get_members(db, [expense.paid_by for expense in bulk.expenses])
+    missing = sorted({expense.paid_by for expense in bulk.expenses} - set(payers))
+    if missing:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Miembros no encontrados: {', '.join(str(member_id) for member_id in missing)}"
+        )
+    
+    family_ids = {payer.family_id for payer in payers.values()}
+    if len(family_ids) > 1:
+        raise HTTPException(
+            status_code=422,
+            detail="Todos los gastos deben ser de miembros de la misma familia"
+        )
+    
+    # Si se proporciona un telegram_id, verificar que el usuario pertenece a la familia de los pagadores
+    if telegram_id:
+        requesting_member = MemberService.get_member_by_telegram_id(db, telegram_id)
+        if not requesting_member or requesting_member.family_id not in family_ids:
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="No tienes permiso para crear gastos para estos miembros"
+            )
+    
+    if idempotency_key is None:
+        return ExpenseService.create_expenses(db, bulk.expenses)
+    
+    request_hash = IdempotencyService.fingerprint(bulk)
+    existing = _replay_expenses(db, idempotency_key, request_hash, len(bulk.expenses))
+    if existing:
+        return existing
+    try:
+        return ExpenseService.create_expenses(db, bulk.expenses, idempotency_key, request_hash)
+    except IntegrityError:
+        # Otra solicitud con la misma clave se guardó a la vez
+        db.rollback()
+        existing = _replay_expenses(db, idempotency_key, request_hash, len(bulk.expenses))
+        if not existing:
+            raise
+        return existing
 
 @router.get("/{expense_id}", response_model=Expense)
 def get_expense(
     expense_id: str,
+    response: Response,
     telegram_id: Optional[str] = Query(None, description="ID de Telegram del usuario"),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """Obtiene un gasto por su ID."""
     expense = ExpenseService.get_expense(db, expense_id)
@@ -58,16 +189,28 @@ def get_expense(
                 detail="No tienes permiso para ver este gasto"
             )
     
+    response.headers["ETag"] = f'"{expense.version}"'
     return expense
 
 @router.put("/{expense_id}", response_model=Expense)
 def update_expense(
     expense_id: str,
     expense_update: ExpenseUpdate,
+    response: Response,
     telegram_id: Optional[str] = Query(None, description="ID de Telegram del usuario"),
+    if_match: Optional[str] = Header(None, description="Versión del gasto leída por el cliente"),
     db: Session = Depends(get_db)
 ):
-    """Actualiza un gasto existente."""
+    """Actualiza un gasto existente.
+    
+    Si se indica la versión leída (campo `version` o cabecera If-Match), el
+    gasto solo se actualiza si nadie lo ha modificado desde entonces; en caso
+    contrario se devuelve 409 con la versión actual.
+    """
+    expected_version = expense_update.version
+    if expected_version is None:
+        expected_version = _parse_if_match(if_match)
+    
     # Verificar que el gasto existe
     expense = ExpenseService.get_expense(db, expense_id)
     if not expense:
@@ -97,20 +240,31 @@ def update_expense(
             )
     
     # Actualizar el gasto
-    updated_expense = ExpenseService.update_expense(db, expense_id, expense_update)
+    try:
+        updated_expense = ExpenseService.update_expense(db, expense_id, expense_update, expected_version)
+    except ExpenseVersionConflict as e:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail={
+                "message": "El gasto fue modificado por otra persona",
+                "current_version": e.current_version
+            },
+            headers={"ETag": f'"{e.current_version}"'}
+        )
     if not updated_expense:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Error al actualizar el gasto"
         )
     
+    response.headers["ETag"] = f'"{updated_expense.version}"'
     return updated_expense
 
 @router.get("/member/{member_id}", response_model=List[Expense])
 def get_member_expenses(
     member_id: int,
     telegram_id: Optional[str] = Query(None, description="ID de Telegram del usuario"),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """Obtiene los gastos de un miembro."""
     member = MemberService.get_member(db, member_id)
@@ -136,10 +290,12 @@ def get_member_expenses(
 def get_family_expenses(
     family_id: str,
     telegram_id: Optional[str] = Query(None, description="ID de Telegram del usuario"),
-    db: Session = Depends(get_db)
+    offset: int = Query(0, ge=0, description="Gastos a omitir"),
+    limit: Optional[int] = Query(None, ge=1, le=100, description="Tamaño de página (sin límite si no se indica)"),
+    db: Session = Depends(get_read_db)
 ):
-    print(f"family_id: {family_id}")
-    """Obtiene los gastos de una familia."""
+    """Obtiene los gastos de una familia, opcionalmente paginados."""
+    logger.debug("Obteniendo gastos de la familia %s", family_id)
     # Si se proporciona un telegram_id, verificar que el usuario pertenece a la familia
     if telegram_id:
         member = MemberService.get_member_by_telegram_id(db, telegram_id)
@@ -150,7 +306,7 @@ def get_family_expenses(
                 detail="No tienes permiso para ver los gastos de esta familia"
             )
     
-    return ExpenseService.get_expenses_by_family(db, family_id)
+    return ExpenseService.get_expenses_by_family(db, family_id, offset, limit)
 
 @router.delete("/{expense_id}", response_model=Expense)
 def delete_expense(
@@ -1,12 +1,21 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Header
+from fastapi.responses import StreamingResponse
+from starlette.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
 from typing import List, Optional
+from datetime import datetime
+import asyncio
+import json
 
-from models.database import get_db
-from models.schemas import Family, FamilyCreate, Member, MemberCreate
+from models.database import get_db, get_read_db, ReadSessionLocal
+from models.schemas import Family, FamilyCreate, Member, MemberCreate, FamilyBalancesPage, MAX_BALANCES_PAGE
 from services.family_service import FamilyService
 from services.member_service import MemberService
 from services.balance_service import BalanceService
+from services.event_broker import EventBroker
+
+# Intervalo entre comentarios keep-alive en el stream de eventos (segundos)
+EVENTS_KEEPALIVE_INTERVAL = 15
 
 router = APIRouter(
     prefix="/families",
@@ -22,11 +31,25 @@ def create_family(
     """Crea una nueva familia."""
     return FamilyService.create_family(db, family)
 
+@router.get("/balances", response_model=FamilyBalancesPage)
+def get_families_balances(
+    after: Optional[str] = Query(None, description="ID de la última familia de la página anterior"),
+    limit: int = Query(100, ge=1, le=MAX_BALANCES_PAGE, description="Familias por página"),
+    since: Optional[datetime] = Query(None, description="Contar también los gastos desde esta fecha"),
+    db: Session = Depends(get_read_db)
+):
+    """Obtiene los balances de varias familias, ordenadas por ID.
+    
+    Para recorrer todas las familias, se pide la página siguiente con
+    `after` igual al `next_after` de la respuesta hasta que sea nulo.
+    """
+    return BalanceService.calculate_families_balances(db, after, limit, since)
+
 @router.get("/{family_id}", response_model=Family)
 def get_family(
     family_id: str,
     telegram_id: Optional[str] = Query(None, description="ID de Telegram del usuario"),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """Obtiene información de una familia."""
     # Si se proporciona un telegram_id, verificar que el usuario pertenece a la familia
@@ -50,7 +73,7 @@ def get_family(
 def get_family_members(
     family_id: str,
     telegram_id: Optional[str] = Query(None, description="ID de Telegram del usuario"),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """Obtiene los miembros de una familia."""
     # Si se proporciona un telegram_id, verificar que el usuario pertenece a la familia
@@ -96,7 +119,7 @@ def add_member_to_family(
 def get_family_balances(
     family_id: str,
     telegram_id: Optional[str] = Query(None, description="ID de Telegram del usuario"),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """Obtiene los balances de una familia."""
     # Si se proporciona un telegram_id, verificar que el usuario pertenece a la familia
@@ -108,4 +131,63 @@ def get_family_balances(
                 detail="No tienes permiso para acceder a esta familia"
             )
     
-    return BalanceService.calculate_family_balances(db, family_id) 
\ No newline at end of file
+    return BalanceService.calculate_family_balances(db, family_id) 
+
+def _check_family_access(family_id: str, telegram_id: Optional[str]):
+    """Verifica que la familia existe y que el usuario pertenece a ella."""
+    db = ReadSessionLocal()
+    try:
+        if telegram_id:
+            member = MemberService.get_member_by_telegram_id(db, telegram_id)
+            if not member or member.family_id != family_id:
+                raise HTTPException(
+                    status_code=status.HTTP_403_FORBIDDEN,
+                    detail="No tienes permiso para acceder a esta familia"
+                )
+        
+        if not FamilyService.get_family(db, family_id):
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Familia no encontrada"
+            )
+    finally:
+        db.close()
+
+@router.get("/{family_id}/events")
+async def stream_family_events(
+    family_id: str,
+    telegram_id: Optional[str] = Query(None, description="ID de Telegram del usuario"),
+    last_event_id: Optional[int] = Header(None, alias="Last-Event-ID")
+):
+    """Stream (Server-Sent Events) de cambios en gastos y pagos de una familia.
+    
+    Cada evento tiene el tipo (`expense.created`, `payment.deleted`, ...), el ID
+    de la entidad y la nueva versión de la familia.
+    """
+    await run_in_threadpool(_check_family_access, family_id, telegram_id)
+    subscription = await EventBroker.subscribe(family_id, last_event_id)
+    
+    async def event_stream():
+        try:
+            yield "retry: 3000\n\n"
+            while True:
+                if subscription.overflowed:
+                    # El cliente no ha consumido a tiempo: debe volver a sincronizar
+                    yield "event: resync\ndata: {}\n\n"
+                    break
+                try:
+                    event_id, event = await asyncio.wait_for(
+                        subscription.queue.get(), timeout=EVENTS_KEEPALIVE_INTERVAL
+                    )
+                except asyncio.TimeoutError:
+                    yield ": keep-alive\n\n"
+                    continue
+                yield f"id: {event_id}\nevent: {event['type']}\ndata: {json.dumps(event)}\n\n"
+        finally:
+            EventBroker.unsubscribe(subscription)
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
\ No newline at end of file
@@ -2,7 +2,7 @@ from fastapi import APIRouter, Depends, HTTPException, status, Query
 from sqlalchemy.orm import Session
 from typing import List, Optional
 
-from models.database import get_db
+from models.database import get_db, get_read_db
 from models.schemas import Member, MemberCreate, MemberBalance, MemberUpdate
 from services.member_service import MemberService
 from services.balance_service import BalanceService
@@ -16,7 +16,7 @@ router = APIRouter(
 @router.get("/{telegram_id}", response_model=Member)
 def get_member_by_telegram_id(
     telegram_id: str,
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """Obtiene un miembro por su ID de Telegram."""
     member = MemberService.get_member_by_telegram_id(db, telegram_id)
@@ -31,7 +31,7 @@ def get_member_by_telegram_id(
 def get_member_by_id(
     member_id: int,
     telegram_id: Optional[str] = Query(None, description="ID de Telegram del usuario"),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """Obtiene un miembro por su ID."""
     member = MemberService.get_member(db, member_id)
@@ -55,7 +55,7 @@ def get_member_by_id(
 @router.get("/me/balance", response_model=MemberBalance)
 def get_current_member_balance(
     telegram_id: str = Query(..., description="ID de Telegram del usuario"),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """Obtiene el balance del miembro actual."""
     member = MemberService.get_member_by_telegram_id(db, telegram_id)
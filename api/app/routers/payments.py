@@ -1,11 +1,16 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+import logging
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Header
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 from typing import List, Optional
 
-from models.database import get_db
+from models.database import get_db, get_read_db
 from models.schemas import Payment, PaymentCreate
 from services.payment_service import PaymentService
 from services.member_service import MemberService
+from services.idempotency_service import IdempotencyService, IdempotencyKeyError
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter(
     prefix="/payments",
@@ -13,13 +18,36 @@ router = APIRouter(
     responses={404: {"description": "Not found"}},
 )
 
+def _replay_payment(db: Session, idempotency_key: str, request_hash: str):
+    """Devuelve el pago ya creado con esta clave de idempotencia, o None si la clave es nueva."""
+    try:
+        payment_id = IdempotencyService.find(db, idempotency_key, "payment", request_hash)
+    except IdempotencyKeyError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    if payment_id is None:
+        return None
+    
+    payment = PaymentService.get_payment(db, payment_id)
+    if not payment:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="El pago creado con esta clave de idempotencia fue eliminado"
+        )
+    logger.info("Pago %s devuelto de nuevo por la clave de idempotencia %s", payment_id, idempotency_key)
+    return payment
+
 @router.post("/", response_model=Payment, status_code=status.HTTP_201_CREATED)
 def create_payment(
     payment: PaymentCreate,
     telegram_id: Optional[str] = Query(None, description="ID de Telegram del usuario"),
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key", description="Clave para reintentar la creación sin duplicarla"),
     db: Session = Depends(get_db)
 ):
-    """Crea un nuevo pago."""
+    """Crea un nuevo pago.
+    
+    Si se envía la cabecera Idempotency-Key y ya se creó un pago con esa
+    clave, se devuelve ese pago en lugar de crear otro.
+    """
     # Si se proporciona un telegram_id, verificar que el usuario pertenece a la misma familia que los miembros del pago
     if telegram_id:
         requesting_member = MemberService.get_member_by_telegram_id(db, telegram_id)
@@ -32,13 +60,28 @@ def create_payment(
                 detail="No tienes permiso para crear pagos para estos miembros"
             )
     
-    return PaymentService.create_payment(db, payment)
+    if idempotency_key is None:
+        return PaymentService.create_payment(db, payment)
+    
+    request_hash = IdempotencyService.fingerprint(payment)
+    existing = _replay_payment(db, idempotency_key, request_hash)
+    if existing:
+        return existing
+    try:
+        return PaymentService.create_payment(db, payment, idempotency_key, request_hash)
+    except IntegrityError:
+        # Otra solicitud con la misma clave se guardó a la vez
+        db.rollback()
+        existing = _replay_payment(db, idempotency_key, request_hash)
+        if not existing:
+            raise
+        return existing
 
 @router.get("/{payment_id}", response_model=Payment)
 def get_payment(
     payment_id: str,
     telegram_id: Optional[str] = Query(None, description="ID de Telegram del usuario"),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """Obtiene un pago por su ID."""
     payment = PaymentService.get_payment(db, payment_id)
@@ -51,8 +94,8 @@ def get_payment(
     # Si se proporciona un telegram_id, verificar que el usuario pertenece a la misma familia que los miembros del pago
     if telegram_id:
         requesting_member = MemberService.get_member_by_telegram_id(db, telegram_id)
-        from_member = MemberService.get_member(db, payment.from_member)
-        to_member = MemberService.get_member(db, payment.to_member)
+        from_member = MemberService.get_member(db, payment.from_member_id)
+        to_member = MemberService.get_member(db, payment.to_member_id)
         
         if not requesting_member or not from_member or not to_member or requesting_member.family_id != from_member.family_id:
             raise HTTPException(
@@ -66,7 +109,7 @@ def get_payment(
 def get_member_payments(
     member_id: int,
     telegram_id: Optional[str] = Query(None, description="ID de Telegram del usuario"),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """Obtiene los pagos de un miembro."""
     member = MemberService.get_member(db, member_id)
@@ -92,9 +135,11 @@ def get_member_payments(
 def get_family_payments(
     family_id: str,
     telegram_id: Optional[str] = Query(None, description="ID de Telegram del usuario"),
-    db: Session = Depends(get_db)
+    offset: int = Query(0, ge=0, description="Pagos a omitir"),
+    limit: Optional[int] = Query(None, ge=1, le=100, description="Tamaño de página (sin límite si no se indica)"),
+    db: Session = Depends(get_read_db)
 ):
-    """Obtiene los pagos de una familia."""
+    """Obtiene los pagos de una familia, opcionalmente paginados."""
     # Si se proporciona un telegram_id, verificar que el usuario pertenece a la familia
     if telegram_id:
         member = MemberService.get_member_by_telegram_id(db, telegram_id)
@@ -105,7 +150,7 @@ def get_family_payments(
                 detail="No tienes permiso para ver los pagos de esta familia"
             )
     
-    return PaymentService.get_payments_by_family(db, family_id)
+    return PaymentService.get_payments_by_family(db, family_id, offset, limit)
 
 @router.delete("/{payment_id}", response_model=Payment)
 def delete_payment(
@@ -124,8 +169,8 @@ def delete_payment(
     # Si se proporciona un telegram_id, verificar que el usuario pertenece a la misma familia que los miembros del pago
     if telegram_id:
         requesting_member = MemberService.get_member_by_telegram_id(db, telegram_id)
-        from_member = MemberService.get_member(db, payment.from_member)
-        to_member = MemberService.get_member(db, payment.to_member)
+        from_member = MemberService.get_member(db, payment.from_member_id)
+        to_member = MemberService.get_member(db, payment.to_member_id)
         
         if not requesting_member or not from_member or not to_member or requesting_member.family_id != from_member.family_id:
             raise HTTPException(
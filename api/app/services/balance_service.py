@@ -1,13 +1,24 @@
+from sqlalchemy import func
 from sqlalchemy.orm import Session
-from models.models import Family, Member, Expense, Payment
-from models.schemas import MemberBalance, DebtDetail, CreditDetail
-from typing import List, Dict
+from models.models import Family, Member, Expense, Payment, expense_member_association
+from models.schemas import MemberBalance, DebtDetail, CreditDetail, FamilyBalances, FamilyBalancesPage, MemberBalanceSummary
+from services.cache_service import CacheService
+from datetime import datetime
+from typing import List, Dict, Optional
 
 class BalanceService:
     """Servicio para calcular los balances de una familia."""
     
     @staticmethod
     def calculate_family_balances(db: Session, family_id: str) -> List[MemberBalance]:
+        """Obtiene los balances de una familia, usando la caché si sigue vigente."""
+        return CacheService.get_or_load(
+            db, "balances", family_id,
+            lambda: BalanceService._calculate_family_balances(db, family_id)
+        )
+    
+    @staticmethod
+    def _calculate_family_balances(db: Session, family_id: str) -> List[MemberBalance]:
         """Calcula los balances de todos los miembros de una familia."""
         # Obtener todos los miembros de la familia
         members = db.query(Member).filter(Member.family_id == family_id).all()
@@ -64,13 +75,10 @@ class BalanceService:
                     "amount": amount_per_member
                 })
         
-        # Procesar los pagos
-        # Usar consultas separadas para from_member y to_member para evitar el uso de in_() en relaciones
-        payments_from = db.query(Payment).filter(Payment.from_member_id.in_(member_ids)).all()
-        payments_to = db.query(Payment).filter(Payment.to_member_id.in_(member_ids)).all()
-        
-        # Combinar los resultados
-        payments = payments_from + payments_to
+        # Procesar los pagos. Solo cuentan los pagos entre miembros de la
+        # familia, así que basta con filtrar por quien paga (filtrar también
+        # por quien recibe y unir los resultados contaría dos veces cada pago)
+        payments = db.query(Payment).filter(Payment.from_member_id.in_(member_ids)).all()
         
         for payment in payments:
             from_member_id = payment.from_member_id
@@ -114,4 +122,138 @@ class BalanceService:
             if balance.member_id == str(member_id):
                 return balance
         
-        return None 
\ No newline at end of file
+        return None
+    
+    @staticmethod
+    def calculate_families_balances(
+        db: Session,
+        after: Optional[str] = None,
+        limit: int = 100,
+        since: Optional[datetime] = None
+    ) -> FamilyBalancesPage:
+        """Calcula los balances de una página de familias en una sola pasada.
+        
+        Las familias se recorren por ID (paginación por clave: cada página
+        empieza después del último ID de la anterior), y cada página se
+        calcula con un número fijo de consultas agregadas, sea cual sea el
+        número de familias. Los totales coinciden con los de
+        calculate_family_balances, sin el detalle de deudas y créditos.
+        
+        Args:
+            db: Sesión de base de datos
+            after: ID de la última familia de la página anterior
+            limit: Número máximo de familias de la página
+            since: Si se indica, cuenta también los gastos registrados desde esa fecha
+            
+        Returns:
+            FamilyBalancesPage: Las familias y el valor de `after` de la página siguiente
+        """
+        query = db.query(Family.id, Family.name)
+        if after:
+            query = query.filter(Family.id > after)
+        families = query.order_by(Family.id).limit(limit).all()
+        if not families:
+            return FamilyBalancesPage()
+        family_ids = [family.id for family in families]
+        
+        members = (
+            db.query(Member.id, Member.name, Member.telegram_id, Member.family_id)
+            .filter(Member.family_id.in_(family_ids))
+            .order_by(Member.id)
+            .all()
+        )
+        family_of = {member.id: member.family_id for member in members}
+        members_by_family: Dict[str, List[int]] = {}
+        for member in members:
+            members_by_family.setdefault(member.family_id, []).append(member.id)
+        debt = dict.fromkeys(family_of, 0.0)
+        owed = dict.fromkeys(family_of, 0.0)
+        
+        # Gastos sin reparto explícito: se dividen entre todos los miembros,
+        # así que basta con el total por pagador
+        split_expenses = db.query(expense_member_association.c.expense_id)
+        unsplit = (
+            db.query(Expense.paid_by, func.sum(Expense.amount))
+            .join(Member, Member.id == Expense.paid_by)
+            .filter(Member.family_id.in_(family_ids), ~Expense.id.in_(split_expenses))
+            .group_by(Expense.paid_by)
+            .all()
+        )
+        for payer_id, total in unsplit:
+            family_members = members_by_family[family_of[payer_id]]
+            share = total / len(family_members)
+            for member_id in family_members:
+                if member_id != payer_id:
+                    debt[member_id] += share
+                    owed[payer_id] += share
+        
+        # Gastos repartidos entre algunos miembros: una fila por gasto y miembro
+        split_rows = (
+            db.query(Expense.id, Expense.paid_by, Expense.amount, expense_member_association.c.member_id)
+            .join(expense_member_association, expense_member_association.c.expense_id == Expense.id)
+            .join(Member, Member.id == Expense.paid_by)
+            .filter(Member.family_id.in_(family_ids))
+            .order_by(Expense.id)
+            .all()
+        )
+        split_members: Dict[str, List[int]] = {}
+        for expense_id, _, _, member_id in split_rows:
+            split_members.setdefault(expense_id, []).append(member_id)
+        for expense_id, payer_id, amount, member_id in split_rows:
+            if member_id == payer_id or member_id not in debt:
+                continue
+            share = amount / len(split_members[expense_id])
+            debt[member_id] += share
+            owed[payer_id] += share
+        
+        # Pagos entre miembros de una misma familia, agrupados por pareja
+        payments = (
+            db.query(Payment.from_member_id, Payment.to_member_id, func.sum(Payment.amount))
+            .join(Member, Member.id == Payment.from_member_id)
+            .filter(Member.family_id.in_(family_ids))
+            .group_by(Payment.from_member_id, Payment.to_member_id)
+            .all()
+        )
+        for from_member_id, to_member_id, total in payments:
+            if family_of.get(to_member_id) == family_of[from_member_id]:
+                debt[from_member_id] -= total
+                owed[to_member_id] -= total
+        
+        # Actividad del periodo
+        activity: Dict[str, tuple] = {}
+        if since is not None:
+            activity = {
+                family_id: (count, total or 0.0)
+                for family_id, count, total in (
+                    db.query(Member.family_id, func.count(Expense.id), func.sum(Expense.amount))
+                    .join(Member, Member.id == Expense.paid_by)
+                    .filter(Member.family_id.in_(family_ids), Expense.created_at >= since)
+                    .group_by(Member.family_id)
+                    .all()
+                )
+            }
+        
+        members_out: Dict[str, List[MemberBalanceSummary]] = {}
+        for member in members:
+            members_out.setdefault(member.family_id, []).append(MemberBalanceSummary(
+                member_id=str(member.id),
+                name=member.name,
+                telegram_id=member.telegram_id,
+                total_debt=debt[member.id],
+                total_owed=owed[member.id],
+                net_balance=owed[member.id] - debt[member.id]
+            ))
+        
+        return FamilyBalancesPage(
+            families=[
+                FamilyBalances(
+                    family_id=family.id,
+                    name=family.name,
+                    members=members_out.get(family.id, []),
+                    expenses_count=activity.get(family.id, (0, 0.0))[0],
+                    expenses_total=activity.get(family.id, (0, 0.0))[1]
+                )
+                for family in families
+            ],
+            next_after=family_ids[-1] if len(families) == limit else None
+        )
@@ -0,0 +1,94 @@
+import os
+import threading
+from collections import OrderedDict
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from models.models import CacheVersion
+
+class CacheService:
+    """Caché en proceso con invalidación entre workers.
+
+    Cada entrada se guarda junto con la versión de la familia con la que se
+    calculó. La versión vive en la tabla `cache_versions` de la base de datos
+    compartida, así que cuando un worker escribe, el resto detecta en su
+    siguiente lectura que la entrada ya no es válida.
+    """
+
+    MAX_ENTRIES = int(os.getenv("API_CACHE_MAX_ENTRIES", "1024"))
+
+    _entries = OrderedDict()
+    _lock = threading.Lock()
+
+    @staticmethod
+    def get_version(db: Session, scope: str) -> int:
+        """Obtiene la versión actual de un ámbito (normalmente un family_id)."""
+        version = db.query(CacheVersion.version).filter(CacheVersion.scope == scope).scalar()
+        return version or 0
+
+    @staticmethod
+    def bump(db: Session, scope: str) -> int:
+        """Incrementa la versión de un ámbito.
+
+        No hace commit: debe llamarse antes del commit de la escritura que
+        invalida los datos, para que ambos cambios sean atómicos.
+
+        Returns:
+            int: La nueva versión
+        """
+        if not scope:
+            return 0
+
+        updated = db.query(CacheVersion).filter(CacheVersion.scope == scope).update(
+            {CacheVersion.version: CacheVersion.version + 1},
+            synchronize_session=False
+        )
+        if not updated:
+            try:
+                with db.begin_nested():
+                    db.add(CacheVersion(scope=scope, version=1))
+            except IntegrityError:
+                # Otro worker creó la fila a la vez: incrementar la existente
+                db.query(CacheVersion).filter(CacheVersion.scope == scope).update(
+                    {CacheVersion.version: CacheVersion.version + 1},
+                    synchronize_session=False
+                )
+
+        return CacheService.get_version(db, scope)
+
+    @staticmethod
+    def get_or_load(db: Session, kind: str, scope: str, loader):
+        """Devuelve un valor cacheado o lo calcula si la versión ha cambiado.
+
+        Args:
+            db: Sesión de base de datos
+            kind: Tipo de dato cacheado (por ejemplo "balances")
+            scope: Ámbito de invalidación (family_id)
+            loader: Función sin argumentos que calcula el valor
+
+        Returns:
+            El valor cacheado o recién calculado. No debe modificarse.
+        """
+        version = CacheService.get_version(db, scope)
+        key = (kind, scope)
+
+        with CacheService._lock:
+            entry = CacheService._entries.get(key)
+            if entry is not None and entry[0] == version:
+                CacheService._entries.move_to_end(key)
+                return entry[1]
+
+        value = loader()
+
+        with CacheService._lock:
+            CacheService._entries[key] = (version, value)
+            CacheService._entries.move_to_end(key)
+            while len(CacheService._entries) > CacheService.MAX_ENTRIES:
+                CacheService._entries.popitem(last=False)
+
+        return value
+
+    @staticmethod
+    def clear():
+        """Vacía la caché del proceso actual."""
+        with CacheService._lock:
+            CacheService._entries.clear()
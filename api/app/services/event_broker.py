@@ -0,0 +1,157 @@
+import asyncio
+import logging
+import os
+import time
+from starlette.concurrency import run_in_threadpool
+from models.database import SessionLocal
+from services.event_service import EventService
+
+logger = logging.getLogger(__name__)
+
+class Subscription:
+    """Suscripción de un cliente al stream de eventos de una familia."""
+
+    def __init__(self, family_id: str, max_queue: int):
+        self.family_id = family_id
+        self.queue = asyncio.Queue(maxsize=max_queue)
+        # Se activa si el cliente no consume los eventos a tiempo
+        self.overflowed = False
+
+class EventBroker:
+    """Reparte los eventos de familia entre los suscriptores SSE del proceso.
+
+    Un único bucle por proceso consulta la tabla family_events y reparte los
+    eventos nuevos entre las colas de los suscriptores. Como los eventos se
+    leen de la base de datos, también llegan los escritos por otros workers.
+    Los suscriptores inactivos solo son corrutinas esperando en su cola, sin
+    hilos dedicados.
+
+    Los eventos se leen por ID autoincremental. Con varios procesos
+    escribiendo en una base de datos como PostgreSQL, un ID bajo puede
+    confirmarse después de uno más alto; los IDs que faltan se vuelven a
+    buscar durante GAP_TIMEOUT segundos. Con SQLite las escrituras se
+    confirman en orden y no hay huecos.
+    """
+
+    POLL_INTERVAL = float(os.getenv("API_EVENTS_POLL_INTERVAL", "0.5"))
+    MAX_QUEUE = int(os.getenv("API_EVENTS_MAX_QUEUE", "100"))
+    GAP_TIMEOUT = float(os.getenv("API_EVENTS_GAP_TIMEOUT", "10"))
+    # Huecos que se vigilan como máximo (un salto mayor de la secuencia no
+    # se debe a transacciones en curso)
+    MAX_GAPS = 1000
+
+    _subscribers = {}
+    _last_id = 0
+    _gaps = {}
+    _task = None
+
+    @staticmethod
+    async def subscribe(family_id: str, last_event_id: int = None) -> Subscription:
+        """Registra un suscriptor para una familia.
+
+        Args:
+            family_id: ID de la familia
+            last_event_id: Último evento recibido por el cliente (cabecera
+                Last-Event-ID) para reenviar los que se haya perdido
+
+        Returns:
+            Subscription: La suscripción creada
+        """
+        subscription = Subscription(family_id, EventBroker.MAX_QUEUE)
+
+        last_id = None
+        if not EventBroker._is_polling():
+            last_id = await run_in_threadpool(EventBroker._fetch_last_id)
+
+        missed = []
+        if last_event_id is not None:
+            missed = await run_in_threadpool(
+                EventBroker._fetch_events, last_event_id, family_id, EventBroker.MAX_QUEUE + 1
+            )
+            if len(missed) > EventBroker.MAX_QUEUE:
+                # Se perdió más de lo que cabe en la cola: debe volver a sincronizar
+                subscription.overflowed = True
+                missed = []
+
+        # A partir de aquí no hay awaits: el bucle de consulta no puede
+        # intercalar eventos entre la recuperación y el registro
+        if not EventBroker._is_polling():
+            if last_id is not None:
+                EventBroker._last_id = last_id
+            EventBroker._task = asyncio.create_task(EventBroker._poll())
+
+        for event_id, _, event in missed:
+            if event_id <= EventBroker._last_id:
+                EventBroker._deliver(subscription, event_id, event)
+
+        EventBroker._subscribers.setdefault(family_id, set()).add(subscription)
+        return subscription
+
+    @staticmethod
+    def unsubscribe(subscription: Subscription):
+        """Elimina un suscriptor."""
+        subscribers = EventBroker._subscribers.get(subscription.family_id)
+        if subscribers is not None:
+            subscribers.discard(subscription)
+            if not subscribers:
+                del EventBroker._subscribers[subscription.family_id]
+
+    @staticmethod
+    def _is_polling():
+        return EventBroker._task is not None and not EventBroker._task.done()
+
+    @staticmethod
+    def _fetch_last_id():
+        db = SessionLocal()
+        try:
+            return EventService.get_last_event_id(db)
+        finally:
+            db.close()
+
+    @staticmethod
+    def _fetch_events(last_id, family_id=None, limit=500, extra_ids=()):
+        db = SessionLocal()
+        try:
+            return [
+                (event.id, event.family_id, EventService.to_dict(event))
+                for event in EventService.get_events_after(db, last_id, family_id, limit, extra_ids)
+            ]
+        finally:
+            db.close()
+
+    @staticmethod
+    def _deliver(subscription: Subscription, event_id: int, event: dict):
+        try:
+            subscription.queue.put_nowait((event_id, event))
+        except asyncio.QueueFull:
+            subscription.overflowed = True
+
+    @staticmethod
+    async def _poll():
+        """Bucle de consulta; termina cuando no quedan suscriptores."""
+        while EventBroker._subscribers:
+            await asyncio.sleep(EventBroker.POLL_INTERVAL)
+            now = time.monotonic()
+            for event_id, deadline in list(EventBroker._gaps.items()):
+                if deadline < now:
+                    # Transacción deshecha: el ID no llegará a existir
+                    del EventBroker._gaps[event_id]
+            try:
+                events = await run_in_threadpool(
+                    EventBroker._fetch_events, EventBroker._last_id, extra_ids=tuple(EventBroker._gaps)
+                )
+            except Exception:
+                logger.exception("Error al consultar eventos")
+                continue
+
+            for event_id, family_id, event in events:
+                if event_id > EventBroker._last_id:
+                    gap = range(EventBroker._last_id + 1, event_id)
+                    if len(gap) <= EventBroker.MAX_GAPS:
+                        for missing_id in gap:
+                            EventBroker._gaps[missing_id] = now + EventBroker.GAP_TIMEOUT
+                    EventBroker._last_id = event_id
+                else:
+                    EventBroker._gaps.pop(event_id, None)
+                for subscription in list(EventBroker._subscribers.get(family_id, ())):
+                    EventBroker._deliver(subscription, event_id, event)
@@ -0,0 +1,73 @@
+from sqlalchemy import or_
+from sqlalchemy.orm import Session
+from sqlalchemy.sql import func
+from models.models import FamilyEvent
+from services.cache_service import CacheService
+
+class EventService:
+    """Servicio para registrar y consultar los eventos de cambio de las familias."""
+
+    @staticmethod
+    def record(db: Session, family_id: str, entity: str, action: str, entity_id: str) -> int:
+        """Registra un cambio e incrementa la versión de la familia.
+
+        No hace commit: debe llamarse antes del commit de la escritura.
+
+        Args:
+            db: Sesión de base de datos
+            family_id: ID de la familia afectada
+            entity: Tipo de entidad ("expense" o "payment")
+            action: Acción ("created", "updated" o "deleted")
+            entity_id: ID de la entidad
+
+        Returns:
+            int: La nueva versión de la familia
+        """
+        if not family_id:
+            return 0
+
+        version = CacheService.bump(db, family_id)
+        db.add(FamilyEvent(
+            family_id=family_id,
+            entity=entity,
+            action=action,
+            entity_id=str(entity_id),
+            version=version
+        ))
+        return version
+
+    @staticmethod
+    def get_last_event_id(db: Session) -> int:
+        """Obtiene el ID del último evento registrado."""
+        return db.query(func.max(FamilyEvent.id)).scalar() or 0
+
+    @staticmethod
+    def get_events_after(db: Session, last_id: int, family_id: str = None, limit: int = 500, extra_ids=()):
+        """Obtiene los eventos posteriores a `last_id`, en orden.
+
+        Args:
+            db: Sesión de base de datos
+            last_id: Último evento ya leído
+            family_id: Solo los eventos de esta familia (opcional)
+            limit: Número máximo de eventos
+            extra_ids: IDs anteriores a `last_id` que también se buscan
+
+        Returns:
+            list: Los eventos ordenados por ID
+        """
+        condition = FamilyEvent.id > last_id
+        if extra_ids:
+            condition = or_(condition, FamilyEvent.id.in_(list(extra_ids)))
+        query = db.query(FamilyEvent).filter(condition)
+        if family_id:
+            query = query.filter(FamilyEvent.family_id == family_id)
+        return query.order_by(FamilyEvent.id).limit(limit).all()
+
+    @staticmethod
+    def to_dict(event: FamilyEvent) -> dict:
+        """Convierte un evento en su representación compacta."""
+        return {
+            "type": f"{event.entity}.{event.action}",
+            "id": event.entity_id,
+            "version": event.version
+        }
@@ -1,13 +1,27 @@
+from typing import List
 from sqlalchemy.orm import Session
 from models.models import Expense, Member
 from models.schemas import ExpenseCreate, ExpenseUpdate
+from services.event_service import EventService
+from services.idempotency_service import IdempotencyService
+
+class ExpenseVersionConflict(Exception):
+    """El gasto fue modificado por otra persona desde que el cliente lo leyó."""
+    
+    def __init__(self, current_version):
+        super().__init__(f"El gasto está en la versión {current_version}")
+        self.current_version = current_version
 
 class ExpenseService:
     """Servicio para manejar los gastos."""
     
     @staticmethod
-    def create_expense(db: Session, expense: ExpenseCreate):
-        """Crea un nuevo gasto."""
+    def create_expense(db: Session, expense: ExpenseCreate, idempotency_key: str = None, request_hash: str = None):
+        """Crea un nuevo gasto.
+
+        Si se indica una clave de idempotencia, se guarda en la misma
+        transacción que el gasto.
+        """
         # Crear el gasto sin el campo split_among primero
         db_expense = Expense(
             description=expense.description,
@@ -31,10 +45,61 @@ class ExpenseService:
                 db_expense.split_among = members
         
         db.add(db_expense)
+        db.flush()
+        EventService.record(db, db_expense.family_id, "expense", "created", db_expense.id)
+        if idempotency_key:
+            IdempotencyService.record(db, idempotency_key, "expense", request_hash, db_expense.id)
         db.commit()
         db.refresh(db_expense)
         return db_expense
     
+    @staticmethod
+    def create_expenses(db: Session, expenses: List[ExpenseCreate], idempotency_key: str = None, request_hash: str = None):
+        """Crea varios gastos en una sola transacción.
+
+        O se crean todos o ninguno. Los pagadores y los miembros de cada
+        familia se consultan una sola vez para todo el lote. Si se indica una
+        clave de idempotencia, cada gasto se guarda con la clave derivada de
+        su posición (IdempotencyService.item_key).
+        """
+        payer_ids = {expense.paid_by for expense in expenses}
+        payers = {m.id: m for m in db.query(Member).filter(Member.id.in_(payer_ids)).all()}
+        family_ids = {payer.family_id for payer in payers.values()}
+        family_members = {}
+        for member in db.query(Member).filter(Member.family_id.in_(family_ids)).all():
+            family_members.setdefault(member.family_id, []).append(member)
+        split_ids = {member_id for expense in expenses for member_id in expense.split_among or []}
+        split_members = {m.id: m for m in db.query(Member).filter(Member.id.in_(split_ids)).all()} if split_ids else {}
+
+        db_expenses = []
+        for expense in expenses:
+            db_expense = Expense(
+                description=expense.description,
+                amount=expense.amount,
+                paid_by=expense.paid_by
+            )
+            payer = payers.get(expense.paid_by)
+            if payer:
+                db_expense.family_id = payer.family_id
+                if not expense.split_among:
+                    db_expense.split_among = list(family_members.get(payer.family_id, []))
+                else:
+                    db_expense.split_among = [split_members[i] for i in expense.split_among if i in split_members]
+            db.add(db_expense)
+            db_expenses.append(db_expense)
+
+        db.flush()
+        for index, db_expense in enumerate(db_expenses):
+            EventService.record(db, db_expense.family_id, "expense", "created", db_expense.id)
+            if idempotency_key:
+                IdempotencyService.record(
+                    db, IdempotencyService.item_key(idempotency_key, index), "expense_bulk", request_hash, db_expense.id
+                )
+        db.commit()
+        for db_expense in db_expenses:
+            db.refresh(db_expense)
+        return db_expenses
+
     @staticmethod
     def get_expense(db: Session, expense_id: str):
         """Obtiene un gasto por su ID."""
@@ -46,20 +111,49 @@ class ExpenseService:
         return db.query(Expense).filter(Expense.paid_by == member_id).all()
     
     @staticmethod
-    def get_expenses_by_family(db: Session, family_id: str):
-        """Obtiene los gastos de una familia."""
+    def get_expenses_by_family(db: Session, family_id: str, offset: int = 0, limit: int = None):
+        """Obtiene los gastos de una familia.
+        
+        Si se indica `limit`, devuelve solo esa página, ordenada del gasto
+        más reciente al más antiguo.
+        """
         # Obtener los IDs de los miembros de la familia
         member_ids = [m.id for m in db.query(Member).filter(Member.family_id == family_id).all()]
         
         # Obtener los gastos donde el pagador es un miembro de la familia
-        return db.query(Expense).filter(Expense.paid_by.in_(member_ids)).all()
+        query = db.query(Expense).filter(Expense.paid_by.in_(member_ids))
+        if limit is None:
+            return query.all()
+        
+        return query.order_by(Expense.created_at.desc(), Expense.id).offset(offset).limit(limit).all()
     
     @staticmethod
-    def update_expense(db: Session, expense_id: str, expense_update: ExpenseUpdate):
-        """Actualiza un gasto existente."""
+    def update_expense(db: Session, expense_id: str, expense_update: ExpenseUpdate, expected_version: int = None):
+        """Actualiza un gasto existente.
+        
+        Si se indica `expected_version`, la actualización solo se aplica si el
+        gasto sigue en esa versión; en caso contrario se lanza
+        ExpenseVersionConflict. La comprobación y el incremento de la versión
+        se hacen en una sola sentencia UPDATE, por lo que dos ediciones
+        concurrentes no pueden sobrescribirse.
+        """
+        # Reservar la actualización incrementando la versión de forma condicional
+        query = db.query(Expense).filter(Expense.id == expense_id)
+        if expected_version is not None:
+            query = query.filter(Expense.version == expected_version)
+        updated = query.update({Expense.version: Expense.version + 1}, synchronize_session=False)
+        
+        if not updated:
+            db.rollback()
+            current = db.query(Expense).filter(Expense.id == expense_id).first()
+            if not current:
+                return None
+            raise ExpenseVersionConflict(current.version)
+        
         db_expense = db.query(Expense).filter(Expense.id == expense_id).first()
-        if not db_expense:
-            return None
+        
+        # Familia original, para invalidar su caché si cambia el pagador
+        previous_family_id = db_expense.family_id
         
         # Actualizar los campos proporcionados
         if expense_update.description is not None:
@@ -87,6 +181,10 @@ class ExpenseService:
                 members = db.query(Member).filter(Member.id.in_(expense_update.split_among)).all()
                 db_expense.split_among = members
         
+        EventService.record(db, db_expense.family_id, "expense", "updated", db_expense.id)
+        if previous_family_id != db_expense.family_id:
+            EventService.record(db, previous_family_id, "expense", "deleted", db_expense.id)
+        
         db.commit()
         db.refresh(db_expense)
         return db_expense
@@ -96,6 +194,7 @@ class ExpenseService:
         """Elimina un gasto."""
         db_expense = db.query(Expense).filter(Expense.id == expense_id).first()
         if db_expense:
+            EventService.record(db, db_expense.family_id, "expense", "deleted", db_expense.id)
             db.delete(db_expense)
             db.commit()
         return db_expense 
\ No newline at end of file
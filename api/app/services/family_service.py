@@ -1,6 +1,7 @@
 from sqlalchemy.orm import Session
 from models.models import Family, Member
 from models.schemas import FamilyCreate, MemberCreate
+from services.cache_service import CacheService
 
 class FamilyService:
     """Servicio para manejar las familias."""
@@ -52,6 +53,7 @@ class FamilyService:
             family_id=family_id
         )
         db.add(db_member)
+        CacheService.bump(db, family_id)
         db.commit()
         db.refresh(db_member)
         return db_member 
\ No newline at end of file
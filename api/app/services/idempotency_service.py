@@ -0,0 +1,80 @@
+import hashlib
+import json
+from typing import Optional
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy.orm import Session
+from models.models import IdempotencyKey
+
+# Longitud máxima de la cabecera Idempotency-Key
+MAX_KEY_LENGTH = 64
+
+class IdempotencyKeyError(Exception):
+    """La clave no es válida o ya se usó para otra solicitud."""
+
+class IdempotencyService:
+    """Servicio para las claves de idempotencia de las creaciones."""
+
+    @staticmethod
+    def fingerprint(body) -> str:
+        """Huella del cuerpo de la solicitud, para detectar claves reutilizadas."""
+        data = json.dumps(jsonable_encoder(body), sort_keys=True, separators=(",", ":"))
+        return hashlib.sha256(data.encode()).hexdigest()
+
+    @staticmethod
+    def item_key(key: str, index: int) -> str:
+        """Clave de cada recurso de una creación múltiple (por ejemplo, /expenses/bulk).
+
+        Cada recurso se guarda con su propia clave, derivada de la enviada por
+        el cliente y de su posición en la solicitud.
+
+        Raises:
+            IdempotencyKeyError: Si la clave enviada no es válida
+        """
+        if not key or len(key) > MAX_KEY_LENGTH:
+            raise IdempotencyKeyError(
+                f"La cabecera Idempotency-Key debe tener entre 1 y {MAX_KEY_LENGTH} caracteres"
+            )
+        return hashlib.sha256(f"{key}#{index}".encode()).hexdigest()
+
+    @staticmethod
+    def find(db: Session, key: str, scope: str, request_hash: str) -> Optional[str]:
+        """Busca el recurso creado previamente con una clave.
+
+        Args:
+            db: Sesión de base de datos
+            key: Clave de idempotencia enviada por el cliente
+            scope: Tipo de recurso ("expense", "expense_bulk" o "payment")
+            request_hash: Huella del cuerpo de la solicitud actual
+
+        Returns:
+            str: ID del recurso creado con esa clave, o None si la clave es nueva
+
+        Raises:
+            IdempotencyKeyError: Si la clave no es válida o se usó con otro
+                tipo de recurso u otro cuerpo
+        """
+        if not key or len(key) > MAX_KEY_LENGTH:
+            raise IdempotencyKeyError(
+                f"La cabecera Idempotency-Key debe tener entre 1 y {MAX_KEY_LENGTH} caracteres"
+            )
+
+        record = db.query(IdempotencyKey).filter(IdempotencyKey.key == key).first()
+        if not record:
+            return None
+        if record.scope != scope or record.request_hash != request_hash:
+            raise IdempotencyKeyError("La clave de idempotencia ya se usó con otra solicitud")
+        return record.resource_id
+
+    @staticmethod
+    def record(db: Session, key: str, scope: str, request_hash: str, resource_id: str):
+        """Guarda la clave junto al recurso creado.
+
+        No hace commit: debe llamarse antes del commit de la creación, para
+        que la clave y el recurso se guarden en la misma transacción.
+        """
+        db.add(IdempotencyKey(
+            key=key,
+            scope=scope,
+            request_hash=request_hash,
+            resource_id=str(resource_id)
+        ))
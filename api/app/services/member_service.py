@@ -1,6 +1,7 @@
 from sqlalchemy.orm import Session
 from models.models import Member
 from models.schemas import MemberCreate, MemberUpdate
+from services.cache_service import CacheService
 
 class MemberService:
     """Servicio para manejar los miembros."""
@@ -14,6 +15,7 @@ class MemberService:
             family_id=member.family_id
         )
         db.add(db_member)
+        CacheService.bump(db, db_member.family_id)
         db.commit()
         db.refresh(db_member)
         return db_member
@@ -23,6 +25,15 @@ class MemberService:
         """Obtiene un miembro por su ID."""
         return db.query(Member).filter(Member.id == member_id).first()
     
+    @staticmethod
+    def get_members(db: Session, member_ids):
+        """Obtiene varios miembros por su ID en una sola consulta.
+        
+        Returns:
+            dict: ID -> miembro (los que no existen no aparecen)
+        """
+        return {m.id: m for m in db.query(Member).filter(Member.id.in_(set(member_ids))).all()}
+    
     @staticmethod
     def get_member_by_telegram_id(db: Session, telegram_id: str):
         """Obtiene un miembro por su ID de Telegram."""
@@ -39,6 +50,7 @@ class MemberService:
         for key, value in member.dict(exclude_unset=True).items():
             setattr(db_member, key, value)
         
+        CacheService.bump(db, db_member.family_id)
         db.commit()
         db.refresh(db_member)
         return db_member
@@ -50,6 +62,7 @@ class MemberService:
         if not db_member:
             return None
         
+        CacheService.bump(db, db_member.family_id)
         db.delete(db_member)
         db.commit()
         return db_member 
\ No newline at end of file
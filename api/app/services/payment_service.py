@@ -1,13 +1,19 @@
 from sqlalchemy.orm import Session
 from models.models import Payment, Member
 from models.schemas import PaymentCreate
+from services.event_service import EventService
+from services.idempotency_service import IdempotencyService
 
 class PaymentService:
     """Servicio para manejar los pagos."""
     
     @staticmethod
-    def create_payment(db: Session, payment: PaymentCreate):
-        """Crea un nuevo pago."""
+    def create_payment(db: Session, payment: PaymentCreate, idempotency_key: str = None, request_hash: str = None):
+        """Crea un nuevo pago.
+
+        Si se indica una clave de idempotencia, se guarda en la misma
+        transacción que el pago.
+        """
         # Obtener la familia del miembro que paga
         from_member = db.query(Member).filter(Member.id == payment.from_member).first()
         
@@ -22,6 +28,10 @@ class PaymentService:
             db_payment.family_id = from_member.family_id
             
         db.add(db_payment)
+        db.flush()
+        EventService.record(db, db_payment.family_id, "payment", "created", db_payment.id)
+        if idempotency_key:
+            IdempotencyService.record(db, idempotency_key, "payment", request_hash, db_payment.id)
         db.commit()
         db.refresh(db_payment)
         return db_payment
@@ -39,21 +49,30 @@ class PaymentService:
         ).all()
     
     @staticmethod
-    def get_payments_by_family(db: Session, family_id: str):
-        """Obtiene los pagos de una familia."""
+    def get_payments_by_family(db: Session, family_id: str, offset: int = 0, limit: int = None):
+        """Obtiene los pagos de una familia.
+        
+        Si se indica `limit`, devuelve solo esa página, ordenada del pago más
+        reciente al más antiguo.
+        """
         # Obtener los IDs de los miembros de la familia
         member_ids = [m.id for m in db.query(Member).filter(Member.family_id == family_id).all()]
         
         # Obtener los pagos donde el pagador o el receptor es un miembro de la familia
-        return db.query(Payment).filter(
+        query = db.query(Payment).filter(
             (Payment.from_member_id.in_(member_ids)) | (Payment.to_member_id.in_(member_ids))
-        ).all()
+        )
+        if limit is None:
+            return query.all()
+        
+        return query.order_by(Payment.created_at.desc(), Payment.id).offset(offset).limit(limit).all()
     
     @staticmethod
     def delete_payment(db: Session, payment_id: str):
         """Elimina un pago."""
         db_payment = db.query(Payment).filter(Payment.id == payment_id).first()
         if db_payment:
+            EventService.record(db, db_payment.family_id, "payment", "deleted", db_payment.id)
             db.delete(db_payment)
             db.commit()
         return db_payment 
\ No newline at end of file
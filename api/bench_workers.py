@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""
+Benchmark de rendimiento de la API según el número de workers.
+
+Para cada número de workers arranca run_workers.py sobre una base de datos
+SQLite temporal, crea una familia de prueba y lanza varios procesos cliente
+que mezclan lecturas (balances, gastos, miembros) con un pequeño porcentaje
+de escrituras, para que la invalidación de cachés entre workers también
+entre en juego.
+
+Uso:
+    python bench_workers.py [--workers 1 2 4] [--duration 10] [--clients 8]
+"""
+
+import argparse
+import http.client
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+API_DIR = os.path.dirname(os.path.abspath(__file__))
+
+def _request(conn, method, path, body=None):
+    """Realiza una solicitud sobre una conexión persistente y devuelve (status, json)."""
+    headers = {"Content-Type": "application/json"}
+    conn.request(method, path, body=json.dumps(body) if body is not None else None, headers=headers)
+    response = conn.getresponse()
+    data = response.read()
+    return response.status, (json.loads(data) if data else None)
+
+def _wait_until_ready(port, timeout=30):
+    """Espera a que la API responda en el puerto indicado."""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            conn = http.client.HTTPConnection("127.0.0.1", port, timeout=1)
+            status, _ = _request(conn, "GET", "/")
+            conn.close()
+            if status == 200:
+                return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError(f"La API no arrancó en el puerto {port}")
+
+def _seed(port, members=6, expenses=200):
+    """Crea una familia con miembros y gastos. Devuelve (family_id, member_ids)."""
+    conn = http.client.HTTPConnection("127.0.0.1", port)
+    suffix = random.randint(0, 10 ** 9)
+    _, family = _request(conn, "POST", "/families/", {
+        "name": "Benchmark",
+        "members": [{"name": f"M{i}", "telegram_id": f"bench-{suffix}-{i}"} for i in range(members)]
+    })
+    member_ids = [m["id"] for m in family["members"]]
+    for i in range(expenses):
+        _request(conn, "POST", "/expenses/", {
+            "description": f"Gasto {i}",
+            "amount": round(random.uniform(1, 100), 2),
+            "paid_by": random.choice(member_ids)
+        })
+    conn.close()
+    return family["id"], member_ids
+
+def _client(port, family_id, member_ids, duration, write_ratio):
+    """Proceso cliente: lanza solicitudes durante `duration` segundos.
+
+    Returns:
+        tuple: (solicitudes completadas, errores)
+    """
+    conn = http.client.HTTPConnection("127.0.0.1", port)
+    paths = [
+        f"/families/{family_id}/balances",
+        f"/expenses/family/{family_id}",
+        f"/families/{family_id}/members",
+    ]
+    done = errors = 0
+    deadline = time.monotonic() + duration
+    while time.monotonic() < deadline:
+        try:
+            if random.random() < write_ratio:
+                status, _ = _request(conn, "POST", "/expenses/", {
+                    "description": "Escritura de benchmark",
+                    "amount": 1.0,
+                    "paid_by": random.choice(member_ids)
+                })
+            else:
+                status, _ = _request(conn, "GET", random.choice(paths))
+            done += 1
+            if status >= 400:
+                errors += 1
+        except (OSError, http.client.HTTPException):
+            errors += 1
+            conn.close()
+            conn = http.client.HTTPConnection("127.0.0.1", port)
+    conn.close()
+    return done, errors
+
+def run_benchmark(workers, port, duration, clients, write_ratio):
+    """Arranca la API con `workers` procesos y mide el rendimiento.
+
+    Returns:
+        tuple: (solicitudes por segundo, errores)
+    """
+    with tempfile.TemporaryDirectory() as tmp:
+        env = dict(os.environ, SQLALCHEMY_DATABASE_URL=f"sqlite:///{os.path.join(tmp, 'bench.db')}")
+        env.pop("SQLALCHEMY_READ_DATABASE_URL", None)
+        server = subprocess.Popen(
+            [sys.executable, "run_workers.py", "--workers", str(workers),
+             "--host", "127.0.0.1", "--port", str(port)],
+            cwd=API_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+        )
+        try:
+            _wait_until_ready(port)
+            family_id, member_ids = _seed(port)
+            with ProcessPoolExecutor(max_workers=clients) as pool:
+                futures = [
+                    pool.submit(_client, port, family_id, member_ids, duration, write_ratio)
+                    for _ in range(clients)
+                ]
+                results = [f.result() for f in futures]
+        finally:
+            server.terminate()
+            server.wait(timeout=30)
+
+    total = sum(done for done, _ in results)
+    errors = sum(err for _, err in results)
+    return total / duration, errors
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark de la API con varios workers")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--clients", type=int, default=8)
+    parser.add_argument("--write-ratio", type=float, default=0.02)
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+
+    print(f"{'workers':>8} {'req/s':>10} {'errores':>8} {'escalado':>9}")
+    baseline = None
+    for i, workers in enumerate(args.workers):
+        rps, errors = run_benchmark(workers, args.port + i, args.duration, args.clients, args.write_ratio)
+        baseline = baseline or rps
+        print(f"{workers:>8} {rps:>10.1f} {errors:>8} {rps / baseline:>8.2f}x")
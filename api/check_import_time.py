@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+Script para medir el tiempo de importación de `main` y compararlo con un presupuesto.
+
+Ejecuta `python -X importtime -c "import main"` en un proceso limpio varias
+veces y toma la mejor medición. Termina con código 1 si se supera el
+presupuesto, para poder usarlo en CI.
+
+Uso:
+    python check_import_time.py [--budget-ms 1500] [--runs 3] [--top 10]
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+
+APP_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "app")
+
+def measure_import():
+    """Importa `main` en un proceso nuevo y devuelve los tiempos por módulo.
+
+    Returns:
+        list: Tuplas (módulo, profundidad, tiempo_propio_us, tiempo_acumulado_us)
+    """
+    env = dict(os.environ, API_SCHEMA_MODE="skip")
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import main"],
+        cwd=APP_DIR, env=env, capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        print(result.stderr)
+        sys.exit(2)
+
+    timings = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        timings.append((name.strip(), depth, int(self_us), int(cumulative_us)))
+    return timings
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Presupuesto de tiempo de importación de app.main")
+    parser.add_argument("--budget-ms", type=float,
+                        default=float(os.getenv("API_IMPORT_BUDGET_MS", "1500")))
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--top", type=int, default=10)
+    args = parser.parse_args()
+
+    best = None
+    for _ in range(args.runs):
+        timings = measure_import()
+        total_us = next(cumulative for name, _, _, cumulative in timings if name == "main")
+        if best is None or total_us < best[0]:
+            best = (total_us, timings)
+
+    total_us, timings = best
+    total_ms = total_us / 1000
+    print(f"Importación de main: {total_ms:.1f} ms (presupuesto: {args.budget_ms:.0f} ms)")
+    print("Importaciones directas más costosas:")
+    direct = [t for t in timings if t[1] == 1]
+    for name, _, _, cumulative in sorted(direct, key=lambda t: t[3], reverse=True)[:args.top]:
+        print(f"  {cumulative / 1000:8.1f} ms  {name}")
+
+    if total_ms > args.budget_ms:
+        print("❌ Se ha superado el presupuesto de importación.")
+        sys.exit(1)
+    print("✅ Dentro del presupuesto.")
@@ -0,0 +1,35 @@
+#!/usr/bin/env python3
+"""
+Script para sincronizar la réplica de lectura SQLite con la base de datos principal.
+
+Uso:
+    SQLALCHEMY_DATABASE_URL=sqlite:///./familyfinance.db \
+    SQLALCHEMY_READ_DATABASE_URL=sqlite:///./familyfinance_read.db \
+    python run_replica_sync.py [--interval SEGUNDOS]
+
+Sin --interval la copia se hace una sola vez.
+"""
+
+import argparse
+import os
+import sys
+import time
+
+# Añadir el directorio de la aplicación al path
+sys.path.append(os.path.join(os.path.dirname(__file__), "app"))
+
+from models.database import sync_sqlite_replica, DATABASE_URL, READ_DATABASE_URL
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Sincroniza la réplica de lectura SQLite")
+    parser.add_argument("--interval", type=float, default=None,
+                        help="Repetir la sincronización cada N segundos")
+    args = parser.parse_args()
+
+    print(f"Sincronizando {DATABASE_URL} -> {READ_DATABASE_URL}")
+    while True:
+        sync_sqlite_replica()
+        if args.interval is None:
+            break
+        time.sleep(args.interval)
+    print("Sincronización finalizada.")
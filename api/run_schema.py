@@ -0,0 +1,20 @@
+#!/usr/bin/env python3
+"""
+Script para crear o verificar el esquema de la base de datos una sola vez.
+
+Úsalo antes de arrancar los workers con API_SCHEMA_MODE=skip para que
+ningún proceso de uvicorn pague la verificación del esquema al arrancar.
+"""
+
+import os
+import sys
+
+# Añadir el directorio de la aplicación al path
+sys.path.append(os.path.join(os.path.dirname(__file__), "app"))
+
+from models.database import init_db, DATABASE_URL
+
+if __name__ == "__main__":
+    print(f"Verificando el esquema de {DATABASE_URL}...")
+    init_db()
+    print("Esquema verificado.")
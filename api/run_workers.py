@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+"""
+Script para ejecutar la API en producción con varios workers.
+
+A diferencia de run.py, no usa recarga automática y arranca N procesos de
+uvicorn sobre la misma base de datos. El esquema se verifica una sola vez
+en este proceso antes de lanzar los workers. Las cachés en proceso de cada
+worker se invalidan a través de la tabla cache_versions.
+
+Uso:
+    python run_workers.py [--workers N] [--host 0.0.0.0] [--port 8007]
+"""
+
+import argparse
+import os
+import sys
+import uvicorn
+
+APP_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "app")
+
+# Añadir el directorio de la aplicación al path
+sys.path.append(APP_DIR)
+
+def main():
+    parser = argparse.ArgumentParser(description="Ejecuta la API con varios workers")
+    parser.add_argument("--workers", type=int,
+                        default=int(os.getenv("API_WORKERS", str(os.cpu_count() or 1))))
+    parser.add_argument("--host", default=os.getenv("API_HOST", "0.0.0.0"))
+    parser.add_argument("--port", type=int, default=int(os.getenv("API_PORT", "8007")))
+    args = parser.parse_args()
+
+    # Con SQLite, WAL permite que los lectores no bloqueen al escritor
+    os.environ.setdefault("SQLITE_JOURNAL_MODE", "WAL")
+
+    from models.database import init_db
+    init_db()
+
+    # Los workers heredan el entorno: no repetir la verificación del esquema
+    os.environ["API_SCHEMA_MODE"] = "skip"
+
+    print(f"Iniciando la API con {args.workers} workers en {args.host}:{args.port}...")
+    uvicorn.run(
+        "main:app",
+        host=args.host,
+        port=args.port,
+        workers=args.workers,
+        app_dir=APP_DIR,
+        access_log=False
+    )
+
+if __name__ == "__main__":
+    main()
@@ -3,6 +3,104 @@ BOT_TOKEN = 'TU_TOKEN_DE_TELEGRAM_AQUI'  # Reemplaza con tu token de bot de Tele
 
 # Configuración de la API
 API_BASE_URL = "http://localhost:8099"  # URL base de la API
+API_TIMEOUT = 15.0  # Tiempo máximo por defecto de cada solicitud (segundos)
+API_CONNECT_TIMEOUT = 5.0  # Tiempo máximo para conectar con la API (segundos)
+API_TIMEOUTS = {  # Tiempos máximos por endpoint ("MÉTODO /ruta", admite *)
+    "GET /families/*/balances": 20.0,
+}
+API_MAX_CONNECTIONS = 100  # Conexiones simultáneas con la API
+API_MAX_KEEPALIVE_CONNECTIONS = 20  # Conexiones que se mantienen abiertas para reutilizarlas
+
+# Modo de acceso a la API: "http" (por defecto) o "embedded" para ejecutar la
+# capa de servicios de la API en el mismo proceso que el bot, sin HTTP (requiere
+# las dependencias de la API instaladas junto a las del bot)
+API_MODE = "http"
+EMBEDDED_API_PATH = None  # Carpeta api/app; None para usar la del repositorio
+EMBEDDED_DATABASE_URL = None  # None para usar la configuración de la API (.env)
+EMBEDDED_DB_WORKERS = 8  # Hilos para las consultas a la base de datos
+
+# Reintentos de solicitudes a la API tras errores de conexión, timeouts y 502/503/504
+API_RETRY_METHODS = ("GET",)  # Solo métodos idempotentes
+API_RETRY_ATTEMPTS = 3  # Intentos en total, incluido el primero
+API_RETRY_BACKOFF = 0.2  # Espera base (segundos); se dobla en cada intento, con jitter
+API_RETRY_MAX_DELAY = 2.0  # Espera máxima entre intentos (segundos)
+
+# Circuit breaker por endpoint: tras API_CIRCUIT_FAILURES fallos seguidos, las
+# solicitudes se rechazan sin llamar a la API durante API_CIRCUIT_RESET_TIMEOUT segundos
+API_CIRCUIT_FAILURES = 5
+API_CIRCUIT_RESET_TIMEOUT = 30.0
+
+# Las solicitudes GET idénticas simultáneas de un mismo usuario comparten una
+# sola llamada a la API
+API_COALESCE_GETS = True
+
+# Caché de miembros y familias del bot (segundos y número de entradas)
+CACHE_MEMBER_TTL = 300
+CACHE_FAMILY_TTL = 120
+CACHE_NEGATIVE_TTL = 30  # Usuarios o familias que no existen
+CACHE_MAX_ENTRIES = 5000
+
+# Logging
+LOG_LEVEL = "INFO"  # DEBUG muestra solicitudes, respuestas y datos formateados
+LOG_JSON = False  # Escribir cada línea como JSON
+LOG_DEBUG_SAMPLE_RATE = 1  # Escribir solo 1 de cada N líneas DEBUG repetidas
+
+# Códigos QR de invitación
+QR_CACHE_SIZE = 256  # Imágenes generadas que se mantienen en memoria
+QR_FILE_ID_MAX = 10000  # file_id de Telegram guardados para reutilizar las imágenes
+
+# Generación de imágenes (códigos QR) fuera del bucle de eventos
+RENDER_EXECUTOR = "process"  # "process" o "thread"
+RENDER_WORKERS = 2  # Imágenes que se generan a la vez
+RENDER_MAX_QUEUE = 64  # Imágenes en espera; por encima se responde sin imagen
+
+# Gastos o pagos por página al elegir qué editar o eliminar
+EDIT_PAGE_SIZE = 8
+
+# Persistencia del estado del bot (None para desactivarla)
+BOT_PERSISTENCE_FILE = "bot_state.sqlite3"
+BOT_PERSISTENCE_INTERVAL = 30  # Segundos entre escrituras
+
+# Cola local de creaciones de gastos y pagos: se guardan en este archivo y se
+# envían a la API en segundo plano, así no se pierden si la API no responde
+# (None para enviarlas directamente desde el manejador)
+OUTBOX_FILE = "bot_outbox.sqlite3"
+OUTBOX_CONCURRENCY = 4  # Familias cuyas creaciones se envían a la vez
+OUTBOX_ACK_TIMEOUT = 2.0  # Segundos que se espera a la API antes de responder "pendiente"
+OUTBOX_RETRY_BASE = 1.0  # Espera inicial entre reintentos (se duplica en cada uno)
+OUTBOX_RETRY_MAX_DELAY = 300.0  # Espera máxima entre reintentos
+OUTBOX_MAX_AGE = 604800  # Segundos tras los que se abandona una creación pendiente
+
+# Importación de gastos desde archivos CSV enviados al bot
+IMPORT_BATCH_SIZE = 100  # Gastos por solicitud a la API (máximo 100)
+IMPORT_MAX_ROWS = 10000  # Filas que se importan como máximo de cada archivo
+IMPORT_PROGRESS_INTERVAL = 2.0  # Segundos mínimos entre actualizaciones del progreso
+
+# Resumen periódico de balances para cada miembro (necesita python-telegram-bot[job-queue])
+DIGEST_TIME = "09:00"  # Hora de envío ("HH:MM"); None para desactivarlo
+DIGEST_DAYS = (1,)  # Días de la semana (0 = domingo, 1 = lunes, ...)
+DIGEST_TIMEZONE = "UTC"  # Zona horaria de DIGEST_TIME, por ejemplo "America/Mexico_City"
+DIGEST_PERIOD_DAYS = 7  # Días de gastos que resume cada mensaje
+DIGEST_PAGE_SIZE = 200  # Familias por solicitud a la API (máximo 500)
+DIGEST_MESSAGES_PER_SECOND = 25  # Ritmo de envío (Telegram admite unos 30 por segundo)
+
+# Métricas del bot (duración de los manejadores, llamadas a la API y a Telegram)
+METRICS_PORT = None  # Puerto local para GET /metrics en formato Prometheus, por ejemplo 9100
+METRICS_LISTEN = "127.0.0.1"
+METRICS_LOG_INTERVAL = None  # Segundos entre resúmenes por manejador en el log
+
+# Modo webhook (si WEBHOOK_URL es None se usa polling)
+WEBHOOK_URL = None  # URL pública, por ejemplo "https://bot.ejemplo.com/telegram"
+WEBHOOK_LISTEN = "127.0.0.1"  # Dirección local del receptor
+WEBHOOK_PORT = 8443  # Puerto local del receptor
+WEBHOOK_PATH = "/telegram"  # Ruta local que recibe las actualizaciones
+WEBHOOK_SECRET_TOKEN = None  # Token secreto que Telegram envía en cada solicitud
+WEBHOOK_WORKERS = 40  # Solicitudes atendidas a la vez (máximo 100 en Telegram)
+
+# Número de actualizaciones de Telegram que se procesan a la vez (las de un
+# mismo chat siempre se procesan en orden, de una en una)
+BOT_CONCURRENT_UPDATES = 256
+BOT_MAX_PENDING_UPDATES = None  # Límite de actualizaciones en espera (por defecto 16 x BOT_CONCURRENT_UPDATES)
 
 # Estados para los flujos de conversación
 # Flujo de inicio
@@ -26,4 +124,7 @@ EDIT_OPTION = 10
 SELECT_EXPENSE = 11
 SELECT_PAYMENT = 12
 CONFIRM_DELETE = 13
-EDIT_EXPENSE_AMOUNT = 14 
\ No newline at end of file
+EDIT_EXPENSE_AMOUNT = 14
+
+# Flujo de varios gastos en un mensaje (/gastos)
+BATCH_CONFIRM = 15
@@ -0,0 +1,208 @@
+#!/usr/bin/env python3
+"""
+Servidor de prueba que imita a la API con fallos inyectados.
+
+Sirve para comprobar los reintentos y el circuit breaker del bot
+(ApiService) sin tocar la API real. Responde a cualquier ruta con un JSON
+mínimo y, según las opciones, añade latencia, devuelve 503, deja la
+solicitud colgada hasta que el cliente agota su timeout, corta la conexión o
+simula una caída completa durante un intervalo.
+
+Sin --serve, arranca el servidor en este mismo proceso, envía solicitudes
+con ApiService y muestra cuántas llegaron al servidor, los reintentos, las
+solicitudes rechazadas por el circuit breaker y sus cambios de estado.
+
+Uso:
+    python fault_server.py [--error-rate 0.2] [--hang-rate 0] [--drop-rate 0]
+                           [--delay 0.01] [--outage 2:6] [--port 8900]
+                           [--requests 2000] [--concurrency 20] [--keys 50]
+                           [--duration 10]
+                           [--reset-timeout 2] [--serve]
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import time
+from collections import Counter
+
+class FaultServer:
+    """Servidor HTTP/1.1 con keep-alive que inyecta fallos."""
+
+    def __init__(self, error_rate=0.0, hang_rate=0.0, drop_rate=0.0, delay=0.0, outage=None, hang=30.0):
+        self.error_rate = error_rate
+        self.hang_rate = hang_rate
+        self.drop_rate = drop_rate
+        self.delay = delay
+        self.outage = outage
+        self.hang = hang
+        self.started = time.monotonic()
+        self.received = Counter()
+        self._server = None
+
+    async def start(self, host, port):
+        self.started = time.monotonic()
+        self._server = await asyncio.start_server(self._handle_connection, host, port)
+
+    async def stop(self):
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+
+    def in_outage(self):
+        if not self.outage:
+            return False
+        elapsed = time.monotonic() - self.started
+        return self.outage[0] <= elapsed < self.outage[1]
+
+    async def _handle_connection(self, reader, writer):
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                length = 0
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    if name.strip().lower() == "content-length":
+                        length = int(value.strip())
+                if length:
+                    await reader.readexactly(length)
+
+                if self.in_outage():
+                    self.received["caída"] += 1
+                    await self._respond(writer, 503, {"detail": "Servicio no disponible"})
+                    continue
+
+                roll = random.random()
+                if roll < self.drop_rate:
+                    self.received["cortada"] += 1
+                    break
+                roll -= self.drop_rate
+                if roll < self.hang_rate:
+                    self.received["colgada"] += 1
+                    await asyncio.sleep(self.hang)
+                    break
+                roll -= self.hang_rate
+
+                if self.delay:
+                    await asyncio.sleep(self.delay)
+                if roll < self.error_rate:
+                    self.received["503"] += 1
+                    await self._respond(writer, 503, {"detail": "Error inyectado"})
+                else:
+                    self.received["200"] += 1
+                    await self._respond(writer, 200, {"id": 1, "name": "Prueba", "family_id": "f1"})
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    @staticmethod
+    async def _respond(writer, status, payload):
+        body = json.dumps(payload).encode()
+        reason = "OK" if status == 200 else "Service Unavailable"
+        writer.write(
+            f"HTTP/1.1 {status} {reason}\r\n"
+            f"Content-Type: application/json\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            f"Connection: keep-alive\r\n\r\n".encode("latin-1") + body
+        )
+        await writer.drain()
+
+def parse_outage(value):
+    """Convierte "inicio:fin" (segundos desde el arranque) en una tupla."""
+    start, _, end = value.partition(":")
+    return float(start), float(end)
+
+async def run_client(url, requests, concurrency, duration, reset_timeout=None, keys=50):
+    """Envía solicitudes GET con ApiService repartidas a lo largo de `duration` segundos.
+
+    Returns:
+        Counter: Status codes recibidos por el bot
+    """
+    # Importar aquí para poder usar --serve sin la configuración del bot
+    import services.api_service as api_service
+    api_service.API_BASE_URL = url
+    if reset_timeout is not None:
+        api_service.API_CIRCUIT_RESET_TIMEOUT = reset_timeout
+    ApiService = api_service.ApiService
+
+    statuses = Counter()
+    interval = duration / requests if requests else 0
+    queue = asyncio.Queue()
+    for i in range(requests):
+        queue.put_nowait(i)
+
+    start = time.monotonic()
+
+    async def worker():
+        while True:
+            try:
+                i = queue.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+            # Mantener un ritmo constante para que la prueba cubra toda la caída
+            wait = start + i * interval - time.monotonic()
+            if wait > 0:
+                await asyncio.sleep(wait)
+            status_code, _ = await ApiService.request("GET", f"/members/{1000 + i % keys}", check_status=False)
+            statuses[status_code] += 1
+
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    await ApiService.close()
+    return statuses
+
+def print_metrics():
+    from utils.metrics import Metrics
+    snapshot = Metrics.snapshot()
+    for (name, labels), value in sorted(snapshot["counters"].items()):
+        if name in ("api_retries", "api_coalesced", "api_circuit_rejected", "api_circuit_transitions"):
+            print(f"  {name} {dict(labels)}: {value}")
+    for (name, labels), h in sorted(snapshot["histograms"].items()):
+        if name == "api_request_seconds":
+            print(f"  {name} {dict(labels)}: n={h['count']} media={h['avg'] * 1000:.1f} ms máx={h['max'] * 1000:.1f} ms")
+
+async def main(args):
+    server = FaultServer(args.error_rate, args.hang_rate, args.drop_rate, args.delay, args.outage)
+    await server.start(args.host, args.port)
+    url = f"http://{args.host}:{args.port}"
+    print(f"Servidor de fallos en {url}")
+
+    if args.serve:
+        try:
+            await asyncio.Event().wait()
+        finally:
+            await server.stop()
+        return
+
+    start = time.monotonic()
+    statuses = await run_client(url, args.requests, args.concurrency, args.duration, args.reset_timeout, args.keys)
+    elapsed = time.monotonic() - start
+    await server.stop()
+
+    print(f"{args.requests} solicitudes del bot en {elapsed:.2f} s")
+    print(f"  Respuestas recibidas por el bot: {dict(statuses)}")
+    print(f"  Solicitudes que llegaron al servidor: {sum(server.received.values())} {dict(server.received)}")
+    print_metrics()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Servidor de prueba con fallos inyectados para el cliente de la API")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8900)
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fracción de respuestas 503")
+    parser.add_argument("--hang-rate", type=float, default=0.0, help="Fracción de solicitudes que no reciben respuesta")
+    parser.add_argument("--drop-rate", type=float, default=0.0, help="Fracción de conexiones cortadas sin respuesta")
+    parser.add_argument("--delay", type=float, default=0.0, help="Latencia añadida a cada respuesta (segundos)")
+    parser.add_argument("--outage", type=parse_outage, default=None, help="Caída total entre inicio:fin segundos")
+    parser.add_argument("--requests", type=int, default=2000, help="Solicitudes a enviar desde el bot")
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--keys", type=int, default=50, help="Endpoints distintos entre los que repartir las solicitudes")
+    parser.add_argument("--duration", type=float, default=10.0, help="Segundos en los que repartir las solicitudes")
+    parser.add_argument("--reset-timeout", type=float, default=None, help="Segundos que el circuito queda abierto (por defecto, el de la configuración)")
+    parser.add_argument("--serve", action="store_true", help="Solo arrancar el servidor")
+    asyncio.run(main(parser.parse_args()))
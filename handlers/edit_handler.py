@@ -1,3 +1,4 @@
+import logging
 from telegram import Update, ReplyKeyboardMarkup
 from telegram.ext import ContextTypes, ConversationHandler
 from ui.keyboards import Keyboards
@@ -8,8 +9,13 @@ from services.payment_service import PaymentService
 from services.member_service import MemberService
 from utils.context_manager import ContextManager
 from utils.helpers import send_error
+import config
 from config import EDIT_OPTION, SELECT_EXPENSE, SELECT_PAYMENT, CONFIRM_DELETE, EDIT_EXPENSE_AMOUNT
-import traceback
+
+logger = logging.getLogger(__name__)
+
+# Gastos o pagos por página en las listas de selección
+EDIT_PAGE_SIZE = getattr(config, "EDIT_PAGE_SIZE", 8)
 
 # Estados para la conversación
 # Ahora importados desde config.py
@@ -23,7 +29,7 @@ async def show_edit_options(update: Update, context: ContextTypes.DEFAULT_TYPE):
         
         # Si no hay family_id en el contexto, intentar obtenerlo
         if not family_id:
-            print(f"No hay family_id en el contexto, intentando obtenerlo para el usuario {telegram_id}")
+            logger.debug("No hay family_id en el contexto, intentando obtenerlo para el usuario %s", telegram_id)
             is_in_family = await ContextManager.check_user_in_family(context, telegram_id)
             
             if not is_in_family:
@@ -34,7 +40,7 @@ async def show_edit_options(update: Update, context: ContextTypes.DEFAULT_TYPE):
                 return ConversationHandler.END
             
             family_id = context.user_data.get("family_id")
-            print(f"Family ID obtenido y guardado en el contexto: {family_id}")
+            logger.debug("Family ID obtenido y guardado en el contexto: %s", family_id)
         
         # Limpiar datos previos
         if "edit_data" in context.user_data:
@@ -51,9 +57,8 @@ async def show_edit_options(update: Update, context: ContextTypes.DEFAULT_TYPE):
         return EDIT_OPTION
     
     except Exception as e:
-        print(f"Error en show_edit_options: {str(e)}")
-        traceback.print_exc()
-        await send_error(update, context, str(e))
+        logger.exception("Error en show_edit_options: %s", e)
+        await send_error(update, context, e)
         return ConversationHandler.END
 
 async def handle_edit_option(update: Update, context: ContextTypes.DEFAULT_TYPE):
@@ -70,7 +75,7 @@ async def handle_edit_option(update: Update, context: ContextTypes.DEFAULT_TYPE)
         
         # Si no hay family_id en el contexto, intentar obtenerlo
         if not family_id:
-            print(f"No hay family_id en el contexto, intentando obtenerlo para el usuario {telegram_id}")
+            logger.debug("No hay family_id en el contexto, intentando obtenerlo para el usuario %s", telegram_id)
             is_in_family = await ContextManager.check_user_in_family(context, telegram_id)
             
             if not is_in_family:
@@ -81,158 +86,32 @@ async def handle_edit_option(update: Update, context: ContextTypes.DEFAULT_TYPE)
                 return ConversationHandler.END
             
             family_id = context.user_data.get("family_id")
-            print(f"Family ID obtenido y guardado en el contexto: {family_id}")
+            logger.debug("Family ID obtenido y guardado en el contexto: %s", family_id)
         
-        if option == "📝 Editar Gastos":
-            # Obtener la lista de gastos
-            status_code, expenses = ExpenseService.get_family_expenses(family_id, telegram_id)
-            
-            if status_code >= 400 or not expenses:
-                await update.message.reply_text(
-                    Messages.ERROR_NO_EXPENSES,
-                    reply_markup=Keyboards.get_main_menu_keyboard()
-                )
-                return ConversationHandler.END
-            
-            # Guardar los gastos en el contexto
-            context.user_data["edit_data"]["expenses"] = expenses
-            
-            # Crear un teclado con los gastos
-            keyboard = []
-            for expense in expenses:
-                description = expense.get("description", "Sin descripción")
-                amount = expense.get("amount", 0)
-                expense_id = expense.get("id", "")
-                # Incluir el ID del gasto en el texto para poder identificarlo
-                row = [f"{description} - ${amount:.2f} (ID: {expense_id})"]
-                keyboard.append(row)
-            
-            # Añadir opción para volver
-            keyboard.append(["↩️ Volver al Menú"])
-            
-            # Mostrar los gastos
-            await update.message.reply_text(
-                Messages.SELECT_EXPENSE_TO_EDIT,
-                reply_markup=ReplyKeyboardMarkup(keyboard, resize_keyboard=True, one_time_keyboard=True)
-            )
-            return SELECT_EXPENSE
-            
-        elif option == "🗑️ Eliminar Gastos":
-            # Obtener la lista de gastos
-            status_code, expenses = ExpenseService.get_family_expenses(family_id, telegram_id)
+        if option in ("📝 Editar Gastos", "🗑️ Eliminar Gastos"):
+            # Mostrar la primera página de gastos con botones en línea
+            shown = await _show_page(context, "e", 0, telegram_id, message=update.message)
             
-            if status_code >= 400 or not expenses:
+            if not shown:
                 await update.message.reply_text(
                     Messages.ERROR_NO_EXPENSES,
                     reply_markup=Keyboards.get_main_menu_keyboard()
                 )
                 return ConversationHandler.END
             
-            # Guardar los gastos en el contexto
-            context.user_data["edit_data"]["expenses"] = expenses
-            
-            # Crear un teclado con los gastos
-            keyboard = []
-            for expense in expenses:
-                description = expense.get("description", "Sin descripción")
-                amount = expense.get("amount", 0)
-                expense_id = expense.get("id", "")
-                # Incluir el ID del gasto en el texto para poder identificarlo
-                row = [f"{description} - ${amount:.2f} (ID: {expense_id})"]
-                keyboard.append(row)
-            
-            # Añadir opción para volver
-            keyboard.append(["↩️ Volver al Menú"])
-            
-            # Mostrar los gastos
-            await update.message.reply_text(
-                Messages.SELECT_EXPENSE_TO_DELETE,
-                reply_markup=ReplyKeyboardMarkup(keyboard, resize_keyboard=True, one_time_keyboard=True)
-            )
             return SELECT_EXPENSE
             
-        elif option == "📝 Editar Pagos":
-            # Obtener la lista de pagos
-            status_code, payments = PaymentService.get_family_payments(family_id)
-            
-            if status_code >= 400 or not payments:
-                await update.message.reply_text(
-                    Messages.ERROR_NO_PAYMENTS,
-                    reply_markup=Keyboards.get_main_menu_keyboard()
-                )
-                return ConversationHandler.END
-            
-            # Guardar los pagos en el contexto
-            context.user_data["edit_data"]["payments"] = payments
+        elif option in ("📝 Editar Pagos", "🗑️ Eliminar Pagos"):
+            # Mostrar la primera página de pagos con botones en línea
+            shown = await _show_page(context, "p", 0, telegram_id, message=update.message)
             
-            # Obtener los nombres de los miembros
-            member_names = context.user_data.get("member_names", {})
-            
-            # Crear un teclado con los pagos
-            keyboard = []
-            for payment in payments:
-                from_member_id = payment.get("from_member", 0)
-                to_member_id = payment.get("to_member", 0)
-                amount = payment.get("amount", 0)
-                payment_id = payment.get("id", "")
-                
-                from_name = member_names.get(str(from_member_id), f"Usuario {from_member_id}")
-                to_name = member_names.get(str(to_member_id), f"Usuario {to_member_id}")
-                
-                # Incluir el ID del pago en el texto para poder identificarlo
-                row = [f"{from_name} → {to_name} - ${amount:.2f} (ID: {payment_id})"]
-                keyboard.append(row)
-            
-            # Añadir opción para volver
-            keyboard.append(["↩️ Volver al Menú"])
-            
-            # Mostrar los pagos
-            await update.message.reply_text(
-                Messages.SELECT_PAYMENT_TO_EDIT,
-                reply_markup=ReplyKeyboardMarkup(keyboard, resize_keyboard=True, one_time_keyboard=True)
-            )
-            return SELECT_PAYMENT
-            
-        elif option == "🗑️ Eliminar Pagos":
-            # Obtener la lista de pagos
-            status_code, payments = PaymentService.get_family_payments(family_id)
-            
-            if status_code >= 400 or not payments:
+            if not shown:
                 await update.message.reply_text(
                     Messages.ERROR_NO_PAYMENTS,
                     reply_markup=Keyboards.get_main_menu_keyboard()
                 )
                 return ConversationHandler.END
             
-            # Guardar los pagos en el contexto
-            context.user_data["edit_data"]["payments"] = payments
-            
-            # Obtener los nombres de los miembros
-            member_names = context.user_data.get("member_names", {})
-            
-            # Crear un teclado con los pagos
-            keyboard = []
-            for payment in payments:
-                from_member_id = payment.get("from_member", 0)
-                to_member_id = payment.get("to_member", 0)
-                amount = payment.get("amount", 0)
-                payment_id = payment.get("id", "")
-                
-                from_name = member_names.get(str(from_member_id), f"Usuario {from_member_id}")
-                to_name = member_names.get(str(to_member_id), f"Usuario {to_member_id}")
-                
-                # Incluir el ID del pago en el texto para poder identificarlo
-                row = [f"{from_name} → {to_name} - ${amount:.2f} (ID: {payment_id})"]
-                keyboard.append(row)
-            
-            # Añadir opción para volver
-            keyboard.append(["↩️ Volver al Menú"])
-            
-            # Mostrar los pagos
-            await update.message.reply_text(
-                Messages.SELECT_PAYMENT_TO_DELETE,
-                reply_markup=ReplyKeyboardMarkup(keyboard, resize_keyboard=True, one_time_keyboard=True)
-            )
             return SELECT_PAYMENT
             
         elif option == "↩️ Volver al Menú":
@@ -251,55 +130,168 @@ async def handle_edit_option(update: Update, context: ContextTypes.DEFAULT_TYPE)
             return EDIT_OPTION
     
     except Exception as e:
-        print(f"Error en handle_edit_option: {str(e)}")
-        traceback.print_exc()
-        await send_error(update, context, str(e))
+        logger.exception("Error en handle_edit_option: %s", e)
+        await send_error(update, context, e)
         return ConversationHandler.END
 
 async def handle_select_expense(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    """Maneja la selección de un gasto para editar o eliminar."""
+    """Maneja el texto recibido mientras se muestra la lista de gastos."""
+    return await _handle_list_text(update, SELECT_EXPENSE)
+
+async def handle_select_payment(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Maneja el texto recibido mientras se muestra la lista de pagos."""
+    return await _handle_list_text(update, SELECT_PAYMENT)
+
+async def _handle_list_text(update: Update, state):
+    """Vuelve al menú o recuerda que la selección se hace con los botones."""
+    if update.message.text == "↩️ Volver al Menú":
+        await update.message.reply_text(
+            Messages.MAIN_MENU,
+            reply_markup=Keyboards.get_main_menu_keyboard()
+        )
+        return ConversationHandler.END
+    
+    await update.message.reply_text(Messages.SELECT_FROM_LIST)
+    return state
+
+async def handle_page_callback(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Maneja los botones en línea de las listas de gastos y pagos.
+    
+    El callback_data tiene la forma "<tipo>:<acción>[:<página>[:<índice>]]",
+    donde el tipo es "e" (gastos) o "p" (pagos) y la acción "p" (cambiar de
+    página), "s" (seleccionar) o "x" (volver al menú).
+    """
+    query = update.callback_query
     try:
-        selection = update.message.text
+        await query.answer()
         
-        if selection == "↩️ Volver al Menú":
-            # Mostrar el menú principal
-            await update.message.reply_text(
+        kind, action, *args = query.data.split(":")
+        state = SELECT_EXPENSE if kind == "e" else SELECT_PAYMENT
+        telegram_id = str(update.effective_user.id)
+        edit_data = context.user_data.setdefault("edit_data", {})
+        
+        if action == "x":
+            await query.edit_message_reply_markup(reply_markup=None)
+            await query.message.reply_text(
                 Messages.MAIN_MENU,
                 reply_markup=Keyboards.get_main_menu_keyboard()
             )
             return ConversationHandler.END
         
-        # Buscar el gasto seleccionado
-        expenses = context.user_data["edit_data"].get("expenses", [])
-        selected_expense = None
-        
-        # Extraer el ID del gasto de la selección
-        import re
-        expense_id_match = re.search(r'\(ID: ([^)]+)\)', selection)
-        expense_id = expense_id_match.group(1) if expense_id_match else None
-        
-        if expense_id:
-            # Buscar el gasto por ID
-            for expense in expenses:
-                if str(expense.get("id")) == expense_id:
-                    selected_expense = expense
-                    break
-        else:
-            # Método anterior de búsqueda (por si acaso)
-            for expense in expenses:
-                description = expense.get("description", "Sin descripción")
-                amount = expense.get("amount", 0)
-                if selection.startswith(f"{description} - ${amount:.2f}"):
-                    selected_expense = expense
-                    break
-        
-        if not selected_expense:
-            await update.message.reply_text(
-                Messages.ERROR_EXPENSE_NOT_FOUND,
+        if action == "p":
+            shown = await _show_page(context, kind, int(args[0]), telegram_id, query=query)
+            if not shown:
+                await query.message.reply_text(
+                    Messages.ERROR_NO_EXPENSES if kind == "e" else Messages.ERROR_NO_PAYMENTS,
+                    reply_markup=Keyboards.get_main_menu_keyboard()
+                )
+                return ConversationHandler.END
+            return state
+        
+        # Selección: el índice se refiere a la página que se mostró por última vez
+        page, index = int(args[0]), int(args[1])
+        current = edit_data.get("page")
+        if not current or current["kind"] != kind or current["page"] != page or index >= len(current["ids"]):
+            await query.message.reply_text(Messages.LIST_CHANGED)
+            await _show_page(context, kind, page, telegram_id, message=query.message)
+            return state
+        
+        item_id = current["ids"][index]
+        
+        # Quitar los botones para evitar selecciones repetidas
+        await query.edit_message_reply_markup(reply_markup=None)
+        
+        if kind == "e":
+            status_code, expense = await ExpenseService.get_expense(item_id)
+            if status_code != 200 or not expense:
+                await query.message.reply_text(
+                    Messages.ERROR_EXPENSE_NOT_FOUND,
+                    reply_markup=Keyboards.get_main_menu_keyboard()
+                )
+                return ConversationHandler.END
+            return await _select_expense(query.message, context, expense)
+        
+        status_code, payment = await PaymentService.get_payment(item_id)
+        if status_code != 200 or not payment:
+            await query.message.reply_text(
+                Messages.ERROR_PAYMENT_NOT_FOUND,
                 reply_markup=Keyboards.get_main_menu_keyboard()
             )
             return ConversationHandler.END
-        
+        return await _select_payment(query.message, context, payment)
+    
+    except Exception as e:
+        logger.exception("Error en handle_page_callback: %s", e)
+        await query.message.reply_text(f"❌ Error: {e}")
+        return ConversationHandler.END
+
+async def _show_page(context: ContextTypes.DEFAULT_TYPE, kind, page, telegram_id, message=None, query=None):
+    """Muestra una página de gastos ("e") o pagos ("p").
+    
+    Solo se pide a la API la página actual y en el contexto solo se guardan
+    los IDs de esa página. Se envía un mensaje nuevo si se indica `message`
+    o se edita el mensaje del botón si se indica `query`.
+    
+    Returns:
+        bool: False si no hay elementos que mostrar
+    """
+    family_id = context.user_data.get("family_id")
+    offset = page * EDIT_PAGE_SIZE
+    
+    # Pedir un elemento más para saber si hay página siguiente
+    if kind == "e":
+        status_code, items = await ExpenseService.get_family_expenses(family_id, telegram_id, offset, EDIT_PAGE_SIZE + 1)
+    else:
+        status_code, items = await PaymentService.get_family_payments(family_id, telegram_id, offset, EDIT_PAGE_SIZE + 1)
+    
+    if status_code >= 400 or not isinstance(items, list) or not items:
+        return False
+    
+    has_next = len(items) > EDIT_PAGE_SIZE
+    items = items[:EDIT_PAGE_SIZE]
+    
+    edit_data = context.user_data.setdefault("edit_data", {})
+    edit_data["page"] = {"kind": kind, "page": page, "ids": [str(item.get("id")) for item in items]}
+    
+    member_names = context.user_data.get("member_names", {})
+    labels = [_item_label(kind, item, member_names) for item in items]
+    
+    option = edit_data.get("option")
+    titles = {
+        "📝 Editar Gastos": Messages.SELECT_EXPENSE_TO_EDIT,
+        "🗑️ Eliminar Gastos": Messages.SELECT_EXPENSE_TO_DELETE,
+        "📝 Editar Pagos": Messages.SELECT_PAYMENT_TO_EDIT,
+        "🗑️ Eliminar Pagos": Messages.SELECT_PAYMENT_TO_DELETE,
+    }
+    text = titles.get(option, Messages.SELECT_EXPENSE_TO_EDIT if kind == "e" else Messages.SELECT_PAYMENT_TO_EDIT)
+    if page > 0 or has_next:
+        text += f" (página {page + 1})"
+    
+    reply_markup = Keyboards.get_paged_inline_keyboard(kind, page, labels, has_next)
+    if query is not None:
+        await query.edit_message_text(text, reply_markup=reply_markup)
+    else:
+        await message.reply_text(text, reply_markup=reply_markup)
+    return True
+
+def _item_label(kind, item, member_names):
+    """Texto corto de un botón de gasto o pago."""
+    amount = item.get("amount", 0)
+    if kind == "e":
+        description = item.get("description") or "Sin descripción"
+        if len(description) > 32:
+            description = description[:31] + "…"
+        return f"{description} - ${amount:.2f}"
+    
+    from_member_id = item.get("from_member", 0)
+    to_member_id = item.get("to_member", 0)
+    from_name = member_names.get(str(from_member_id), f"Usuario {from_member_id}")
+    to_name = member_names.get(str(to_member_id), f"Usuario {to_member_id}")
+    return f"{from_name} → {to_name} - ${amount:.2f}"
+
+async def _select_expense(message, context: ContextTypes.DEFAULT_TYPE, selected_expense):
+    """Continúa el flujo con el gasto seleccionado."""
+    try:
         # Guardar el gasto seleccionado
         context.user_data["edit_data"]["selected_expense"] = selected_expense
         
@@ -316,7 +308,7 @@ async def handle_select_expense(update: Update, context: ContextTypes.DEFAULT_TY
             context.user_data["edit_data"]["expense_id"] = expense_id
             
             # Pedir el nuevo monto
-            await update.message.reply_text(
+            await message.reply_text(
                 f"Vas a editar el gasto: *{description}*\n"
                 f"Monto actual: *${amount:.2f}*\n\n"
                 f"Por favor, ingresa el nuevo monto:",
@@ -341,7 +333,7 @@ async def handle_select_expense(update: Update, context: ContextTypes.DEFAULT_TY
             context.user_data["edit_data"]["expense_id"] = expense_id
             
             # Pedir confirmación
-            await update.message.reply_text(
+            await message.reply_text(
                 Messages.CONFIRM_DELETE_EXPENSE.format(details=details),
                 parse_mode="Markdown",
                 reply_markup=Keyboards.get_confirmation_keyboard()
@@ -349,9 +341,8 @@ async def handle_select_expense(update: Update, context: ContextTypes.DEFAULT_TY
             return CONFIRM_DELETE
     
     except Exception as e:
-        print(f"Error en handle_select_expense: {str(e)}")
-        traceback.print_exc()
-        await send_error(update, context, str(e))
+        logger.exception("Error en _select_expense: %s", e)
+        await message.reply_text(f"❌ Error: {e}")
         return ConversationHandler.END
 
 async def handle_edit_expense_amount(update: Update, context: ContextTypes.DEFAULT_TYPE):
@@ -398,8 +389,19 @@ async def handle_edit_expense_amount(update: Update, context: ContextTypes.DEFAU
             "amount": new_amount
         }
         
+        # Enviar la versión leída para no sobrescribir cambios de otro miembro
+        if selected_expense.get("version") is not None:
+            update_data["version"] = selected_expense["version"]
+        
         # Llamar al servicio para actualizar el gasto
-        status_code, response = ExpenseService.update_expense(expense_id, update_data)
+        status_code, response = await ExpenseService.update_expense(expense_id, update_data)
+        
+        if status_code == 409:
+            await update.message.reply_text(
+                Messages.ERROR_EXPENSE_CONFLICT,
+                reply_markup=Keyboards.get_main_menu_keyboard()
+            )
+            return ConversationHandler.END
         
         if status_code >= 400:
             await update.message.reply_text(
@@ -425,60 +427,14 @@ async def handle_edit_expense_amount(update: Update, context: ContextTypes.DEFAU
         return ConversationHandler.END
     
     except Exception as e:
-        print(f"Error en handle_edit_expense_amount: {str(e)}")
-        traceback.print_exc()
-        await send_error(update, context, str(e))
+        logger.exception("Error en handle_edit_expense_amount: %s", e)
+        await send_error(update, context, e)
         return ConversationHandler.END
 
-async def handle_select_payment(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    """Maneja la selección de un pago para editar o eliminar."""
+async def _select_payment(message, context: ContextTypes.DEFAULT_TYPE, selected_payment):
+    """Continúa el flujo con el pago seleccionado."""
     try:
-        selection = update.message.text
-        
-        if selection == "↩️ Volver al Menú":
-            # Mostrar el menú principal
-            await update.message.reply_text(
-                Messages.MAIN_MENU,
-                reply_markup=Keyboards.get_main_menu_keyboard()
-            )
-            return ConversationHandler.END
-        
-        # Buscar el pago seleccionado
-        payments = context.user_data["edit_data"].get("payments", [])
         member_names = context.user_data.get("member_names", {})
-        selected_payment = None
-        
-        # Extraer el ID del pago de la selección
-        import re
-        payment_id_match = re.search(r'\(ID: ([^)]+)\)', selection)
-        payment_id = payment_id_match.group(1) if payment_id_match else None
-        
-        if payment_id:
-            # Buscar el pago por ID
-            for payment in payments:
-                if str(payment.get("id")) == payment_id:
-                    selected_payment = payment
-                    break
-        else:
-            # Método anterior de búsqueda (por si acaso)
-            for payment in payments:
-                from_member_id = payment.get("from_member", 0)
-                to_member_id = payment.get("to_member", 0)
-                amount = payment.get("amount", 0)
-                
-                from_name = member_names.get(str(from_member_id), f"Usuario {from_member_id}")
-                to_name = member_names.get(str(to_member_id), f"Usuario {to_member_id}")
-                
-                if selection.startswith(f"{from_name} → {to_name} - ${amount:.2f}"):
-                    selected_payment = payment
-                    break
-        
-        if not selected_payment:
-            await update.message.reply_text(
-                Messages.ERROR_PAYMENT_NOT_FOUND,
-                reply_markup=Keyboards.get_main_menu_keyboard()
-            )
-            return ConversationHandler.END
         
         # Guardar el pago seleccionado
         context.user_data["edit_data"]["selected_payment"] = selected_payment
@@ -488,7 +444,7 @@ async def handle_select_payment(update: Update, context: ContextTypes.DEFAULT_TY
         
         if option == "📝 Editar Pagos":
             # TODO: Implementar la edición de pagos
-            await update.message.reply_text(
+            await message.reply_text(
                 "La edición de pagos aún no está implementada.",
                 reply_markup=Keyboards.get_main_menu_keyboard()
             )
@@ -515,7 +471,7 @@ async def handle_select_payment(update: Update, context: ContextTypes.DEFAULT_TY
             context.user_data["edit_data"]["payment_id"] = payment_id
             
             # Pedir confirmación
-            await update.message.reply_text(
+            await message.reply_text(
                 Messages.CONFIRM_DELETE_PAYMENT.format(details=details),
                 parse_mode="Markdown",
                 reply_markup=Keyboards.get_confirmation_keyboard()
@@ -523,9 +479,8 @@ async def handle_select_payment(update: Update, context: ContextTypes.DEFAULT_TY
             return CONFIRM_DELETE
     
     except Exception as e:
-        print(f"Error en handle_select_payment: {str(e)}")
-        traceback.print_exc()
-        await send_error(update, context, str(e))
+        logger.exception("Error en _select_payment: %s", e)
+        await message.reply_text(f"❌ Error: {e}")
         return ConversationHandler.END
 
 async def handle_confirm_delete(update: Update, context: ContextTypes.DEFAULT_TYPE):
@@ -547,7 +502,7 @@ async def handle_confirm_delete(update: Update, context: ContextTypes.DEFAULT_TY
             if edit_option == "🗑️ Eliminar Gastos":
                 # Eliminar el gasto
                 expense_id = context.user_data["edit_data"].get("expense_id")
-                status_code, response = ExpenseService.delete_expense(expense_id)
+                status_code, response = await ExpenseService.delete_expense(expense_id)
                 
                 if status_code >= 400:
                     await update.message.reply_text(
@@ -565,7 +520,7 @@ async def handle_confirm_delete(update: Update, context: ContextTypes.DEFAULT_TY
             elif edit_option == "🗑️ Eliminar Pagos":
                 # Eliminar el pago
                 payment_id = context.user_data["edit_data"].get("payment_id")
-                status_code, response = PaymentService.delete_payment(payment_id)
+                status_code, response = await PaymentService.delete_payment(payment_id)
                 
                 if status_code >= 400:
                     await update.message.reply_text(
@@ -594,9 +549,8 @@ async def handle_confirm_delete(update: Update, context: ContextTypes.DEFAULT_TY
             return CONFIRM_DELETE
     
     except Exception as e:
-        print(f"Error en handle_confirm_delete: {str(e)}")
-        traceback.print_exc()
-        await send_error(update, context, str(e))
+        logger.exception("Error en handle_confirm_delete: %s", e)
+        await send_error(update, context, e)
         return ConversationHandler.END
 
 async def cancel(update: Update, context: ContextTypes.DEFAULT_TYPE):
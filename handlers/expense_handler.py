@@ -1,14 +1,28 @@
+import asyncio
+import logging
+import re
+import config
 from telegram import Update
 from telegram.ext import ContextTypes, ConversationHandler
+from telegram.helpers import escape_markdown
 from config import DESCRIPTION, AMOUNT, CONFIRM
 from ui.keyboards import Keyboards
 from ui.messages import Messages
 from ui.formatters import Formatters
 from services.expense_service import ExpenseService
+from services.family_service import FamilyService
+from services.outbox_service import OutboxService
 from utils.context_manager import ContextManager
-from utils.helpers import send_error
+from utils.helpers import send_error, parse_amount, find_members_by_name
 from services.member_service import MemberService
-import traceback
+
+logger = logging.getLogger(__name__)
+
+# Estado del flujo de /gastos (confirmación del lote)
+BATCH_CONFIRM = getattr(config, "BATCH_CONFIRM", 15)
+
+# Gastos por mensaje de /gastos (el máximo que acepta POST /expenses/bulk)
+BATCH_MAX_EXPENSES = 100
 
 # Eliminamos la importación circular
 # from handlers.menu_handler import show_main_menu
@@ -23,7 +37,7 @@ async def crear_gasto(update: Update, context: ContextTypes.DEFAULT_TYPE):
     try:
         # Verificar que el usuario está en una familia
         telegram_id = str(update.effective_user.id)
-        status_code, member = MemberService.get_member(telegram_id)
+        status_code, member = await MemberService.get_member(telegram_id)
         
         if status_code != 200 or not member or not member.get("family_id"):
             await update.message.reply_text(
@@ -47,9 +61,8 @@ async def crear_gasto(update: Update, context: ContextTypes.DEFAULT_TYPE):
         return DESCRIPTION
         
     except Exception as e:
-        print(f"Error en crear_gasto: {str(e)}")
-        traceback.print_exc()
-        await send_error(update, context, str(e))
+        logger.exception("Error en crear_gasto: %s", e)
+        await send_error(update, context, e)
         return ConversationHandler.END
 
 async def get_expense_description(update: Update, context: ContextTypes.DEFAULT_TYPE):
@@ -74,9 +87,8 @@ async def get_expense_description(update: Update, context: ContextTypes.DEFAULT_
         )
         return AMOUNT
     except Exception as e:
-        print(f"Error en get_expense_description: {str(e)}")
-        traceback.print_exc()
-        await send_error(update, context, str(e))
+        logger.exception("Error en get_expense_description: %s", e)
+        await send_error(update, context, e)
         return ConversationHandler.END
 
 async def get_expense_amount(update: Update, context: ContextTypes.DEFAULT_TYPE):
@@ -135,9 +147,8 @@ async def get_expense_amount(update: Update, context: ContextTypes.DEFAULT_TYPE)
         return CONFIRM
         
     except Exception as e:
-        print(f"Error en get_expense_amount: {str(e)}")
-        traceback.print_exc()
-        await send_error(update, context, str(e))
+        logger.exception("Error en get_expense_amount: %s", e)
+        await send_error(update, context, e)
         return ConversationHandler.END
 
 async def show_expense_confirmation(update: Update, context: ContextTypes.DEFAULT_TYPE):
@@ -148,16 +159,12 @@ async def show_expense_confirmation(update: Update, context: ContextTypes.DEFAUL
     member_names = ContextManager.get_member_names(context)
     paid_by_name = member_names.get(expense_data["paid_by"], "Tú")
     
-    # Formatear detalles
-    details = (
-        f"*Descripción:* {expense_data['description']}\n"
-        f"*Monto:* ${expense_data['amount']:.2f}\n"
-        f"*Pagado por:* {paid_by_name}\n"
-        f"*Dividido entre:* Todos los miembros por igual"
-    )
-    
     await update.message.reply_text(
-        Messages.CONFIRM_EXPENSE.format(details=details),
+        Messages.CREATE_EXPENSE_CONFIRM.format(
+            description=expense_data["description"],
+            amount=expense_data["amount"],
+            paid_by=paid_by_name
+        ),
         parse_mode="Markdown",
         reply_markup=Keyboards.get_confirmation_keyboard()
     )
@@ -182,14 +189,37 @@ async def confirm_expense(update: Update, context: ContextTypes.DEFAULT_TYPE):
             telegram_id = expense_data.get("telegram_id") or str(update.effective_user.id)
             
             # Crear el gasto usando el member_id guardado y el telegram_id
-            status_code, response = ExpenseService.create_expense(
-                description=expense_data["description"],
-                amount=expense_data["amount"],
-                paid_by=expense_data["member_id"],
-                telegram_id=telegram_id
-            )
+            payload = {
+                "description": expense_data["description"],
+                "amount": expense_data["amount"],
+                "paid_by": expense_data["member_id"]
+            }
+            if OutboxService.enabled():
+                # Guardar el gasto en la cola local para no perderlo si la API
+                # no responde, y esperar un poco a que se registre
+                family_id = expense_data.get("family_id") or context.user_data.get("family_id") or f"member:{payload['paid_by']}"
+                result = await OutboxService.submit(
+                    "expense", payload, family_id, telegram_id, update.effective_chat.id
+                )
+                if result is None:
+                    # El gasto ya está en la cola: la conversación termina
+                    # aunque falle la respuesta, para no volver a encolarlo
+                    context.user_data.pop("expense_data", None)
+                    summary = dict(payload, description=escape_markdown(payload["description"]))
+                    try:
+                        await update.message.reply_text(
+                            Messages.EXPENSE_QUEUED.format(**summary),
+                            parse_mode="Markdown",
+                            reply_markup=Keyboards.get_main_menu_keyboard()
+                        )
+                    except Exception as e:
+                        logger.exception("No se pudo avisar del gasto en cola: %s", e)
+                    return ConversationHandler.END
+                status_code, response = result
+            else:
+                status_code, response = await ExpenseService.create_expense(**payload, telegram_id=telegram_id)
             
-            print(f"Respuesta de create_expense: status_code={status_code}, response={response}")
+            logger.debug("Respuesta de create_expense: status_code=%s, response=%s", status_code, response)
             
             if status_code not in [200, 201]:
                 await update.message.reply_text(
@@ -227,9 +257,8 @@ async def confirm_expense(update: Update, context: ContextTypes.DEFAULT_TYPE):
             return CONFIRM
             
     except Exception as e:
-        print(f"Error en confirm_expense: {str(e)}")
-        traceback.print_exc()
-        await send_error(update, context, str(e))
+        logger.exception("Error en confirm_expense: %s", e)
+        await send_error(update, context, e)
         if "expense_data" in context.user_data:
             del context.user_data["expense_data"]
         await update.message.reply_text(
@@ -238,6 +267,226 @@ async def confirm_expense(update: Update, context: ContextTypes.DEFAULT_TYPE):
         )
         return ConversationHandler.END
 
+async def gasto_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Registra un gasto en un solo mensaje: `/gasto 25.50 pizza`.
+    
+    El monto puede ir al principio o al final. El gasto se crea con una
+    sola llamada a la API (el miembro suele estar en la caché) y se responde
+    con un único mensaje, sin pasos de confirmación.
+    """
+    try:
+        args = context.args or []
+        amount = parse_amount(args[0]) if args else None
+        description_words = args[1:]
+        if amount is None and args:
+            amount = parse_amount(args[-1])
+            description_words = args[:-1]
+        description = " ".join(description_words).strip()
+        
+        if amount is None or not description:
+            await update.message.reply_text(Messages.QUICK_EXPENSE_USAGE, parse_mode="Markdown")
+            return
+        
+        telegram_id = str(update.effective_user.id)
+        status_code, member = await MemberService.get_member(telegram_id)
+        if status_code != 200 or not member or not member.get("family_id"):
+            await update.message.reply_text(Messages.ERROR_NOT_IN_FAMILY)
+            return
+        
+        payload = {
+            "description": description,
+            "amount": amount,
+            "paid_by": member["id"]
+        }
+        if OutboxService.enabled():
+            result = await OutboxService.submit(
+                "expense", payload, member["family_id"], telegram_id, update.effective_chat.id
+            )
+        else:
+            result = await ExpenseService.create_expense(**payload, telegram_id=telegram_id)
+        
+        summary = dict(payload, description=escape_markdown(description))
+        if result is None:
+            await update.message.reply_text(Messages.EXPENSE_QUEUED.format(**summary), parse_mode="Markdown")
+        elif result[0] not in [200, 201]:
+            logger.error("Error al crear el gasto rápido: status_code=%s, response=%s", *result)
+            await update.message.reply_text(Messages.ERROR_CREATING_EXPENSE)
+        else:
+            await update.message.reply_text(Messages.QUICK_EXPENSE_CREATED.format(**summary), parse_mode="Markdown")
+    
+    except Exception as e:
+        logger.exception("Error en gasto_command: %s", e)
+        await send_error(update, context, e)
+
+def parse_expense_lines(text, members, member_id):
+    """Interpreta un gasto por línea con el formato `monto descripción [@quién pagó]`.
+    
+    El monto puede ir al principio o al final de la línea y se ignoran las
+    viñetas iniciales ("-", "•", "*"). Si no se indica quién pagó, se usa
+    `member_id`.
+    
+    Args:
+        text: Líneas del mensaje, sin el comando
+        members: Miembros de la familia (para resolver los @nombres)
+        member_id: ID del miembro que envía el mensaje
+        
+    Returns:
+        tuple: (gastos, errores); cada gasto es un dict con description,
+            amount, paid_by y payer_name, y cada error un texto con el
+            número de línea
+    """
+    expenses, errors = [], []
+    for number, line in enumerate(text.splitlines(), start=1):
+        words = re.sub(r"^\s*[-•*]\s+", "", line).split()
+        if not words:
+            continue
+        
+        payer = None
+        if len(words) > 1 and words[-1].startswith("@"):
+            name = words.pop()
+            matches = find_members_by_name(members, name)
+            if len(matches) != 1:
+                reason = "no está en la familia" if not matches else "coincide con varios miembros"
+                errors.append(f"Línea {number}: {name} {reason}")
+                continue
+            payer = matches[0]
+        
+        amount = parse_amount(words[0])
+        description_words = words[1:]
+        if amount is None:
+            amount = parse_amount(words[-1])
+            description_words = words[:-1]
+        if amount is None:
+            errors.append(f"Línea {number}: falta un monto válido")
+            continue
+        if not description_words:
+            errors.append(f"Línea {number}: falta la descripción")
+            continue
+        
+        expenses.append({
+            "description": " ".join(description_words),
+            "amount": amount,
+            "paid_by": payer["id"] if payer else member_id,
+            "payer_name": payer.get("name") if payer else "Tú"
+        })
+    return expenses, errors
+
+async def gastos_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Recibe varios gastos en un mensaje (`/gastos` y un gasto por línea) y pide confirmación."""
+    try:
+        # Todo lo que sigue al comando, incluida la primera línea
+        parts = (update.message.text or "").split(None, 1)
+        lines = parts[1] if len(parts) > 1 else ""
+        if not lines.strip():
+            await update.message.reply_text(Messages.BATCH_EXPENSE_USAGE, parse_mode="Markdown")
+            return ConversationHandler.END
+        
+        telegram_id = str(update.effective_user.id)
+        status_code, member = await MemberService.get_member(telegram_id)
+        if status_code != 200 or not member or not member.get("family_id"):
+            await update.message.reply_text(Messages.ERROR_NOT_IN_FAMILY)
+            return ConversationHandler.END
+        
+        # Los miembros solo hacen falta si alguna línea indica quién pagó
+        members = []
+        if "@" in lines:
+            status_code, family = await FamilyService.get_family(member["family_id"], telegram_id)
+            if status_code != 200 or not family:
+                await update.message.reply_text(Messages.ERROR_FAMILY_NOT_FOUND)
+                return ConversationHandler.END
+            members = family.get("members", [])
+        
+        expenses, errors = parse_expense_lines(lines, members, member["id"])
+        if errors:
+            await update.message.reply_text(Messages.BATCH_EXPENSE_INVALID.format(errors="\n".join(errors)))
+            return ConversationHandler.END
+        if not expenses:
+            await update.message.reply_text(Messages.BATCH_EXPENSE_USAGE, parse_mode="Markdown")
+            return ConversationHandler.END
+        if len(expenses) > BATCH_MAX_EXPENSES:
+            await update.message.reply_text(Messages.BATCH_EXPENSE_TOO_MANY.format(max=BATCH_MAX_EXPENSES))
+            return ConversationHandler.END
+        
+        context.user_data["batch_expenses"] = {
+            "telegram_id": telegram_id,
+            "family_id": member["family_id"],
+            "expenses": expenses
+        }
+        items = "\n".join(
+            f"{i}. {escape_markdown(expense['description'])}: ${expense['amount']:.2f} ({escape_markdown(expense['payer_name'])})"
+            for i, expense in enumerate(expenses, start=1)
+        )
+        await update.message.reply_text(
+            Messages.BATCH_EXPENSE_CONFIRM.format(
+                count=len(expenses),
+                items=items,
+                total=sum(expense["amount"] for expense in expenses)
+            ),
+            parse_mode="Markdown",
+            reply_markup=Keyboards.get_confirmation_keyboard()
+        )
+        return BATCH_CONFIRM
+    
+    except Exception as e:
+        logger.exception("Error en gastos_command: %s", e)
+        await send_error(update, context, e)
+        return ConversationHandler.END
+
+async def confirm_batch_expenses(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Confirma el lote de /gastos y lo crea con una sola solicitud a la API."""
+    option = update.message.text
+    
+    if option == "❌ Cancelar":
+        context.user_data.pop("batch_expenses", None)
+        await update.message.reply_text(
+            Messages.CANCEL_OPERATION,
+            reply_markup=Keyboards.get_main_menu_keyboard()
+        )
+        return ConversationHandler.END
+    
+    if option != "✅ Confirmar":
+        await update.message.reply_text(
+            Messages.ERROR_INVALID_OPTION,
+            reply_markup=Keyboards.get_confirmation_keyboard()
+        )
+        return BATCH_CONFIRM
+    
+    batch = context.user_data.pop("batch_expenses", None)
+    if not batch:
+        await update.message.reply_text(
+            Messages.BATCH_EXPENSE_USAGE,
+            parse_mode="Markdown",
+            reply_markup=Keyboards.get_main_menu_keyboard()
+        )
+        return ConversationHandler.END
+    
+    try:
+        expenses = [
+            {key: expense[key] for key in ("description", "amount", "paid_by")}
+            for expense in batch["expenses"]
+        ]
+        summary = {"count": len(expenses), "total": sum(expense["amount"] for expense in expenses)}
+        if OutboxService.enabled():
+            result = await OutboxService.submit(
+                "expense_bulk", {"expenses": expenses}, batch["family_id"], batch["telegram_id"], update.effective_chat.id
+            )
+        else:
+            result = await ExpenseService.create_expenses(expenses, telegram_id=batch["telegram_id"])
+        
+        if result is None:
+            message = Messages.BATCH_EXPENSE_QUEUED.format(**summary)
+        elif result[0] not in [200, 201]:
+            message = Messages.ERROR_CREATING_EXPENSE
+        else:
+            message = Messages.BATCH_EXPENSE_CREATED.format(**summary)
+        await update.message.reply_text(message, reply_markup=Keyboards.get_main_menu_keyboard())
+        return ConversationHandler.END
+    
+    except Exception as e:
+        logger.exception("Error en confirm_batch_expenses: %s", e)
+        await send_error(update, context, e)
+        return ConversationHandler.END
+
 async def listar_gastos(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Muestra la lista de gastos de la familia."""
     try:
@@ -247,8 +496,8 @@ async def listar_gastos(update: Update, context: ContextTypes.DEFAULT_TYPE):
         
         # Si no tenemos el family_id, intentar obtenerlo
         if not family_id:
-            print("No se encontró family_id en el contexto, intentando obtenerlo")
-            status_code, member = MemberService.get_member(telegram_id)
+            logger.debug("No se encontró family_id en el contexto, intentando obtenerlo")
+            status_code, member = await MemberService.get_member(telegram_id)
             
             if status_code != 200 or not member or not member.get("family_id"):
                 await update.message.reply_text(
@@ -260,47 +509,47 @@ async def listar_gastos(update: Update, context: ContextTypes.DEFAULT_TYPE):
             # Guardar el ID de la familia en el contexto
             family_id = member.get("family_id")
             context.user_data["family_id"] = family_id
-            print(f"Family ID obtenido y guardado en el contexto: {family_id}")
+            logger.debug("Family ID obtenido y guardado en el contexto: %s", family_id)
         else:
-            print(f"Usando family_id del contexto: {family_id}")
+            logger.debug("Usando family_id del contexto: %s", family_id)
         
         # Obtener los gastos - Asegurarse de que family_id sea un valor válido
         if not family_id:
-            print("Error: family_id es None o vacío")
+            logger.error("Error: family_id es None o vacío")
             await update.message.reply_text(
                 "❌ Error al obtener los gastos: No se pudo determinar la familia",
                 reply_markup=Keyboards.get_main_menu_keyboard()
             )
             return ConversationHandler.END
         
-        print(f"Solicitando gastos para la familia con ID: {family_id}, telegram_id: {telegram_id}")
-        status_code, expenses = ExpenseService.get_family_expenses(family_id, telegram_id)
+        logger.debug("Solicitando gastos para la familia con ID: %s, telegram_id: %s", family_id, telegram_id)
+        member_names = context.user_data.get("member_names", {})
+        if member_names:
+            status_code, expenses = await ExpenseService.get_family_expenses(family_id, telegram_id)
+        else:
+            # Cargar los nombres de los miembros junto con los gastos
+            logger.debug("No se encontraron nombres de miembros en el contexto, cargándolos junto con los gastos")
+            (status_code, expenses), _ = await asyncio.gather(
+                ExpenseService.get_family_expenses(family_id, telegram_id),
+                ContextManager.load_family_members(context, family_id)
+            )
+            member_names = context.user_data.get("member_names", {})
+            logger.debug("Nombres de miembros cargados: %s", member_names)
         
-        print(f"Respuesta de get_family_expenses: status_code={status_code}, expenses={expenses}")
+        logger.debug("Respuesta de get_family_expenses: status_code=%s, expenses=%s", status_code, expenses)
         
         if status_code >= 400:
-            print(f"Error al obtener gastos: status_code={status_code}, expenses={expenses}")
+            logger.error("Error al obtener gastos: status_code=%s, expenses=%s", status_code, expenses)
             await update.message.reply_text(
                 f"❌ Error al obtener los gastos. Código de error: {status_code}",
                 reply_markup=Keyboards.get_main_menu_keyboard()
             )
             return ConversationHandler.END
         
-        # Obtener los nombres de los miembros
-        member_names = context.user_data.get("member_names", {})
-        print(f"Nombres de miembros en el contexto: {member_names}")
-        
-        # Si no hay nombres en el contexto, intentar cargarlos
-        if not member_names:
-            print("No se encontraron nombres de miembros en el contexto, intentando cargarlos")
-            await ContextManager.load_family_members(context, family_id)
-            member_names = context.user_data.get("member_names", {})
-            print(f"Nombres de miembros cargados: {member_names}")
-        
         # Formatear los gastos
-        print(f"Formateando gastos: {expenses}")
+        logger.debug("Formateando gastos: %s", expenses)
         formatted_expenses = Formatters.format_expenses(expenses, member_names)
-        print(f"Gastos formateados: {formatted_expenses}")
+        logger.debug("Gastos formateados: %s", formatted_expenses)
         
         if not formatted_expenses:
             await update.message.reply_text(
@@ -318,9 +567,8 @@ async def listar_gastos(update: Update, context: ContextTypes.DEFAULT_TYPE):
         return ConversationHandler.END
         
     except Exception as e:
-        print(f"Error en listar_gastos: {str(e)}")
-        traceback.print_exc()
-        await send_error(update, context, str(e))
+        logger.exception("Error en listar_gastos: %s", e)
+        await send_error(update, context, e)
         await update.message.reply_text(
             "Volviendo al menú principal...",
             reply_markup=Keyboards.get_main_menu_keyboard()
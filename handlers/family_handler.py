@@ -1,11 +1,15 @@
+import asyncio
+import logging
 from telegram import Update
 from telegram.ext import ContextTypes, ConversationHandler
 from ui.messages import Messages
 from ui.formatters import Formatters
 from services.family_service import FamilyService
+from services.outbox_service import OutboxService
 from utils.context_manager import ContextManager
-from utils.helpers import send_error, create_qr_code
-import traceback
+from utils.helpers import send_error, reply_with_qr_code
+
+logger = logging.getLogger(__name__)
 
 # Eliminamos la importación circular
 # from handlers.menu_handler import show_main_menu
@@ -20,10 +24,10 @@ async def show_balances(update: Update, context: ContextTypes.DEFAULT_TYPE):
     try:
         # Obtener el ID de la familia del contexto
         family_id = ContextManager.get_family_id(context)
-        print(f"Obteniendo balances para la familia con ID: {family_id}")
+        logger.debug("Obteniendo balances para la familia con ID: %s", family_id)
         
         if not family_id:
-            print("No se encontró el ID de familia en el contexto")
+            logger.debug("No se encontró el ID de familia en el contexto")
             await update.message.reply_text(Messages.ERROR_NOT_IN_FAMILY)
             return ConversationHandler.END
         
@@ -33,35 +37,40 @@ async def show_balances(update: Update, context: ContextTypes.DEFAULT_TYPE):
         # Guardar el ID de Telegram en el contexto
         context.user_data["telegram_id"] = telegram_id
         
-        # Obtener los balances usando el ID de Telegram como identificación
-        print(f"Solicitando balances a la API para la familia {family_id} con telegram_id={telegram_id}")
-        status_code, balances = FamilyService.get_family_balances(family_id, telegram_id)
-        print(f"Respuesta de get_family_balances: status_code={status_code}, balances={balances}")
+        # Obtener los balances usando el ID de Telegram como identificación y,
+        # si faltan los nombres de los miembros, cargarlos a la vez
+        logger.debug("Solicitando balances a la API para la familia %s con telegram_id=%s", family_id, telegram_id)
+        member_names = ContextManager.get_member_names(context)
+        if member_names:
+            status_code, balances = await FamilyService.get_family_balances(family_id, telegram_id)
+        else:
+            logger.debug("No hay nombres de miembros en el contexto, cargándolos junto con los balances")
+            (status_code, balances), _ = await asyncio.gather(
+                FamilyService.get_family_balances(family_id, telegram_id),
+                ContextManager.load_family_members(context, family_id)
+            )
+            member_names = ContextManager.get_member_names(context)
+            logger.debug("Nombres de miembros cargados: %s", member_names)
+        logger.debug("Respuesta de get_family_balances: status_code=%s, balances=%s", status_code, balances)
         
         if status_code >= 400 or not balances:
             error_msg = f"❌ Error al obtener los balances. Código de error: {status_code}"
             if isinstance(balances, dict) and "detail" in balances:
                 error_msg += f"\nDetalle: {balances['detail']}"
-            print(f"Error al obtener balances: {error_msg}")
+            logger.error("Error al obtener balances: %s", error_msg)
             await update.message.reply_text(error_msg)
             # No mostrar el menú aquí, solo informar del error
             return ConversationHandler.END
         
-        # Obtener los nombres de los miembros
-        member_names = ContextManager.get_member_names(context)
-        print(f"Nombres de miembros en el contexto: {member_names}")
-        
-        # Si no hay nombres en el contexto, intentar cargarlos
-        if not member_names:
-            print(f"No hay nombres de miembros en el contexto, intentando cargarlos")
-            await ContextManager.load_family_members(context, family_id)
-            member_names = ContextManager.get_member_names(context)
-            print(f"Nombres de miembros cargados: {member_names}")
-        
         # Formatear los balances
-        print(f"Formateando balances: {balances}")
+        logger.debug("Formateando balances: %s", balances)
         formatted_balances = Formatters.format_balances(balances, member_names)
         
+        # Avisar de los gastos y pagos guardados que aún no llegaron a la API
+        pending = await OutboxService.pending_count(family_id)
+        if pending:
+            formatted_balances += "\n\n" + Messages.PENDING_OPERATIONS.format(count=pending)
+        
         # Enviar el mensaje con los balances
         await update.message.reply_text(
             f"📊 *Balances de la Familia*\n\n{formatted_balances}",
@@ -71,9 +80,8 @@ async def show_balances(update: Update, context: ContextTypes.DEFAULT_TYPE):
         return ConversationHandler.END
         
     except Exception as e:
-        print(f"Error en show_balances: {str(e)}")
-        traceback.print_exc()
-        await send_error(update, context, str(e))
+        logger.exception("Error en show_balances: %s", e)
+        await send_error(update, context, e)
         return ConversationHandler.END
 
 async def mostrar_info_familia(update: Update, context: ContextTypes.DEFAULT_TYPE):
@@ -91,10 +99,10 @@ async def mostrar_info_familia(update: Update, context: ContextTypes.DEFAULT_TYP
         context.user_data["telegram_id"] = telegram_id
             
         # Obtener la información de la familia
-        status_code, family = FamilyService.get_family(family_id, telegram_id)
+        status_code, family = await FamilyService.get_family(family_id, telegram_id)
         
         if status_code != 200 or not family:
-            await update.message.reply_text(Messages.ERROR_GETTING_FAMILY_INFO)
+            await update.message.reply_text(Messages.ERROR_FAMILY_NOT_FOUND)
             return ConversationHandler.END
         
         # Formatear la información
@@ -119,7 +127,7 @@ async def mostrar_info_familia(update: Update, context: ContextTypes.DEFAULT_TYP
         return await _show_menu(update, context)
         
     except Exception as e:
-        await send_error(update, context, str(e))
+        await send_error(update, context, e)
         return await _show_menu(update, context)
 
 async def compartir_invitacion(update: Update, context: ContextTypes.DEFAULT_TYPE):
@@ -137,10 +145,10 @@ async def compartir_invitacion(update: Update, context: ContextTypes.DEFAULT_TYP
         context.user_data["telegram_id"] = telegram_id
             
         # Obtener la información de la familia para verificar que existe
-        status_code, family = FamilyService.get_family(family_id, telegram_id)
+        status_code, family = await FamilyService.get_family(family_id, telegram_id)
         
         if status_code != 200 or not family:
-            await update.message.reply_text(Messages.ERROR_GETTING_FAMILY_INFO)
+            await update.message.reply_text(Messages.ERROR_FAMILY_NOT_FOUND)
             return ConversationHandler.END
         
         # Obtener el nombre de la familia
@@ -149,12 +157,11 @@ async def compartir_invitacion(update: Update, context: ContextTypes.DEFAULT_TYP
         # Crear el enlace de invitación
         invite_link = f"https://t.me/{context.bot.username}?start=join_{family_id}"
         
-        # Generar el código QR
-        qr_image = create_qr_code(invite_link)
-        
         # Enviar el mensaje con el código QR - Usando formato de texto simple para evitar problemas con Markdown
-        await update.message.reply_photo(
-            photo=qr_image,
+        await reply_with_qr_code(
+            update,
+            context,
+            invite_link,
             caption=f"🔗 Invitación a la Familia {family_name}\n\n"
                    f"Comparte este código QR o el siguiente enlace para invitar a alguien a unirse a tu familia:\n\n"
                    f"{invite_link}\n\n"
@@ -175,7 +182,6 @@ async def compartir_invitacion(update: Update, context: ContextTypes.DEFAULT_TYP
         return await _show_menu(update, context)
         
     except Exception as e:
-        print(f"Error en compartir_invitacion: {str(e)}")
-        traceback.print_exc()
-        await send_error(update, context, str(e))
+        logger.exception("Error en compartir_invitacion: %s", e)
+        await send_error(update, context, e)
         return await _show_menu(update, context) 
\ No newline at end of file
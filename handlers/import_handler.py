@@ -0,0 +1,262 @@
+import logging
+import time
+import uuid
+import config
+from telegram import Update
+from telegram.error import BadRequest, TelegramError
+from telegram.ext import ContextTypes
+from ui.messages import Messages
+from services.expense_service import ExpenseService
+from services.family_service import FamilyService
+from services.member_service import MemberService
+from utils.csv_import import (
+    ColumnMapping,
+    CsvImportError,
+    HEADER_SEARCH_ROWS,
+    is_csv_document,
+    iter_csv_rows,
+    iter_file_chunks,
+    parse_csv_amount
+)
+from utils.helpers import send_error, find_members_by_name
+
+logger = logging.getLogger(__name__)
+
+# Gastos por solicitud a POST /expenses/bulk (máximo 100)
+IMPORT_BATCH_SIZE = getattr(config, "IMPORT_BATCH_SIZE", 100)
+
+# Filas que se importan como máximo de un archivo
+IMPORT_MAX_ROWS = getattr(config, "IMPORT_MAX_ROWS", 10000)
+
+# Segundos mínimos entre ediciones del mensaje de progreso
+IMPORT_PROGRESS_INTERVAL = getattr(config, "IMPORT_PROGRESS_INTERVAL", 2.0)
+
+# Tamaño máximo de los archivos que un bot puede descargar de Telegram
+MAX_FILE_SIZE = 20 * 1024 * 1024
+
+# Filas con error que se muestran en el resumen final
+MAX_REPORTED_ERRORS = 10
+
+# Usuarios con una importación en curso
+_running = set()
+
+class ImportProgress:
+    """Estado de una importación y su mensaje de progreso."""
+
+    def __init__(self, status_message):
+        self.status_message = status_message
+        self.rows = 0
+        self.imported = 0
+        self.total = 0.0
+        self.skipped = 0
+        self.income = 0
+        self.errors = []
+        self.truncated = False
+        self._last_edit = time.monotonic()
+
+    def skip(self, row_number, reason):
+        self.skipped += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append(f"Fila {row_number}: {reason}")
+
+    async def update(self, force=False):
+        """Edita el mensaje de progreso (como mucho cada IMPORT_PROGRESS_INTERVAL segundos)."""
+        now = time.monotonic()
+        if not force and now - self._last_edit < IMPORT_PROGRESS_INTERVAL:
+            return
+        self._last_edit = now
+        await self.edit(Messages.IMPORT_PROGRESS.format(rows=self.rows, imported=self.imported))
+
+    async def edit(self, text):
+        try:
+            await self.status_message.edit_text(text)
+        except BadRequest as e:
+            # "Message is not modified" y similares: no afectan a la importación
+            logger.debug("No se pudo editar el progreso de la importación: %s", e)
+        except TelegramError as e:
+            logger.warning("No se pudo editar el progreso de la importación: %s", e)
+
+    def summary(self):
+        text = Messages.IMPORT_DONE.format(imported=self.imported, total=self.total, rows=self.rows)
+        if self.income:
+            text += Messages.IMPORT_INCOME_SKIPPED.format(income=self.income)
+        if self.skipped:
+            text += Messages.IMPORT_SKIPPED.format(skipped=self.skipped, errors="\n".join(self.errors))
+        if self.truncated:
+            text += Messages.IMPORT_TRUNCATED.format(max=IMPORT_MAX_ROWS)
+        return text
+
+async def import_document(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Importa como gastos las filas de un CSV enviado como documento.
+
+    Comprueba el archivo y al usuario, responde con un mensaje de progreso y
+    hace la importación en una tarea aparte, de modo que el chat no queda
+    bloqueado mientras dura.
+    """
+    try:
+        document = update.message.document
+        if not is_csv_document(document.file_name, document.mime_type):
+            await update.message.reply_text(Messages.IMPORT_UNSUPPORTED)
+            return
+        if document.file_size and document.file_size > MAX_FILE_SIZE:
+            await update.message.reply_text(Messages.IMPORT_TOO_LARGE.format(max_mb=MAX_FILE_SIZE // (1024 * 1024)))
+            return
+
+        telegram_id = str(update.effective_user.id)
+        if telegram_id in _running:
+            await update.message.reply_text(Messages.IMPORT_ALREADY_RUNNING)
+            return
+
+        status_code, member = await MemberService.get_member(telegram_id)
+        if status_code != 200 or not member or not member.get("family_id"):
+            await update.message.reply_text(Messages.ERROR_NOT_IN_FAMILY)
+            return
+
+        status_message = await update.message.reply_text(Messages.IMPORT_STARTED)
+        _running.add(telegram_id)
+        context.application.create_task(
+            _run_import(document, member, telegram_id, ImportProgress(status_message)),
+            update=update
+        )
+
+    except Exception as e:
+        logger.exception("Error en import_document: %s", e)
+        await send_error(update, context, e)
+
+async def _run_import(document, member, telegram_id, progress):
+    """Lee el archivo por partes y envía los gastos a la API por lotes.
+
+    Los lotes se envían en orden y con una clave de idempotencia cada uno,
+    así que un reintento no duplica gastos. Si un lote falla, la
+    importación se detiene y se informa de hasta dónde se registró.
+
+    El signo de los montos se interpreta igual en todo el archivo: si la
+    cabecera es la de un extracto (columna de cargos, abonos o saldo), los
+    gastos son los montos negativos; si no, lo decide el primer lote (hasta
+    IMPORT_BATCH_SIZE filas válidas) según predominen los negativos
+    (extracto) o los positivos (hoja de gastos, donde los negativos son
+    devoluciones). Los ingresos y devoluciones no se importan.
+    """
+    import_id = uuid.uuid4().hex
+    batch = []
+    batches_sent = 0
+    statement = None
+
+    async def send(batch):
+        nonlocal batches_sent, statement
+        if statement is None:
+            negatives = sum(1 for _, amount, _, _ in batch if amount < 0)
+            statement = negatives > len(batch) - negatives
+        expenses = []
+        for row_number, amount, description, paid_by in batch:
+            if (amount > 0) == statement:
+                progress.income += 1
+                continue
+            expenses.append({"description": description, "amount": abs(amount), "paid_by": paid_by})
+        if not expenses:
+            return
+
+        status_code, response = await ExpenseService.create_expenses(
+            expenses, telegram_id=telegram_id, idempotency_key=f"import-{import_id}-{batches_sent}"
+        )
+        batches_sent += 1
+        if status_code not in [200, 201]:
+            error = response.get("detail", response.get("error")) if isinstance(response, dict) else None
+            raise CsvImportError(Messages.IMPORT_FAILED.format(
+                error=error if isinstance(error, str) else f"código de error {status_code}",
+                imported=progress.imported,
+                row=batch[0][0]
+            ))
+        progress.imported += len(expenses)
+        progress.total += sum(expense["amount"] for expense in expenses)
+
+    try:
+        mapping = None
+        members = []
+        file = await document.get_file()
+        async for rows in iter_csv_rows(iter_file_chunks(file)):
+            for row_number, row in rows:
+                if mapping is None:
+                    mapping = ColumnMapping.from_header(row)
+                    if mapping is None and row_number >= HEADER_SEARCH_ROWS:
+                        raise CsvImportError(Messages.IMPORT_NO_HEADER)
+                    if mapping is not None:
+                        statement = mapping.statement
+                    if mapping is not None and mapping.payer is not None:
+                        status_code, family = await FamilyService.get_family(member["family_id"], telegram_id)
+                        members = family.get("members", []) if status_code == 200 and family else []
+                    continue
+                if not any(cell.strip() for cell in row):
+                    continue
+
+                if progress.rows >= IMPORT_MAX_ROWS:
+                    progress.truncated = True
+                    break
+                progress.rows += 1
+
+                expense = _row_to_expense(row_number, row, mapping, members, member, progress)
+                if expense is not None:
+                    batch.append(expense)
+                if len(batch) >= IMPORT_BATCH_SIZE:
+                    await send(batch)
+                    batch = []
+            if progress.truncated:
+                break
+            await progress.update()
+
+        if mapping is None:
+            raise CsvImportError(Messages.IMPORT_NO_HEADER)
+        if batch:
+            await send(batch)
+        await progress.edit(progress.summary())
+        logger.info(
+            "Importación de %s: %s filas, %s gastos registrados, %s omitidas",
+            telegram_id, progress.rows, progress.imported, progress.skipped
+        )
+
+    except CsvImportError as e:
+        await progress.edit(str(e))
+    except Exception as e:
+        logger.exception("Error al importar el archivo de %s: %s", telegram_id, e)
+        await progress.edit(Messages.IMPORT_FAILED.format(
+            error=str(e), imported=progress.imported, row=progress.rows
+        ))
+    finally:
+        _running.discard(telegram_id)
+
+def _row_to_expense(row_number, row, mapping, members, member, progress):
+    """Convierte una fila en (fila, monto, descripción, pagador) o la omite.
+
+    Returns:
+        tuple: El gasto, o None si la fila no es un gasto válido
+    """
+    def cell(index):
+        return row[index].strip() if index is not None and index < len(row) else ""
+
+    amount_text = cell(mapping.amount)
+    if mapping.debit and not amount_text:
+        # Extracto con columnas separadas: las filas sin cargo son ingresos
+        progress.income += 1
+        return None
+    amount = parse_csv_amount(amount_text)
+    if amount is None or amount == 0:
+        progress.skip(row_number, f"monto no válido ({amount_text or 'vacío'})")
+        return None
+
+    description = cell(mapping.description)
+    if not description:
+        progress.skip(row_number, "falta la descripción")
+        return None
+
+    paid_by = member["id"]
+    payer_name = cell(mapping.payer)
+    if payer_name:
+        matches = find_members_by_name(members, payer_name)
+        if len(matches) != 1:
+            progress.skip(row_number, f"{payer_name} no es un miembro de la familia")
+            return None
+        paid_by = matches[0]["id"]
+
+    if mapping.debit:
+        amount = -abs(amount)
+    return row_number, amount, description, paid_by
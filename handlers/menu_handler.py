@@ -1,3 +1,4 @@
+import logging
 from telegram import Update, ReplyKeyboardRemove
 from telegram.ext import ContextTypes, ConversationHandler
 from config import DESCRIPTION, AMOUNT, CONFIRM, SELECT_TO_MEMBER, PAYMENT_AMOUNT, PAYMENT_CONFIRM
@@ -17,6 +18,8 @@ from handlers.payment_handler import registrar_pago
 from handlers.family_handler import show_balances, mostrar_info_familia, compartir_invitacion
 from handlers.edit_handler import show_edit_options
 
+logger = logging.getLogger(__name__)
+
 async def show_main_menu(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Muestra el menú principal para usuarios en una familia."""
     await update.message.reply_text(
@@ -30,19 +33,19 @@ async def handle_menu_option(update: Update, context: ContextTypes.DEFAULT_TYPE)
     option = update.message.text
     
     # Imprimir para depuración
-    print(f"Opción seleccionada: {option}")
+    logger.debug("Opción seleccionada: %s", option)
     
     # Si ya tenemos el family_id en el contexto, no necesitamos verificar
     if "family_id" in context.user_data:
         family_id = context.user_data["family_id"]
-        print(f"Ya tenemos el family_id en el contexto: {family_id}")
+        logger.debug("Ya tenemos el family_id en el contexto: %s", family_id)
     else:
         # Verificar que el usuario esté en una familia
         telegram_id = str(update.effective_user.id)
-        print(f"Solicitando información del miembro con telegram_id: {telegram_id}")
+        logger.debug("Solicitando información del miembro con telegram_id: %s", telegram_id)
         
         # Obtener información del miembro directamente de la API
-        status_code, member = MemberService.get_member(telegram_id)
+        status_code, member = await MemberService.get_member(telegram_id)
         
         if status_code != 200 or not member or not member.get("family_id"):
             await update.message.reply_text(Messages.ERROR_NOT_IN_FAMILY)
@@ -51,7 +54,7 @@ async def handle_menu_option(update: Update, context: ContextTypes.DEFAULT_TYPE)
         # Guardar el ID de la familia en el contexto
         family_id = member.get("family_id")
         context.user_data["family_id"] = family_id
-        print(f"Family ID guardado en el contexto: {family_id}")
+        logger.debug("Family ID guardado en el contexto: %s", family_id)
     
     # Manejar la opción seleccionada
     if option == "💰 Ver Balances":
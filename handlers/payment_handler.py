@@ -1,13 +1,18 @@
+import logging
 from telegram import Update, ReplyKeyboardMarkup
 from telegram.ext import ContextTypes, ConversationHandler
-from config import SELECT_TO_MEMBER, PAYMENT_AMOUNT, CONFIRM
+from telegram.helpers import escape_markdown
+from config import SELECT_TO_MEMBER, PAYMENT_AMOUNT, PAYMENT_CONFIRM
 from ui.keyboards import Keyboards
 from ui.messages import Messages
 from services.payment_service import PaymentService
+from services.outbox_service import OutboxService
 from services.family_service import FamilyService
 from services.member_service import MemberService
 from utils.context_manager import ContextManager
-from utils.helpers import send_error
+from utils.helpers import send_error, gather_api_calls, parse_amount, find_members_by_name
+
+logger = logging.getLogger(__name__)
 
 # Eliminamos la importación circular
 # from handlers.menu_handler import show_main_menu
@@ -29,11 +34,20 @@ async def registrar_pago(update: Update, context: ContextTypes.DEFAULT_TYPE):
         
         # Obtener el ID del usuario
         telegram_id = str(update.effective_user.id)
-        print(f"Buscando miembro con telegram_id: {telegram_id}")
+        logger.debug("Buscando miembro con telegram_id: %s", telegram_id)
         
-        # Verificar si el usuario está en una familia
-        status_code, member = MemberService.get_member(telegram_id)
-        print(f"Respuesta de get_member: status_code={status_code}, member={member}")
+        # Si ya conocemos la familia, pedir el miembro, los balances y los
+        # miembros de la familia a la vez; si no, primero hace falta el miembro
+        family_id = context.user_data.get("family_id")
+        if family_id:
+            (status_code, member), balances_result, family_result = await gather_api_calls(
+                MemberService.get_member(telegram_id),
+                FamilyService.get_family_balances(family_id),
+                FamilyService.get_family(family_id)
+            )
+        else:
+            status_code, member = await MemberService.get_member(telegram_id)
+        logger.debug("Respuesta de get_member: status_code=%s, member=%s", status_code, member)
         
         if status_code != 200 or not member or not member.get("family_id"):
             await update.message.reply_text(
@@ -43,20 +57,27 @@ async def registrar_pago(update: Update, context: ContextTypes.DEFAULT_TYPE):
             await _show_menu(update, context)
             return ConversationHandler.END
         
-        # Obtener el ID de la familia
-        family_id = member.get("family_id")
-        print(f"ID de familia obtenido: {family_id}")
+        # La familia del contexto puede no ser la actual del miembro
+        if member.get("family_id") != family_id:
+            family_id = member.get("family_id")
+            balances_result, family_result = await gather_api_calls(
+                FamilyService.get_family_balances(family_id),
+                FamilyService.get_family(family_id)
+            )
+        logger.debug("ID de familia obtenido: %s", family_id)
         
         # Obtener el ID del miembro
         from_member = member.get("id", telegram_id)
-        print(f"ID del miembro obtenido: {from_member}")
+        logger.debug("ID del miembro obtenido: %s", from_member)
         
-        # Guardar el ID del pagador
+        # Guardar el ID del pagador y su familia
         context.user_data["payment_data"]["from_member"] = from_member
+        context.user_data["payment_data"]["family_id"] = family_id
         
-        # Obtener los balances de la familia
-        status_code, balances = FamilyService.get_family_balances(family_id)
-        print(f"Respuesta de get_family_balances: status_code={status_code}, balances={balances}")
+        status_code, balances = balances_result
+        family_status, family = family_result
+        logger.debug("Respuesta de get_family_balances: status_code=%s, balances=%s", status_code, balances)
+        logger.debug("Respuesta de get_family: status_code=%s, family=%s", family_status, family)
         
         if status_code != 200 or not balances:
             await update.message.reply_text(
@@ -66,9 +87,13 @@ async def registrar_pago(update: Update, context: ContextTypes.DEFAULT_TYPE):
             await _show_menu(update, context)
             return ConversationHandler.END
         
-        # Obtener los miembros de la familia para mostrar nombres
-        status_code, family = FamilyService.get_family(family_id)
-        print(f"Respuesta de get_family: status_code={status_code}, family={family}")
+        if family_status != 200 or not family:
+            await update.message.reply_text(
+                f"❌ Error al obtener los miembros de la familia. Código de error: {family_status}",
+                reply_markup=Keyboards.remove_keyboard()
+            )
+            await _show_menu(update, context)
+            return ConversationHandler.END
         
         # Preparar la lista de acreedores (a quienes debe dinero)
         debtors = []
@@ -78,14 +103,17 @@ async def registrar_pago(update: Update, context: ContextTypes.DEFAULT_TYPE):
             if balance.get("member_id") == str(from_member):
                 # Añadir todas las deudas del miembro
                 for debt in balance.get("debts", []):
-                    creditor_name = debt.get("to", "")
+                    creditor = str(debt.get("to", ""))
                     amount = debt.get("amount", 0)
                     
-                    # Buscar el ID del acreedor en los miembros de la familia
+                    # Buscar al acreedor en los miembros de la familia (la API
+                    # lo identifica por su ID)
                     creditor_id = None
+                    creditor_name = creditor
                     for member in family.get("members", []):
-                        if member.get("name") == creditor_name:
+                        if str(member.get("id")) == creditor or member.get("name") == creditor:
                             creditor_id = member.get("id")
+                            creditor_name = member.get("name", creditor)
                             break
                     
                     if creditor_id and amount > 0:
@@ -96,7 +124,7 @@ async def registrar_pago(update: Update, context: ContextTypes.DEFAULT_TYPE):
                         })
                 break
         
-        print(f"Acreedores encontrados (a quienes debe dinero): {debtors}")
+        logger.debug("Acreedores encontrados (a quienes debe dinero): %s", debtors)
         
         if not debtors:
             await update.message.reply_text(
@@ -127,8 +155,8 @@ async def registrar_pago(update: Update, context: ContextTypes.DEFAULT_TYPE):
         return SELECT_TO_MEMBER
         
     except Exception as e:
-        print(f"Error al registrar pago: {str(e)}")
-        await send_error(update, context, str(e))
+        logger.exception("Error al registrar pago: %s", e)
+        await send_error(update, context, e)
         await _show_menu(update, context)
         return ConversationHandler.END
 
@@ -138,7 +166,7 @@ async def select_to_member(update: Update, context: ContextTypes.DEFAULT_TYPE):
     
     if option == "❌ Cancelar":
         await update.message.reply_text(
-            Messages.CANCEL_PAYMENT,
+            Messages.CANCEL_OPERATION,
             reply_markup=Keyboards.remove_keyboard()
         )
         await _show_menu(update, context)
@@ -209,19 +237,16 @@ async def show_payment_confirmation(update: Update, context: ContextTypes.DEFAUL
     from_member_name = member_names.get(payment_data["from_member"], "Tú")
     to_member_name = payment_data["to_member_name"]
     
-    # Formatear detalles
-    details = (
-        f"*De:* {from_member_name}\n"
-        f"*Para:* {to_member_name}\n"
-        f"*Monto:* ${payment_data['amount']:.2f}"
-    )
-    
     await update.message.reply_text(
-        Messages.CONFIRM_PAYMENT.format(details=details),
+        Messages.CREATE_PAYMENT_CONFIRM.format(
+            from_member=from_member_name,
+            to_member=to_member_name,
+            amount=payment_data["amount"]
+        ),
         parse_mode="Markdown",
         reply_markup=Keyboards.get_confirmation_keyboard()
     )
-    return CONFIRM
+    return PAYMENT_CONFIRM
 
 async def confirm_payment(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Confirma y crea el pago."""
@@ -229,7 +254,7 @@ async def confirm_payment(update: Update, context: ContextTypes.DEFAULT_TYPE):
     
     if option == "❌ Cancelar":
         await update.message.reply_text(
-            Messages.CANCEL_PAYMENT,
+            Messages.CANCEL_OPERATION,
             reply_markup=Keyboards.remove_keyboard()
         )
         await _show_menu(update, context)
@@ -237,22 +262,36 @@ async def confirm_payment(update: Update, context: ContextTypes.DEFAULT_TYPE):
     
     if option != "✅ Confirmar":
         await update.message.reply_text("❌ Por favor, confirma o cancela el pago:")
-        return CONFIRM
+        return PAYMENT_CONFIRM
     
     # Preparar datos para la API
     payment_data = context.user_data["payment_data"]
     
     try:
-        # Enviar a la API
-        status_code, response = PaymentService.create_payment(
-            from_member=payment_data["from_member"],
-            to_member=payment_data["to_member"],
-            amount=payment_data["amount"]
-        )
+        payload = {
+            "from_member": payment_data["from_member"],
+            "to_member": payment_data["to_member"],
+            "amount": payment_data["amount"]
+        }
+        if OutboxService.enabled():
+            # Guardar el pago en la cola local para no perderlo si la API no
+            # responde, y esperar un poco a que se registre
+            family_id = payment_data.get("family_id") or f"member:{payload['from_member']}"
+            result = await OutboxService.submit(
+                "payment", payload, family_id, str(update.effective_user.id), update.effective_chat.id
+            )
+        else:
+            # Enviar a la API
+            result = await PaymentService.create_payment(**payload)
         
-        if status_code >= 400:
+        if result is None:
+            await update.message.reply_text(
+                Messages.PAYMENT_QUEUED.format(**payload),
+                reply_markup=Keyboards.remove_keyboard()
+            )
+        elif result[0] >= 400:
             await update.message.reply_text(
-                f"❌ Error al registrar el pago. Código de error: {status_code}",
+                f"❌ Error al registrar el pago. Código de error: {result[0]}",
                 reply_markup=Keyboards.remove_keyboard()
             )
         else:
@@ -270,9 +309,88 @@ async def confirm_payment(update: Update, context: ContextTypes.DEFAULT_TYPE):
         return ConversationHandler.END
         
     except Exception as e:
-        await send_error(update, context, str(e))
+        await send_error(update, context, e)
         # Limpiar datos del pago
         if "payment_data" in context.user_data:
             del context.user_data["payment_data"]
         await _show_menu(update, context)
-        return ConversationHandler.END 
\ No newline at end of file
+        return ConversationHandler.END
+
+async def pago_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Registra un pago en un solo mensaje: `/pago @Ana 40`.
+    
+    El monto puede ir al principio o al final. El miembro y la familia
+    suelen estar en la caché, así que el pago se crea con una sola llamada
+    a la API. A diferencia del flujo guiado, no se consultan los balances ni
+    se limita el monto a la deuda pendiente.
+    """
+    try:
+        args = context.args or []
+        amount = parse_amount(args[-1]) if args else None
+        name_words = args[:-1]
+        if amount is None and args:
+            amount = parse_amount(args[0])
+            name_words = args[1:]
+        name = " ".join(name_words).strip()
+        
+        if amount is None or not name:
+            await update.message.reply_text(Messages.QUICK_PAYMENT_USAGE, parse_mode="Markdown")
+            return
+        
+        telegram_id = str(update.effective_user.id)
+        status_code, member = await MemberService.get_member(telegram_id)
+        if status_code != 200 or not member or not member.get("family_id"):
+            await update.message.reply_text(Messages.ERROR_NOT_IN_FAMILY)
+            return
+        
+        family_id = member["family_id"]
+        status_code, family = await FamilyService.get_family(family_id, telegram_id)
+        if status_code != 200 or not family:
+            await update.message.reply_text(Messages.ERROR_FAMILY_NOT_FOUND)
+            return
+        
+        members = family.get("members", [])
+        matches = find_members_by_name(members, name)
+        if not matches:
+            await update.message.reply_text(Messages.QUICK_PAYMENT_UNKNOWN_MEMBER.format(
+                name=name,
+                members=", ".join(m.get("name", "") for m in members if str(m.get("id")) != str(member["id"]))
+            ))
+            return
+        if len(matches) > 1:
+            await update.message.reply_text(Messages.QUICK_PAYMENT_AMBIGUOUS_MEMBER.format(name=name))
+            return
+        to_member = matches[0]
+        if str(to_member.get("id")) == str(member["id"]):
+            await update.message.reply_text(Messages.QUICK_PAYMENT_SELF)
+            return
+        
+        payload = {
+            "from_member": member["id"],
+            "to_member": to_member["id"],
+            "amount": amount
+        }
+        if OutboxService.enabled():
+            result = await OutboxService.submit(
+                "payment", payload, family_id, telegram_id, update.effective_chat.id
+            )
+        else:
+            result = await PaymentService.create_payment(**payload)
+        
+        if result is None:
+            await update.message.reply_text(Messages.PAYMENT_QUEUED.format(**payload))
+        elif result[0] >= 400:
+            logger.error("Error al crear el pago rápido: status_code=%s, response=%s", *result)
+            await update.message.reply_text(f"❌ Error al registrar el pago. Código de error: {result[0]}")
+        else:
+            await update.message.reply_text(
+                Messages.QUICK_PAYMENT_CREATED.format(
+                    amount=amount,
+                    to_member=escape_markdown(to_member.get("name", ""))
+                ),
+                parse_mode="Markdown"
+            )
+    
+    except Exception as e:
+        logger.exception("Error en pago_command: %s", e)
+        await send_error(update, context, e)
@@ -1,3 +1,5 @@
+import asyncio
+import logging
 from telegram import Update
 from telegram.ext import ContextTypes, ConversationHandler
 from config import ASK_FAMILY_CODE, ASK_FAMILY_NAME, ASK_USER_NAME, JOIN_FAMILY_CODE
@@ -5,9 +7,10 @@ from ui.keyboards import Keyboards
 from ui.messages import Messages
 from services.family_service import FamilyService
 from services.member_service import MemberService
-from utils.helpers import create_qr_code, parse_deep_link, send_error
+from utils.helpers import reply_with_qr_code, parse_deep_link, send_error, gather_api_calls
 from utils.context_manager import ContextManager
-import traceback
+
+logger = logging.getLogger(__name__)
 
 async def _show_menu(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Función auxiliar para mostrar el menú principal sin importación circular."""
@@ -33,7 +36,7 @@ async def start_create_family(update: Update, context: ContextTypes.DEFAULT_TYPE
     """Inicia el flujo para crear una familia o redirige al flujo de unirse."""
     option = update.message.text
     
-    print(f"Opción seleccionada: {option}")
+    logger.debug("Opción seleccionada: %s", option)
     
     if option == "🏠 Crear Familia":
         # Si el usuario selecciona crear familia, no es necesario verificar si ya está en una
@@ -64,7 +67,7 @@ async def ask_user_name(update: Update, context: ContextTypes.DEFAULT_TYPE):
     family_name = update.message.text
     context.user_data["family_name"] = family_name
     
-    print(f"Nombre de familia recibido: {family_name}")
+    logger.debug("Nombre de familia recibido: %s", family_name)
     
     await update.message.reply_text(
         Messages.CREATE_FAMILY_NAME_RECEIVED.format(family_name=family_name),
@@ -79,10 +82,10 @@ async def create_family_with_names(update: Update, context: ContextTypes.DEFAULT
         family_name = context.user_data["family_name"]
         telegram_id = str(update.effective_user.id)
         
-        print(f"Creando familia '{family_name}' con usuario '{user_name}' (telegram_id: {telegram_id})")
+        logger.debug("Creando familia '%s' con usuario '%s' (telegram_id: %s)", family_name, user_name, telegram_id)
         
         # Crear la familia con el miembro inicial
-        status_code, response = FamilyService.create_family(
+        status_code, response = await FamilyService.create_family(
             name=family_name,
             members=[{
                 "name": user_name,
@@ -90,7 +93,7 @@ async def create_family_with_names(update: Update, context: ContextTypes.DEFAULT
             }]
         )
         
-        print(f"Respuesta de create_family: status_code={status_code}, response={response}")
+        logger.debug("Respuesta de create_family: status_code=%s, response=%s", status_code, response)
         
         if status_code >= 400:
             error_msg = f"❌ Error al crear la familia. Código de error: {status_code}"
@@ -101,7 +104,7 @@ async def create_family_with_names(update: Update, context: ContextTypes.DEFAULT
         
         # Obtener el ID de la familia creada
         family_id = response.get("id", "")
-        print(f"ID de familia obtenido: {family_id}")
+        logger.debug("ID de familia obtenido: %s", family_id)
         
         if not family_id:
             await update.message.reply_text("❌ Error: No se pudo obtener el ID de la familia creada.")
@@ -109,7 +112,7 @@ async def create_family_with_names(update: Update, context: ContextTypes.DEFAULT
         
         # Guardar que el usuario está en una familia
         context.user_data["family_id"] = family_id
-        print(f"ID de familia guardado en el contexto: {context.user_data['family_id']}")
+        logger.debug("ID de familia guardado en el contexto: %s", context.user_data['family_id'])
         
         # Guardar la información de la familia directamente en el contexto
         # No es necesario cargar los miembros de la API porque ya sabemos que solo hay uno
@@ -139,20 +142,15 @@ async def create_family_with_names(update: Update, context: ContextTypes.DEFAULT
         
         # Crear y enviar el código QR
         qr_data = f"https://t.me/{context.bot.username}?start=join_{family_id}"
-        qr_image = create_qr_code(qr_data)
-        await update.message.reply_photo(
-            photo=qr_image,
-            caption=Messages.SHARE_INVITATION_QR
-        )
+        await reply_with_qr_code(update, context, qr_data, caption=Messages.SHARE_INVITATION_QR)
         
         # Mostrar el menú principal
         from handlers.menu_handler import show_main_menu
         await show_main_menu(update, context)
 
     except Exception as e:
-        print(f"Error en create_family_with_names: {str(e)}")
-        traceback.print_exc()
-        await send_error(update, context, str(e))
+        logger.exception("Error en create_family_with_names: %s", e)
+        await send_error(update, context, e)
         # No limpiar el contexto para poder depurar
         # context.user_data.clear()
     
@@ -172,14 +170,14 @@ async def join_family(update: Update, context: ContextTypes.DEFAULT_TYPE):
     family_id = update.message.text.strip()  # Eliminar espacios en blanco
     
     # Imprimir para depuración
-    print(f"Intentando unirse a la familia con ID: {family_id}")
+    logger.debug("Intentando unirse a la familia con ID: %s", family_id)
     
     try:
         # Verificar si la familia existe
-        status_code, response = FamilyService.get_family(family_id)
+        status_code, response = await FamilyService.get_family(family_id)
         
         # Imprimir para depuración
-        print(f"Respuesta de get_family: status_code={status_code}, response={response}")
+        logger.debug("Respuesta de get_family: status_code=%s, response=%s", status_code, response)
         
         # Verificar el status code
         if status_code == 404:
@@ -201,16 +199,16 @@ async def join_family(update: Update, context: ContextTypes.DEFAULT_TYPE):
         telegram_id = str(update.effective_user.id)
         user_name = update.effective_user.first_name
         
-        print(f"Añadiendo usuario {telegram_id} ({user_name}) a la familia {family_id}")
+        logger.debug("Añadiendo usuario %s (%s) a la familia %s", telegram_id, user_name, family_id)
         
-        status_code, add_response = FamilyService.add_member_to_family(
+        status_code, add_response = await FamilyService.add_member_to_family(
             family_id=family_id,
             telegram_id=telegram_id,
             name=user_name
         )
         
         # Imprimir para depuración
-        print(f"Respuesta de add_member_to_family: status_code={status_code}, response={add_response}")
+        logger.debug("Respuesta de add_member_to_family: status_code=%s, response=%s", status_code, add_response)
         
         if status_code >= 400:
             await update.message.reply_text(
@@ -220,16 +218,17 @@ async def join_family(update: Update, context: ContextTypes.DEFAULT_TYPE):
         
         # Guardar el ID de la familia en el contexto
         context.user_data["family_id"] = family_id
-        print(f"ID de familia guardado en el contexto: {context.user_data['family_id']}")
-        
-        # Cargar los miembros de la familia
-        success = await ContextManager.load_family_members(context, family_id)
-        print(f"Carga de miembros de la familia: {'exitosa' if success else 'fallida'}")
+        logger.debug("ID de familia guardado en el contexto: %s", context.user_data['family_id'])
         
-        await update.message.reply_text(
-            Messages.JOIN_FAMILY_SUCCESS.format(family_name=family_name),
-            parse_mode="Markdown"
+        # Cargar los miembros de la familia mientras se envía el mensaje de éxito
+        success, _ = await asyncio.gather(
+            ContextManager.load_family_members(context, family_id),
+            update.message.reply_text(
+                Messages.JOIN_FAMILY_SUCCESS.format(family_name=family_name),
+                parse_mode="Markdown"
+            )
         )
+        logger.debug("Carga de miembros de la familia: %s", 'exitosa' if success else 'fallida')
         
         # Mostrar el menú principal
         from handlers.menu_handler import show_main_menu
@@ -237,7 +236,7 @@ async def join_family(update: Update, context: ContextTypes.DEFAULT_TYPE):
         return ConversationHandler.END
         
     except Exception as e:
-        print(f"Error al unirse a la familia: {str(e)}")
+        logger.exception("Error al unirse a la familia: %s", e)
         await send_error(update, context, f"Error al unirse a la familia: {str(e)}")
         return JOIN_FAMILY_CODE  # Mantener el estado para permitir otro intento
 
@@ -252,37 +251,42 @@ async def handle_deep_link(update: Update, context: ContextTypes.DEFAULT_TYPE):
             telegram_id = str(update.effective_user.id)
             user_name = update.effective_user.first_name
             
-            print(f"Procesando enlace de invitación para unirse a la familia {family_id}. Usuario: {user_name} ({telegram_id})")
+            logger.debug("Procesando enlace de invitación para unirse a la familia %s. Usuario: %s (%s)", family_id, user_name, telegram_id)
             
-            # Verificar si el usuario ya está en una familia
-            status_code, member = MemberService.get_member(telegram_id)
+            # Verificar a la vez si el usuario ya está en una familia y si la
+            # familia de la invitación existe
+            (member_status, member), (status_code, response) = await gather_api_calls(
+                MemberService.get_member(telegram_id),
+                FamilyService.get_family(family_id)
+            )
             
-            if status_code == 200 and member and member.get("family_id"):
+            if member_status == 200 and member and member.get("family_id"):
                 existing_family_id = member.get("family_id")
                 
                 # Si ya está en la misma familia, mostrar mensaje informativo
                 if existing_family_id == family_id:
-                    await update.message.reply_text(
-                        f"Ya eres miembro de esta familia. No es necesario unirte de nuevo.",
-                        reply_markup=Keyboards.get_main_menu_keyboard()
-                    )
                     context.user_data["family_id"] = family_id
-                    await ContextManager.load_family_members(context, family_id)
+                    await asyncio.gather(
+                        update.message.reply_text(
+                            f"Ya eres miembro de esta familia. No es necesario unirte de nuevo.",
+                            reply_markup=Keyboards.get_main_menu_keyboard()
+                        ),
+                        ContextManager.load_family_members(context, family_id)
+                    )
                     return await _show_menu(update, context)
                 
                 # Si está en otra familia, preguntar si quiere cambiar
                 else:
-                    await update.message.reply_text(
-                        f"Ya perteneces a otra familia. Para unirte a una nueva familia, primero debes salir de la actual.",
-                        reply_markup=Keyboards.get_main_menu_keyboard()
-                    )
                     context.user_data["family_id"] = existing_family_id
-                    await ContextManager.load_family_members(context, existing_family_id)
+                    await asyncio.gather(
+                        update.message.reply_text(
+                            f"Ya perteneces a otra familia. Para unirte a una nueva familia, primero debes salir de la actual.",
+                            reply_markup=Keyboards.get_main_menu_keyboard()
+                        ),
+                        ContextManager.load_family_members(context, existing_family_id)
+                    )
                     return await _show_menu(update, context)
             
-            # Verificar si la familia existe
-            status_code, response = FamilyService.get_family(family_id)
-            
             if status_code == 404:
                 await update.message.reply_text(
                     "❌ La familia a la que intentas unirte no existe. Es posible que haya sido eliminada o que el enlace sea incorrecto.",
@@ -298,18 +302,25 @@ async def handle_deep_link(update: Update, context: ContextTypes.DEFAULT_TYPE):
             
             family_name = response.get("name", "Sin nombre")
             
-            # Mostrar mensaje de bienvenida
-            await update.message.reply_text(
-                f"👋 ¡Hola {user_name}! Has sido invitado a unirte a la familia *{family_name}*. Estamos procesando tu solicitud...",
-                parse_mode="Markdown"
-            )
-                
-            # Agregar al usuario a la familia
-            status_code, add_response = FamilyService.add_member_to_family(
-                family_id=family_id,
-                telegram_id=telegram_id,
-                name=user_name
+            # Mostrar el mensaje de bienvenida mientras se agrega al usuario a la
+            # familia; si falla el mensaje, el alta se comprueba igualmente
+            welcome, add_result = await asyncio.gather(
+                update.message.reply_text(
+                    f"👋 ¡Hola {user_name}! Has sido invitado a unirte a la familia *{family_name}*. Estamos procesando tu solicitud...",
+                    parse_mode="Markdown"
+                ),
+                FamilyService.add_member_to_family(
+                    family_id=family_id,
+                    telegram_id=telegram_id,
+                    name=user_name
+                ),
+                return_exceptions=True
             )
+            if isinstance(welcome, Exception):
+                logger.error("No se pudo enviar el aviso de invitación: %s", welcome, exc_info=welcome)
+            if isinstance(add_result, Exception):
+                raise add_result
+            status_code, add_response = add_result
             
             if status_code >= 400:
                 error_message = f"❌ Error al unirte a la familia. Código de error: {status_code}"
@@ -326,21 +337,25 @@ async def handle_deep_link(update: Update, context: ContextTypes.DEFAULT_TYPE):
             context.user_data["family_id"] = family_id
             context.user_data["telegram_id"] = telegram_id
             
-            # Mostrar mensaje de éxito
-            await update.message.reply_text(
-                Messages.JOIN_FAMILY_SUCCESS.format(family_name=family_name),
-                parse_mode="Markdown"
+            # Mostrar el mensaje de éxito mientras se cargan los miembros de la
+            # familia; el usuario ya es miembro aunque alguna de las dos falle
+            results = await asyncio.gather(
+                update.message.reply_text(
+                    Messages.JOIN_FAMILY_SUCCESS.format(family_name=family_name),
+                    parse_mode="Markdown"
+                ),
+                ContextManager.load_family_members(context, family_id),
+                return_exceptions=True
             )
-            
-            # Cargar los miembros de la familia
-            await ContextManager.load_family_members(context, family_id)
+            for result in results:
+                if isinstance(result, Exception):
+                    logger.error("Error tras unirse a la familia: %s", result, exc_info=result)
             
             # Mostrar el menú principal
             return await _show_menu(update, context)
             
         except Exception as e:
-            print(f"Error al procesar el enlace de invitación: {str(e)}")
-            traceback.print_exc()
+            logger.exception("Error al procesar el enlace de invitación: %s", e)
             await send_error(update, context, f"Error al procesar la invitación: {str(e)}")
             await update.message.reply_text(
                 "Por favor, intenta unirte a la familia manualmente o solicita un nuevo enlace de invitación.",
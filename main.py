@@ -4,8 +4,10 @@ from telegram.ext import (
     CommandHandler, 
     MessageHandler, 
     ConversationHandler,
+    CallbackQueryHandler,
     filters
 )
+import config
 from config import (
     BOT_TOKEN, 
     ASK_FAMILY_CODE, 
@@ -44,41 +46,103 @@ from handlers.expense_handler import (
     show_expense_confirmation,
     confirm_expense,
     crear_gasto,
-    listar_gastos
+    listar_gastos,
+    gasto_command,
+    gastos_command,
+    confirm_batch_expenses,
+    BATCH_CONFIRM
 )
 from handlers.payment_handler import (
     select_to_member,
     get_payment_amount,
     show_payment_confirmation,
     confirm_payment,
-    registrar_pago
+    registrar_pago,
+    pago_command
 )
 from handlers.family_handler import (
     show_balances,
     mostrar_info_familia,
     compartir_invitacion
 )
+from handlers.import_handler import import_document
 from handlers.edit_handler import (
     show_edit_options,
     handle_edit_option,
     handle_select_expense,
     handle_select_payment,
+    handle_page_callback,
     handle_confirm_delete,
     handle_edit_expense_amount,
     cancel as edit_cancel
 )
+from services.api_service import ApiService, API_MODE
+from services.embedded_api import EmbeddedApi
+from services.digest_service import DigestService
+from services.outbox_service import OutboxService
+from utils.persistence import SQLitePersistence
+from utils.webhook import run_webhook
+from utils.update_processor import ChatOrderedUpdateProcessor
+from utils.log import setup_logging
+from utils.render_executor import RenderExecutor
+from utils.instrumentation import InstrumentedRequest, instrument_handlers
+from utils.metrics_server import MetricsExporter
 
 # Configuración de logging
-logging.basicConfig(
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    level=logging.INFO
+setup_logging(
+    level=getattr(config, "LOG_LEVEL", "INFO"),
+    json_output=getattr(config, "LOG_JSON", False),
+    debug_sample_rate=getattr(config, "LOG_DEBUG_SAMPLE_RATE", 1)
 )
 logger = logging.getLogger(__name__)
 
-def main():
-    """Función principal que inicia el bot."""
-    # Crear la aplicación
-    application = Application.builder().token(BOT_TOKEN).build()
+async def start_resources(application):
+    """Arranca la cola de creaciones y la exportación de métricas."""
+    await OutboxService.start(application)
+    await MetricsExporter.start(application)
+
+async def shutdown_resources(application):
+    """Detiene la cola de creaciones y las métricas y libera el cliente HTTP, la API embebida y el pool de renderizado al apagar el bot."""
+    await MetricsExporter.stop()
+    await OutboxService.stop()
+    await ApiService.close()
+    EmbeddedApi.shutdown()
+    RenderExecutor.shutdown()
+
+def build_application(request=None, persistence_file=getattr(config, "BOT_PERSISTENCE_FILE", "bot_state.sqlite3")):
+    """Crea la aplicación del bot con todos sus manejadores.
+    
+    Args:
+        request: Cliente de la Bot API de Telegram (por defecto
+            InstrumentedRequest); simulate_flows.py pasa uno falso
+        persistence_file: Archivo de la persistencia (None para desactivarla)
+    
+    Returns:
+        Application: La aplicación, sin arrancar
+    """
+    # Crear la aplicación. Las actualizaciones de chats distintos se procesan
+    # en paralelo; las de un mismo chat, en orden de llegada
+    builder = (
+        Application.builder()
+        .token(BOT_TOKEN)
+        # Mide cada llamada a Telegram (ver utils.instrumentation)
+        .request(request or InstrumentedRequest(connection_pool_size=256))
+        .concurrent_updates(ChatOrderedUpdateProcessor(
+            getattr(config, "BOT_CONCURRENT_UPDATES", 256),
+            getattr(config, "BOT_MAX_PENDING_UPDATES", None)
+        ))
+        .post_init(start_resources)
+        .post_shutdown(shutdown_resources)
+    )
+    
+    # Persistencia de user_data y conversaciones entre reinicios
+    if persistence_file:
+        builder.persistence(SQLitePersistence(
+            persistence_file,
+            update_interval=getattr(config, "BOT_PERSISTENCE_INTERVAL", 30)
+        ))
+    
+    application = builder.build()
     
     # Manejador para el flujo de creación de familia
     family_handler = ConversationHandler(
@@ -94,7 +158,9 @@ def main():
             ASK_USER_NAME: [MessageHandler(filters.TEXT & ~filters.COMMAND, create_family_with_names)],
             JOIN_FAMILY_CODE: [MessageHandler(filters.TEXT & ~filters.COMMAND, join_family)]
         },
-        fallbacks=[CommandHandler("cancel", cancel)]
+        fallbacks=[CommandHandler("cancel", cancel)],
+        name="family_conversation",
+        persistent=bool(persistence_file)
     )
     application.add_handler(family_handler)
     
@@ -105,12 +171,20 @@ def main():
         ],
         states={
             EDIT_OPTION: [MessageHandler(filters.TEXT & ~filters.COMMAND, handle_edit_option)],
-            SELECT_EXPENSE: [MessageHandler(filters.TEXT & ~filters.COMMAND, handle_select_expense)],
-            SELECT_PAYMENT: [MessageHandler(filters.TEXT & ~filters.COMMAND, handle_select_payment)],
+            SELECT_EXPENSE: [
+                CallbackQueryHandler(handle_page_callback, pattern="^e:"),
+                MessageHandler(filters.TEXT & ~filters.COMMAND, handle_select_expense)
+            ],
+            SELECT_PAYMENT: [
+                CallbackQueryHandler(handle_page_callback, pattern="^p:"),
+                MessageHandler(filters.TEXT & ~filters.COMMAND, handle_select_payment)
+            ],
             CONFIRM_DELETE: [MessageHandler(filters.TEXT & ~filters.COMMAND, handle_confirm_delete)],
             EDIT_EXPENSE_AMOUNT: [MessageHandler(filters.TEXT & ~filters.COMMAND, handle_edit_expense_amount)]
         },
-        fallbacks=[CommandHandler("cancel", edit_cancel)]
+        fallbacks=[CommandHandler("cancel", edit_cancel)],
+        name="edit_conversation",
+        persistent=bool(persistence_file)
     )
     application.add_handler(edit_handler)
     
@@ -126,10 +200,22 @@ def main():
         },
         fallbacks=[CommandHandler("cancel", cancel)],
         name="expense_conversation",
-        persistent=False
+        persistent=bool(persistence_file)
     )
     application.add_handler(expense_handler)
     
+    # Manejador para varios gastos en un mensaje (/gastos)
+    batch_expense_handler = ConversationHandler(
+        entry_points=[CommandHandler("gastos", gastos_command)],
+        states={
+            BATCH_CONFIRM: [MessageHandler(filters.TEXT & ~filters.COMMAND, confirm_batch_expenses)]
+        },
+        fallbacks=[CommandHandler("cancel", cancel)],
+        name="batch_expense_conversation",
+        persistent=bool(persistence_file)
+    )
+    application.add_handler(batch_expense_handler)
+    
     # Manejador para el flujo de pagos
     payment_handler = ConversationHandler(
         entry_points=[
@@ -142,10 +228,17 @@ def main():
         },
         fallbacks=[CommandHandler("cancel", cancel)],
         name="payment_conversation",
-        persistent=False
+        persistent=bool(persistence_file)
     )
     application.add_handler(payment_handler)
     
+    # Registro rápido en un solo mensaje: /gasto 25.50 pizza y /pago @Ana 40
+    application.add_handler(CommandHandler("gasto", gasto_command))
+    application.add_handler(CommandHandler("pago", pago_command))
+    
+    # Importación de gastos desde un archivo CSV enviado como documento
+    application.add_handler(MessageHandler(filters.Document.ALL, import_document))
+    
     # Manejador para opciones del menú principal
     menu_handler = MessageHandler(
         filters.Regex("^(💰 Ver Balances|ℹ️ Info Familia|📋 Ver Gastos|🔗 Compartir Invitación)$"),
@@ -160,8 +253,40 @@ def main():
     )
     application.add_handler(unknown_handler)
     
-    # Iniciar el bot
-    application.run_polling()
+    # Resumen periódico de balances para todas las familias
+    DigestService.schedule(application)
+    
+    # Medir la duración, las llamadas a la API y a Telegram y los errores de
+    # todos los manejadores
+    instrument_handlers(application)
+    
+    return application
+
+def main():
+    """Función principal que inicia el bot."""
+    # Arrancar los procesos de renderizado antes que cualquier otro hilo
+    RenderExecutor.start()
+    
+    # En modo embebido, cargar la API antes de atender actualizaciones
+    if API_MODE == "embedded":
+        EmbeddedApi.load()
+    
+    application = build_application()
+    
+    # Iniciar el bot: webhook si hay una URL pública configurada, si no polling
+    webhook_url = getattr(config, "WEBHOOK_URL", None)
+    if webhook_url:
+        run_webhook(
+            application,
+            url=webhook_url,
+            listen=getattr(config, "WEBHOOK_LISTEN", "127.0.0.1"),
+            port=getattr(config, "WEBHOOK_PORT", 8443),
+            path=getattr(config, "WEBHOOK_PATH", "/telegram"),
+            secret_token=getattr(config, "WEBHOOK_SECRET_TOKEN", None),
+            workers=getattr(config, "WEBHOOK_WORKERS", 40)
+        )
+    else:
+        application.run_polling()
     
 if __name__ == "__main__":
     main()
\ No newline at end of file
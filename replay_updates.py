@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+Envía actualizaciones de Telegram grabadas al receptor webhook del bot.
+
+Sirve para probar el modo webhook en local sin pasar por Telegram. Las
+actualizaciones se leen de un archivo JSON Lines (una actualización por
+línea, tal como las envía Telegram) o se generan mensajes de texto de
+prueba. Con --serve se arranca además un receptor local que solo cuenta
+las actualizaciones recibidas, para medir el receptor de forma aislada.
+
+Uso:
+    python replay_updates.py [--file updates.jsonl] [--count 1000]
+                             [--url http://127.0.0.1:8443/telegram]
+                             [--secret TOKEN] [--concurrency 40] [--serve]
+"""
+
+import argparse
+import asyncio
+import json
+import time
+from collections import Counter
+from urllib.parse import urlparse
+import httpx
+
+def load_updates(path):
+    """Lee las actualizaciones grabadas de un archivo JSON Lines."""
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+def generate_updates(count, chats=50):
+    """Genera mensajes de texto de prueba repartidos entre varios chats."""
+    updates = []
+    for i in range(count):
+        chat_id = 1000 + i % chats
+        updates.append({
+            "update_id": i + 1,
+            "message": {
+                "message_id": i + 1,
+                "date": int(time.time()),
+                "chat": {"id": chat_id, "type": "private", "first_name": f"Usuario {chat_id}"},
+                "from": {"id": chat_id, "is_bot": False, "first_name": f"Usuario {chat_id}"},
+                "text": "💰 Ver Balances"
+            }
+        })
+    return updates
+
+async def replay(url, updates, secret=None, concurrency=40):
+    """Envía las actualizaciones con `concurrency` conexiones en paralelo.
+
+    Returns:
+        tuple: (Counter de status codes, segundos transcurridos)
+    """
+    headers = {"Content-Type": "application/json"}
+    if secret:
+        headers["X-Telegram-Bot-Api-Secret-Token"] = secret
+
+    statuses = Counter()
+    pending = iter(updates)
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+
+    async with httpx.AsyncClient(headers=headers, limits=limits, timeout=30) as client:
+        async def worker():
+            for update in pending:
+                try:
+                    response = await client.post(url, content=json.dumps(update))
+                    statuses[response.status_code] += 1
+                except httpx.HTTPError as e:
+                    statuses[type(e).__name__] += 1
+
+        start = time.perf_counter()
+        await asyncio.gather(*[worker() for _ in range(concurrency)])
+        elapsed = time.perf_counter() - start
+
+    return statuses, elapsed
+
+class _CountingApplication:
+    """Sustituto de la aplicación del bot que solo cuenta las actualizaciones."""
+
+    def __init__(self):
+        self.bot = None
+        self.update_queue = asyncio.Queue()
+
+async def main(args):
+    updates = load_updates(args.file) if args.file else generate_updates(args.count)
+
+    receiver = None
+    if args.serve:
+        from utils.webhook import WebhookReceiver
+
+        parsed = urlparse(args.url)
+        application = _CountingApplication()
+        receiver = WebhookReceiver(
+            application, parsed.hostname, parsed.port, parsed.path,
+            secret_token=args.secret, workers=args.concurrency
+        )
+        await receiver.start()
+
+    try:
+        statuses, elapsed = await replay(args.url, updates, args.secret, args.concurrency)
+    finally:
+        if receiver is not None:
+            await receiver.stop()
+
+    print(f"Enviadas {len(updates)} actualizaciones en {elapsed:.2f}s "
+          f"({len(updates) / elapsed:.0f} actualizaciones/s)")
+    for status, count in sorted(statuses.items(), key=str):
+        print(f"  {status}: {count}")
+    if receiver is not None:
+        print(f"Actualizaciones encoladas por el receptor: {application.update_queue.qsize()}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Reenvía actualizaciones grabadas al webhook del bot")
+    parser.add_argument("--file", help="Archivo JSON Lines con actualizaciones grabadas")
+    parser.add_argument("--count", type=int, default=1000, help="Actualizaciones a generar si no hay archivo")
+    parser.add_argument("--url", default="http://127.0.0.1:8443/telegram")
+    parser.add_argument("--secret", default=None)
+    parser.add_argument("--concurrency", type=int, default=40)
+    parser.add_argument("--serve", action="store_true", help="Arrancar un receptor local de prueba")
+    asyncio.run(main(parser.parse_args()))
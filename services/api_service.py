@@ -1,66 +1,320 @@
-import requests
-import traceback
+import asyncio
+import copy
+import logging
+import fnmatch
+import random
+import re
+import time
+import httpx
+import config
 from config import API_BASE_URL
+from services.embedded_api import EmbeddedApi
+from utils.circuit_breaker import CircuitBreaker
+from utils.instrumentation import record_api_call
+from utils.metrics import Metrics
+
+logger = logging.getLogger(__name__)
+
+# "http" para llamar a la API por HTTP, "embedded" para ejecutar su capa de
+# servicios en el mismo proceso (ver EmbeddedApi)
+API_MODE = getattr(config, "API_MODE", "http")
+
+# Tiempo máximo por defecto de una solicitud (segundos)
+API_TIMEOUT = getattr(config, "API_TIMEOUT", 15.0)
+
+# Tiempo máximo para establecer la conexión (segundos)
+API_CONNECT_TIMEOUT = getattr(config, "API_CONNECT_TIMEOUT", 5.0)
+
+# Tiempos máximos por endpoint: {"MÉTODO /ruta/con/*": segundos}
+API_TIMEOUTS = getattr(config, "API_TIMEOUTS", {})
+
+# Tamaño del pool de conexiones compartido
+API_MAX_CONNECTIONS = getattr(config, "API_MAX_CONNECTIONS", 100)
+API_MAX_KEEPALIVE_CONNECTIONS = getattr(config, "API_MAX_KEEPALIVE_CONNECTIONS", 20)
+
+# Reintentos: solo para métodos idempotentes, con espera exponencial y jitter
+API_RETRY_METHODS = getattr(config, "API_RETRY_METHODS", ("GET",))
+API_RETRY_ATTEMPTS = getattr(config, "API_RETRY_ATTEMPTS", 3)
+API_RETRY_BACKOFF = getattr(config, "API_RETRY_BACKOFF", 0.2)
+API_RETRY_MAX_DELAY = getattr(config, "API_RETRY_MAX_DELAY", 2.0)
+
+# Circuit breaker por endpoint: fallos seguidos para abrirlo y segundos abierto
+API_CIRCUIT_FAILURES = getattr(config, "API_CIRCUIT_FAILURES", 5)
+API_CIRCUIT_RESET_TIMEOUT = getattr(config, "API_CIRCUIT_RESET_TIMEOUT", 30.0)
+
+# Las solicitudes GET idénticas que coinciden en el tiempo comparten una sola
+# llamada a la API. El ID de Telegram forma parte de la solicitud, así que
+# solo se comparte entre solicitudes del mismo usuario: la API comprueba con
+# él si puede ver los datos
+API_COALESCE_GETS = getattr(config, "API_COALESCE_GETS", True)
+
+# Status codes que indican un fallo transitorio y se pueden reintentar
+RETRY_STATUS_CODES = (502, 503, 504)
+
+# Segmentos de ruta que son identificadores (números, UUID)
+_ID_SEGMENT = re.compile(r"^(\d+|[0-9a-fA-F-]{16,})$")
+
+def _http2_available():
+    """Indica si está instalado el soporte de HTTP/2 de httpx (paquete h2)."""
+    try:
+        import h2  # noqa: F401
+        return True
+    except ImportError:
+        return False
 
 class ApiService:
-    """Servicio base para interactuar con la API."""
-    
+    """Servicio base para interactuar con la API.
+
+    Todas las solicitudes comparten un único httpx.AsyncClient, de modo que
+    las conexiones se reutilizan (keep-alive) y una llamada lenta no bloquea
+    el bucle de eventos del bot mientras se atienden otros chats.
+    """
+
+    _client = None
+    _breakers = {}
+    _inflight = {}
+
     @staticmethod
-    def request(method, endpoint, data=None, token=None, check_status=True):
+    def get_client():
+        """Obtiene el cliente HTTP compartido, creándolo si es necesario.
+
+        Returns:
+            httpx.AsyncClient: Cliente compartido
+        """
+        if ApiService._client is None or ApiService._client.is_closed:
+            ApiService._client = httpx.AsyncClient(
+                base_url=API_BASE_URL,
+                headers={'Content-Type': 'application/json'},
+                timeout=httpx.Timeout(API_TIMEOUT, connect=API_CONNECT_TIMEOUT),
+                limits=httpx.Limits(
+                    max_connections=API_MAX_CONNECTIONS,
+                    max_keepalive_connections=API_MAX_KEEPALIVE_CONNECTIONS
+                ),
+                http2=_http2_available()
+            )
+        return ApiService._client
+
+    @staticmethod
+    def set_client(client):
+        """Sustituye el cliente compartido.
+
+        Permite, por ejemplo, usar un httpx.AsyncClient con
+        httpx.ASGITransport para llamar a la aplicación FastAPI de la API en
+        el mismo proceso (ver simulate_flows.py).
+        """
+        ApiService._client = client
+
+    @staticmethod
+    async def close(application=None):
+        """Cierra el cliente compartido y sus conexiones.
+
+        Puede registrarse directamente como post_shutdown de la aplicación.
+        """
+        if ApiService._client is not None:
+            await ApiService._client.aclose()
+            ApiService._client = None
+
+    @staticmethod
+    def get_timeout(method, endpoint):
+        """Obtiene el tiempo máximo configurado para un endpoint.
+
+        Args:
+            method: Método HTTP
+            endpoint: Endpoint de la API
+
+        Returns:
+            httpx.Timeout: Tiempo máximo de la solicitud
+        """
+        target = f"{method} {endpoint}"
+        for pattern, seconds in API_TIMEOUTS.items():
+            if fnmatch.fnmatch(target, pattern):
+                return httpx.Timeout(seconds, connect=API_CONNECT_TIMEOUT)
+        return httpx.Timeout(API_TIMEOUT, connect=API_CONNECT_TIMEOUT)
+
+    @staticmethod
+    def endpoint_key(method, endpoint):
+        """Nombre del endpoint sin identificadores, para métricas y circuit breakers.
+
+        Por ejemplo, "GET /members/123" se convierte en "GET /members/{id}".
+        """
+        path = endpoint.split("?", 1)[0]
+        segments = ["{id}" if _ID_SEGMENT.match(segment) else segment for segment in path.split("/")]
+        return f"{method} {'/'.join(segments)}"
+
+    @staticmethod
+    def get_breaker(key):
+        """Obtiene el circuit breaker de un endpoint, creándolo si es necesario."""
+        breaker = ApiService._breakers.get(key)
+        if breaker is None:
+            breaker = ApiService._breakers[key] = CircuitBreaker(
+                key, API_CIRCUIT_FAILURES, API_CIRCUIT_RESET_TIMEOUT
+            )
+        return breaker
+
+    @staticmethod
+    def get_retry_delay(attempt, retry_after=None):
+        """Espera antes del reintento `attempt` (desde 0).
+
+        Usa espera exponencial con jitter completo: un valor aleatorio entre 0
+        y API_RETRY_BACKOFF * 2^attempt, limitado a API_RETRY_MAX_DELAY. Si la
+        API indicó Retry-After, se respeta (con el mismo límite).
+        """
+        if retry_after is not None:
+            return min(retry_after, API_RETRY_MAX_DELAY)
+        return random.uniform(0, min(API_RETRY_MAX_DELAY, API_RETRY_BACKOFF * 2 ** attempt))
+
+    @staticmethod
+    async def request(method, endpoint, data=None, token=None, check_status=True, params=None, headers=None):
         """Realiza una solicitud HTTP a la API.
-        
+
+        Los métodos de API_RETRY_METHODS, y las solicitudes que llevan la
+        cabecera Idempotency-Key, se reintentan tras errores de conexión,
+        timeouts y respuestas 502/503/504. Cada endpoint tiene un
+        circuit breaker: mientras está abierto, la solicitud se rechaza con
+        503 sin llegar a la API. Las solicitudes GET idénticas simultáneas
+        comparten una sola llamada (ver API_COALESCE_GETS).
+
         Args:
             method: Método HTTP (GET, POST, PUT, DELETE)
             endpoint: Endpoint de la API
             data: Datos a enviar en la solicitud (opcional)
             token: Token de autenticación o ID de Telegram (opcional)
             check_status: Si es True, lanza una excepción si el status code es un error
-            
+            params: Parámetros de consulta adicionales (opcional)
+            headers: Cabeceras adicionales, por ejemplo Idempotency-Key (opcional)
+
         Returns:
             tuple: (status_code, response_data)
         """
+        start = time.monotonic()
+        try:
+            return await ApiService._dispatch(method, endpoint, data, token, check_status, params, headers)
+        finally:
+            # Atribuir la llamada al manejador en curso (ver utils.instrumentation)
+            record_api_call(time.monotonic() - start)
+
+    @staticmethod
+    async def _dispatch(method, endpoint, data, token, check_status, params, headers):
+        """Prepara la solicitud y la comparte con otras GET idénticas en curso."""
         # Asegurarse de que el endpoint comience con una barra diagonal
         if not endpoint.startswith('/'):
             endpoint = '/' + endpoint
-            
-        url = f"{API_BASE_URL}{endpoint}"
-        print(f"Realizando solicitud {method} a {url}")
+
+        logger.debug("Realizando solicitud %s a %s%s", method, API_BASE_URL, endpoint)
         if data:
-            print(f"Datos: {data}")
-            
-        try:
-            # Configurar headers para JSON
-            headers = {'Content-Type': 'application/json'}
-            
-            # Añadir identificación si está disponible
-            # En lugar de usar un token JWT, simplemente pasamos el ID de Telegram
-            # como un parámetro de consulta o en los datos
-            params = {}
-            if token and isinstance(token, str):
-                # Usar el token como ID de Telegram en un parámetro de consulta
-                params['telegram_id'] = token
-                print(f"Incluyendo telegram_id={token} en la solicitud")
-            
-            if method == "GET":
-                response = requests.get(url, params=params, headers=headers, timeout=15)
-            elif method == "POST":
-                # Para solicitudes POST, solo incluir el telegram_id en los parámetros de consulta
-                # y no duplicarlo en el cuerpo de la solicitud
-                response = requests.post(url, json=data, params=params, headers=headers, timeout=15)
-            elif method == "PUT":
-                # Para solicitudes PUT, solo incluir el telegram_id en los parámetros de consulta
-                # y no duplicarlo en el cuerpo de la solicitud
-                response = requests.put(url, json=data, params=params, headers=headers, timeout=15)
-            elif method == "DELETE":
-                response = requests.delete(url, params=params, headers=headers, timeout=15)
+            logger.debug("Datos: %s", data)
+
+        if method not in ("GET", "POST", "PUT", "DELETE"):
+            logger.debug("Método HTTP no soportado: %s", method)
+            return 400, {"error": f"Método HTTP no soportado: {method}"}
+
+        # Añadir identificación si está disponible
+        # En lugar de usar un token JWT, simplemente pasamos el ID de Telegram
+        # como un parámetro de consulta
+        params = dict(params or {})
+        if token and isinstance(token, str):
+            # Usar el token como ID de Telegram en un parámetro de consulta
+            params['telegram_id'] = token
+            logger.debug("Incluyendo telegram_id=%s en la solicitud", token)
+
+        if method != "GET" or not API_COALESCE_GETS:
+            return await ApiService._request(method, endpoint, data, params, check_status, headers)
+
+        # Compartir la llamada con las solicitudes idénticas que ya estén en curso
+        flight_key = (endpoint, tuple(sorted(params.items())), tuple(sorted((headers or {}).items())))
+        task = ApiService._inflight.get(flight_key)
+        if task is None:
+            task = asyncio.ensure_future(ApiService._request(method, endpoint, data, params, check_status, headers))
+            ApiService._inflight[flight_key] = task
+            task.add_done_callback(lambda _: ApiService._inflight.pop(flight_key, None))
+        else:
+            Metrics.inc("api_coalesced", endpoint=ApiService.endpoint_key(method, endpoint))
+            logger.debug("Compartiendo la solicitud en curso %s %s", method, endpoint)
+
+        # shield: si se cancela una de las solicitudes, la llamada sigue para las demás
+        status_code, response_data = await asyncio.shield(task)
+
+        # Cada solicitud recibe su propia copia para que los manejadores puedan modificarla
+        return status_code, copy.deepcopy(response_data)
+
+    @staticmethod
+    async def _request(method, endpoint, data, params, check_status, headers=None):
+        """Realiza la solicitud con reintentos y circuit breaker.
+
+        Returns:
+            tuple: (status_code, response_data)
+        """
+        key = ApiService.endpoint_key(method, endpoint)
+        breaker = ApiService.get_breaker(key)
+        # Con Idempotency-Key la API no duplica la escritura al repetirla
+        retryable = method in API_RETRY_METHODS or "Idempotency-Key" in (headers or {})
+        attempts = max(1, API_RETRY_ATTEMPTS) if retryable else 1
+
+        for attempt in range(attempts):
+            if not breaker.allow():
+                Metrics.inc("api_circuit_rejected", endpoint=key)
+                logger.warning("Circuito abierto para %s; solicitud rechazada sin llamar a la API", key)
+                return 503, {"error": f"La API no está disponible. Vuelve a intentarlo en {breaker.retry_after():.0f} segundos."}
+
+            try:
+                status_code, response_data, retry_after = await ApiService._send(method, endpoint, data, params, key, headers)
+            except asyncio.CancelledError:
+                breaker.release()
+                raise
+
+            if status_code >= 500:
+                breaker.record_failure()
             else:
-                print(f"Método HTTP no soportado: {method}")
-                return 400, {"error": f"Método HTTP no soportado: {method}"}
-            
+                breaker.record_success()
+
+            if status_code not in RETRY_STATUS_CODES or attempt == attempts - 1:
+                break
+
+            delay = ApiService.get_retry_delay(attempt, retry_after)
+            Metrics.inc("api_retries", endpoint=key)
+            logger.warning(
+                "Reintentando %s en %.2f s (intento %s de %s, status %s)",
+                key, delay, attempt + 2, attempts, status_code
+            )
+            await asyncio.sleep(delay)
+
+        # Verificar si hubo un error
+        if check_status and status_code >= 400:
+            error_message = response_data.get("detail", response_data.get("error", "Error desconocido"))
+            logger.error("Error en la solicitud: %s", error_message)
+
+        return status_code, response_data
+
+    @staticmethod
+    async def _send(method, endpoint, data, params, key, headers=None):
+        """Hace un único intento de la solicitud.
+
+        Returns:
+            tuple: (status_code, response_data, retry_after); retry_after son
+                los segundos de la cabecera Retry-After o None
+        """
+        start = time.monotonic()
+        if API_MODE == "embedded":
+            status_code, response_data = await EmbeddedApi.request(method, endpoint, data, params, headers)
+            Metrics.inc("api_requests", endpoint=key, status=status_code)
+            Metrics.observe("api_request_seconds", time.monotonic() - start, endpoint=key)
+            return status_code, response_data, None
+
+        try:
+            # Solo POST y PUT llevan cuerpo; el telegram_id no se duplica en él
+            response = await ApiService.get_client().request(
+                method,
+                endpoint,
+                json=data if method in ("POST", "PUT") else None,
+                params=params,
+                headers=headers,
+                timeout=ApiService.get_timeout(method, endpoint)
+            )
+
             # Obtener el status code
             status_code = response.status_code
-            print(f"Status code: {status_code}")
-            
+            logger.debug("Status code: %s", status_code)
+
             # Intentar obtener el contenido como JSON
             try:
                 if response.content:
@@ -68,30 +322,31 @@ class ApiService:
                 else:
                     response_data = {}
             except ValueError:
-                print(f"Respuesta no es JSON válido: {response.content}")
+                logger.warning("Respuesta no es JSON válido: %s", response.content)
                 response_data = {"error": "Respuesta no es JSON válido", "content": str(response.content)}
-            
-            # Verificar si hubo un error
-            if check_status and status_code >= 400:
-                error_message = response_data.get("detail", "Error desconocido")
-                print(f"Error en la solicitud: {error_message}")
-                
-            return status_code, response_data
-            
-        except requests.exceptions.ConnectionError as e:
-            print(f"Error de conexión: {e}")
-            traceback.print_exc()
-            return 503, {"error": f"Error de conexión: {str(e)}"}
-        except requests.exceptions.Timeout as e:
-            print(f"Timeout en la solicitud: {e}")
-            traceback.print_exc()
-            return 504, {"error": f"Timeout en la solicitud: {str(e)}"}
+
+            try:
+                retry_after = float(response.headers["retry-after"])
+            except (KeyError, ValueError):
+                retry_after = None
+
+            result = status_code, response_data, retry_after
+
+        except httpx.TimeoutException as e:
+            logger.warning("Timeout en la solicitud %s: %s", key, e)
+            result = 504, {"error": f"Timeout en la solicitud: {str(e)}"}, None
+        except httpx.TransportError as e:
+            logger.warning("Error de conexión en %s: %r", key, e)
+            result = 503, {"error": f"Error de conexión: {str(e)}"}, None
         except Exception as e:
-            print(f"Error inesperado: {e}")
-            traceback.print_exc()
-            return 500, {"error": f"Error inesperado: {str(e)}"}
-            
+            logger.exception("Error inesperado: %s", e)
+            result = 500, {"error": f"Error inesperado: {str(e)}"}, None
+
+        Metrics.inc("api_requests", endpoint=key, status=result[0])
+        Metrics.observe("api_request_seconds", time.monotonic() - start, endpoint=key)
+        return result
+
     @staticmethod
-    def api_request(method, endpoint, data=None, token=None, check_status=True):
+    async def api_request(method, endpoint, data=None, token=None, check_status=True):
         """Alias para request para mantener compatibilidad."""
-        return ApiService.request(method, endpoint, data, token, check_status)
\ No newline at end of file
+        return await ApiService.request(method, endpoint, data, token, check_status)
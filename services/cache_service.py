@@ -0,0 +1,84 @@
+import copy
+import time
+from collections import OrderedDict
+import config
+
+# Tiempo de vida de las entradas (segundos)
+CACHE_MEMBER_TTL = getattr(config, "CACHE_MEMBER_TTL", 300)
+CACHE_FAMILY_TTL = getattr(config, "CACHE_FAMILY_TTL", 120)
+
+# Tiempo de vida de las respuestas 404 (usuarios o familias que no existen)
+CACHE_NEGATIVE_TTL = getattr(config, "CACHE_NEGATIVE_TTL", 30)
+
+# Número máximo de entradas en memoria
+CACHE_MAX_ENTRIES = getattr(config, "CACHE_MAX_ENTRIES", 5000)
+
+class CacheService:
+    """Caché en memoria de las consultas de identidad a la API.
+
+    Guarda respuestas (status_code, response) con un tiempo de vida por
+    entrada. Las claves son tuplas cuyo primer elemento es el tipo de dato
+    ("member", "family"), lo que permite invalidar por prefijo después de
+    las escrituras del propio bot. Cuando se supera el tamaño máximo se
+    descartan las entradas usadas hace más tiempo.
+    """
+
+    _entries = OrderedDict()
+
+    @staticmethod
+    async def get_or_fetch(key, fetch, ttl):
+        """Devuelve una respuesta cacheada o la obtiene de la API.
+
+        Solo se guardan las respuestas 200 (durante `ttl`) y 404 (durante
+        CACHE_NEGATIVE_TTL); los errores nunca se cachean.
+
+        Args:
+            key: Clave de la entrada (tupla)
+            fetch: Función sin argumentos que devuelve una corrutina con (status_code, response)
+            ttl: Tiempo de vida de las respuestas correctas en segundos
+
+        Returns:
+            tuple: (status_code, response)
+        """
+        entry = CacheService._entries.get(key)
+        if entry is not None:
+            expires_at, status_code, response = entry
+            if expires_at > time.monotonic():
+                CacheService._entries.move_to_end(key)
+                return status_code, copy.deepcopy(response)
+            del CacheService._entries[key]
+
+        status_code, response = await fetch()
+
+        if status_code == 200:
+            CacheService.set(key, status_code, response, ttl)
+        elif status_code == 404:
+            CacheService.set(key, status_code, response, CACHE_NEGATIVE_TTL)
+
+        return status_code, response
+
+    @staticmethod
+    def set(key, status_code, response, ttl):
+        """Guarda una respuesta en la caché."""
+        CacheService._entries[key] = (time.monotonic() + ttl, status_code, copy.deepcopy(response))
+        CacheService._entries.move_to_end(key)
+        while len(CacheService._entries) > CACHE_MAX_ENTRIES:
+            CacheService._entries.popitem(last=False)
+
+    @staticmethod
+    def invalidate(*prefix):
+        """Elimina las entradas cuya clave empieza por `prefix`.
+
+        Ejemplos:
+            CacheService.invalidate("member", telegram_id)
+            CacheService.invalidate("family", family_id)
+            CacheService.invalidate("member")
+        """
+        size = len(prefix)
+        for key in [k for k in CacheService._entries if k[:size] == prefix]:
+            del CacheService._entries[key]
+
+    @staticmethod
+    def clear():
+        """Vacía la caché."""
+        CacheService._entries.clear()
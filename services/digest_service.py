@@ -0,0 +1,143 @@
+import datetime
+import logging
+import time
+import config
+from telegram.constants import ParseMode
+from telegram.helpers import escape_markdown
+from services.family_service import FamilyService
+from ui.messages import Messages
+from utils.metrics import Metrics
+from utils.rate_limited_sender import RateLimitedSender
+
+logger = logging.getLogger(__name__)
+
+# Hora del resumen ("HH:MM"; None para no enviarlo), días de la semana
+# (0 = domingo, como en JobQueue.run_daily) y zona horaria
+DIGEST_TIME = getattr(config, "DIGEST_TIME", "09:00")
+DIGEST_DAYS = tuple(getattr(config, "DIGEST_DAYS", (1,)))
+DIGEST_TIMEZONE = getattr(config, "DIGEST_TIMEZONE", "UTC")
+
+# Días de actividad que resume cada mensaje
+DIGEST_PERIOD_DAYS = getattr(config, "DIGEST_PERIOD_DAYS", 7)
+
+# Familias por solicitud a GET /families/balances (máximo 500)
+DIGEST_PAGE_SIZE = getattr(config, "DIGEST_PAGE_SIZE", 200)
+
+# Mensajes por segundo (Telegram admite unos 30 por bot)
+DIGEST_MESSAGES_PER_SECOND = getattr(config, "DIGEST_MESSAGES_PER_SECOND", 25)
+
+# Balances por debajo de este valor se consideran saldados
+BALANCE_EPSILON = 0.005
+
+class DigestService:
+    """Resumen periódico de los balances, enviado a todos los miembros.
+
+    El trabajo recorre las familias por páginas con GET /families/balances,
+    que calcula los balances de cada página en una sola pasada, y pone los
+    mensajes en un RateLimitedSender. Como la cola está acotada, la página
+    siguiente no se pide hasta que la anterior se ha enviado casi entera:
+    la memoria usada no depende del número de familias.
+    """
+
+    @staticmethod
+    def schedule(application):
+        """Programa el resumen en el JobQueue de la aplicación.
+
+        Returns:
+            Job: El trabajo programado, o None si está desactivado
+        """
+        if not DIGEST_TIME:
+            return None
+        if application.job_queue is None:
+            logger.warning(
+                "El resumen semanal necesita JobQueue: instala python-telegram-bot[job-queue]"
+            )
+            return None
+
+        from zoneinfo import ZoneInfo
+        hour, minute = (int(part) for part in DIGEST_TIME.split(":"))
+        at = datetime.time(hour, minute, tzinfo=ZoneInfo(DIGEST_TIMEZONE))
+        logger.info("Resumen de balances programado a las %s (%s), días %s", DIGEST_TIME, DIGEST_TIMEZONE, DIGEST_DAYS)
+        return application.job_queue.run_daily(
+            DigestService.send_digests, at, days=DIGEST_DAYS, name="family_digest",
+            job_kwargs={"misfire_grace_time": 3600, "coalesce": True}
+        )
+
+    @staticmethod
+    async def send_digests(context):
+        """Envía el resumen a los miembros de todas las familias.
+
+        Es el callback del trabajo; también puede llamarse directamente con
+        cualquier objeto que tenga `bot`.
+
+        Returns:
+            dict: Familias recorridas y mensajes enviados y fallidos
+        """
+        start = time.perf_counter()
+        since = datetime.datetime.now(datetime.timezone.utc) - datetime.timedelta(days=DIGEST_PERIOD_DAYS)
+        sender = RateLimitedSender(
+            context.bot, rate=DIGEST_MESSAGES_PER_SECOND, max_queue=DIGEST_PAGE_SIZE, name="digest"
+        )
+        await sender.start()
+
+        families = 0
+        after = None
+        try:
+            while True:
+                status_code, response = await FamilyService.get_families_balances(after, DIGEST_PAGE_SIZE, since)
+                if status_code != 200 or not isinstance(response, dict):
+                    logger.error("No se pudieron obtener los balances después de %s: %s %s", after, status_code, response)
+                    break
+                for family in response.get("families", []):
+                    families += 1
+                    for chat_id, text in DigestService.build_messages(family):
+                        await sender.put(chat_id, text, parse_mode=ParseMode.MARKDOWN)
+                after = response.get("next_after")
+                if not after:
+                    break
+        finally:
+            await sender.close()
+
+        elapsed = time.perf_counter() - start
+        Metrics.observe("digest_seconds", elapsed)
+        logger.info(
+            "Resumen de balances: %s familias, %s mensajes enviados, %s fallidos en %.1f s",
+            families, sender.sent, sender.failed, elapsed
+        )
+        return {"families": families, "sent": sender.sent, "failed": sender.failed}
+
+    @staticmethod
+    def build_messages(family):
+        """Crea el mensaje de cada miembro de una familia.
+
+        Las familias sin gastos en el periodo y con todo saldado no reciben
+        resumen.
+
+        Args:
+            family: Familia de GET /families/balances
+
+        Returns:
+            list: Pares (chat_id, texto)
+        """
+        members = [member for member in family.get("members", []) if member.get("telegram_id")]
+        settled = all(abs(member["net_balance"]) < BALANCE_EPSILON for member in members)
+        if not members or (settled and not family.get("expenses_count")):
+            return []
+
+        header = Messages.DIGEST_HEADER.format(
+            family_name=escape_markdown(family.get("name") or ""),
+            days=DIGEST_PERIOD_DAYS,
+            count=family.get("expenses_count", 0),
+            total=family.get("expenses_total", 0.0)
+        )
+        messages = []
+        for member in members:
+            balance = member["net_balance"]
+            if balance >= BALANCE_EPSILON:
+                line = Messages.DIGEST_OWED.format(amount=balance)
+            elif balance <= -BALANCE_EPSILON:
+                line = Messages.DIGEST_OWES.format(amount=-balance)
+            else:
+                line = Messages.DIGEST_SETTLED
+            messages.append((member["telegram_id"], header + line + Messages.DIGEST_FOOTER))
+        return messages
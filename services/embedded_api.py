@@ -0,0 +1,268 @@
+import asyncio
+import importlib
+import logging
+import os
+import re
+import sys
+import threading
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
+import config
+
+logger = logging.getLogger(__name__)
+
+# Carpeta con el código de la API (api/app)
+EMBEDDED_API_PATH = getattr(config, "EMBEDDED_API_PATH", None) or os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "api", "app"
+)
+
+# Base de datos de la API; si es None se usa la configuración de la propia API
+# (variable de entorno SQLALCHEMY_DATABASE_URL o su archivo .env)
+EMBEDDED_DATABASE_URL = getattr(config, "EMBEDDED_DATABASE_URL", None)
+
+# Hilos que ejecutan las consultas a la base de datos
+EMBEDDED_DB_WORKERS = getattr(config, "EMBEDDED_DB_WORKERS", 8)
+
+# Módulos que existen con el mismo nombre en el bot y en la API
+_SHARED_MODULES = ("services", "main")
+
+class EmbeddedApi:
+    """Ejecuta las solicitudes del bot directamente sobre la capa de servicios de la API.
+
+    En modo embebido (API_MODE = "embedded") el bot y la API comparten
+    proceso: en lugar de enviar la solicitud por HTTP, ApiService la pasa a
+    esta clase, que llama a las mismas funciones de los routers de la API
+    (con sus comprobaciones de permisos y sus FamilyService, ExpenseService,
+    PaymentService y BalanceService) usando las fábricas de sesiones de la
+    API. El resultado se devuelve como (status_code, response) con el mismo
+    contenido que tendría la respuesta JSON, así que los servicios y
+    manejadores del bot no cambian.
+
+    Las consultas son síncronas (SQLAlchemy), por lo que se ejecutan en un
+    pool de EMBEDDED_DB_WORKERS hilos para no bloquear el bucle de eventos.
+    """
+
+    _api = None
+    _routes = None
+    _executor = None
+    _lock = threading.Lock()
+
+    @staticmethod
+    @contextmanager
+    def api_context():
+        """Permite importar módulos de la API sin afectar a los del bot.
+
+        El bot y la API tienen cada uno un paquete `services` y un módulo
+        `main`, así que dentro de este bloque los módulos de la API se
+        importan con sus propios nombres y al salir se restauran los del
+        bot; los módulos de la API conservan las referencias a sus servicios.
+        """
+        def shared(name):
+            return any(name == prefix or name.startswith(prefix + ".") for prefix in _SHARED_MODULES)
+
+        bot_modules = {name: module for name, module in sys.modules.items() if shared(name)}
+        for name in bot_modules:
+            del sys.modules[name]
+        sys.path.insert(0, EMBEDDED_API_PATH)
+        try:
+            yield
+        finally:
+            sys.path.remove(EMBEDDED_API_PATH)
+            for name in [name for name in sys.modules if shared(name)]:
+                del sys.modules[name]
+            sys.modules.update(bot_modules)
+
+    @staticmethod
+    def import_modules(*names, init_db=False):
+        """Importa módulos de la API (ver `api_context`).
+
+        Args:
+            names: Módulos a importar, por ejemplo "models.database"
+            init_db: Si es True, crea además las tablas que falten
+
+        Returns:
+            dict: Módulos importados por nombre
+        """
+        with EmbeddedApi.api_context():
+            modules = {name: importlib.import_module(name) for name in names}
+            if init_db:
+                importlib.import_module("models.database").init_db()
+            return modules
+
+    @staticmethod
+    def load():
+        """Importa los módulos de la API y prepara la base de datos.
+
+        Conviene llamarlo al arrancar el bot, antes de atender
+        actualizaciones; si no, se llama en la primera solicitud.
+        """
+        with EmbeddedApi._lock:
+            if EmbeddedApi._api is not None:
+                return EmbeddedApi._api
+
+            if EMBEDDED_DATABASE_URL:
+                os.environ["SQLALCHEMY_DATABASE_URL"] = EMBEDDED_DATABASE_URL
+
+            api = EmbeddedApi.import_modules(
+                "models.database", "models.schemas",
+                "routers.families", "routers.members", "routers.expenses", "routers.payments",
+                init_db=True
+            )
+
+            EmbeddedApi._routes = EmbeddedApi._build_routes(api)
+            EmbeddedApi._api = api
+            logger.info("API embebida cargada desde %s", EMBEDDED_API_PATH)
+            return api
+
+    @staticmethod
+    def _build_routes(api):
+        """Tabla (método, patrón de ruta, función, esquema de respuesta, status de éxito, escribe).
+
+        Cada función recibe (db, args, data, params, headers) y llama a la función del
+        router correspondiente con los mismos argumentos que le pasaría FastAPI.
+        Las rutas que escriben usan la sesión principal y el resto la de
+        lectura, igual que get_db y get_read_db en la API.
+        """
+        from starlette.responses import Response
+
+        schemas = api["models.schemas"]
+        families = api["routers.families"]
+        members = api["routers.members"]
+        expenses = api["routers.expenses"]
+        payments = api["routers.payments"]
+
+        routes = [
+            ("GET", r"/members/id/(\d+)", lambda db, a, d, p, h: members.get_member_by_id(int(a[0]), p.get("telegram_id"), db), schemas.Member, 200, False),
+            ("GET", r"/members/([^/]+)", lambda db, a, d, p, h: members.get_member_by_telegram_id(a[0], db), schemas.Member, 200, False),
+            ("PUT", r"/members/(\d+)", lambda db, a, d, p, h: members.update_member(int(a[0]), schemas.MemberUpdate(**d), p.get("telegram_id"), db), schemas.Member, 200, True),
+
+            ("POST", r"/families/?", lambda db, a, d, p, h: families.create_family(schemas.FamilyCreate(**d), db), schemas.Family, 201, True),
+            ("GET", r"/families/balances", lambda db, a, d, p, h: families.get_families_balances(*EmbeddedApi._balances_page(p, schemas.MAX_BALANCES_PAGE), db), schemas.FamilyBalancesPage, 200, False),
+            ("GET", r"/families/([^/]+)/members", lambda db, a, d, p, h: families.get_family_members(a[0], p.get("telegram_id"), db), schemas.Member, 200, False),
+            ("POST", r"/families/([^/]+)/members", lambda db, a, d, p, h: families.add_member_to_family(a[0], schemas.MemberCreate(**d), p.get("telegram_id"), db), schemas.Member, 201, True),
+            ("GET", r"/families/([^/]+)/balances", lambda db, a, d, p, h: families.get_family_balances(a[0], p.get("telegram_id"), db), None, 200, False),
+            ("GET", r"/families/([^/]+)", lambda db, a, d, p, h: families.get_family(a[0], p.get("telegram_id"), db), schemas.Family, 200, False),
+
+            ("POST", r"/expenses/?", lambda db, a, d, p, h: expenses.create_expense(schemas.ExpenseCreate(**d), p.get("telegram_id"), h.get("Idempotency-Key"), db), schemas.Expense, 201, True),
+            ("POST", r"/expenses/bulk", lambda db, a, d, p, h: expenses.create_expenses(schemas.ExpenseBulkCreate(**d), p.get("telegram_id"), h.get("Idempotency-Key"), db), schemas.Expense, 201, True),
+            ("GET", r"/expenses/family/([^/]+)", lambda db, a, d, p, h: expenses.get_family_expenses(a[0], p.get("telegram_id"), *EmbeddedApi._page(p), db), schemas.Expense, 200, False),
+            ("GET", r"/expenses/([^/]+)", lambda db, a, d, p, h: expenses.get_expense(a[0], Response(), p.get("telegram_id"), db), schemas.Expense, 200, False),
+            ("PUT", r"/expenses/([^/]+)", lambda db, a, d, p, h: expenses.update_expense(a[0], schemas.ExpenseUpdate(**d), Response(), p.get("telegram_id"), h.get("If-Match"), db), schemas.Expense, 200, True),
+            ("DELETE", r"/expenses/([^/]+)", lambda db, a, d, p, h: expenses.delete_expense(a[0], p.get("telegram_id"), db), schemas.Expense, 200, True),
+
+            ("POST", r"/payments/?", lambda db, a, d, p, h: payments.create_payment(schemas.PaymentCreate(**d), p.get("telegram_id"), h.get("Idempotency-Key"), db), schemas.Payment, 201, True),
+            ("GET", r"/payments/family/([^/]+)", lambda db, a, d, p, h: payments.get_family_payments(a[0], p.get("telegram_id"), *EmbeddedApi._page(p), db), schemas.Payment, 200, False),
+            ("GET", r"/payments/([^/]+)", lambda db, a, d, p, h: payments.get_payment(a[0], p.get("telegram_id"), db), schemas.Payment, 200, False),
+            ("DELETE", r"/payments/([^/]+)", lambda db, a, d, p, h: payments.delete_payment(a[0], p.get("telegram_id"), db), schemas.Payment, 200, True),
+        ]
+        return [
+            (method, re.compile(pattern + "$"), func, schema, success_status, writes)
+            for method, pattern, func, schema, success_status, writes in routes
+        ]
+
+    @staticmethod
+    def _page(params):
+        """Lee offset y limit con las mismas restricciones que la API."""
+        from fastapi import HTTPException
+
+        try:
+            offset = int(params.get("offset", 0))
+            limit = params.get("limit")
+            limit = int(limit) if limit is not None else None
+        except (TypeError, ValueError):
+            raise HTTPException(status_code=422, detail="offset y limit deben ser enteros")
+        if offset < 0 or (limit is not None and not 1 <= limit <= 100):
+            raise HTTPException(status_code=422, detail="offset debe ser >= 0 y limit estar entre 1 y 100")
+        return offset, limit
+
+    @staticmethod
+    def _balances_page(params, maximum):
+        """Lee after, limit y since de GET /families/balances con las mismas restricciones que la API."""
+        from datetime import datetime
+        from fastapi import HTTPException
+
+        try:
+            limit = int(params.get("limit", 100))
+            since = params.get("since")
+            since = datetime.fromisoformat(since) if since else None
+        except (TypeError, ValueError):
+            raise HTTPException(status_code=422, detail="limit debe ser un entero y since una fecha ISO 8601")
+        if not 1 <= limit <= maximum:
+            raise HTTPException(status_code=422, detail=f"limit debe estar entre 1 y {maximum}")
+        return params.get("after"), limit, since
+
+    @staticmethod
+    def _serialize(schema, result):
+        """Convierte el resultado al mismo contenido que tendría la respuesta JSON."""
+        from fastapi.encoders import jsonable_encoder
+
+        if schema is None:
+            return jsonable_encoder(result)
+        validate = getattr(schema, "model_validate", None) or schema.from_orm
+        if isinstance(result, list):
+            return [jsonable_encoder(validate(item)) for item in result]
+        return jsonable_encoder(validate(result))
+
+    @staticmethod
+    def _call(method, endpoint, data, params, headers):
+        """Ejecuta una solicitud en el hilo actual (dentro del pool)."""
+        from fastapi import HTTPException
+        from fastapi.encoders import jsonable_encoder
+        from pydantic import ValidationError
+
+        api = EmbeddedApi.load()
+        path = endpoint.split("?", 1)[0]
+        for route_method, pattern, func, schema, success_status, writes in EmbeddedApi._routes:
+            if route_method != method:
+                continue
+            match = pattern.match(path)
+            if not match:
+                continue
+
+            database = api["models.database"]
+            db = database.SessionLocal() if writes else database.ReadSessionLocal()
+            try:
+                result = func(db, match.groups(), data or {}, params, headers)
+                # Serializar dentro de la sesión: las relaciones se cargan al leerlas
+                return success_status, EmbeddedApi._serialize(schema, result)
+            except HTTPException as e:
+                return e.status_code, {"detail": e.detail}
+            except ValidationError as e:
+                return 422, {"detail": jsonable_encoder(e.errors())}
+            except Exception as e:
+                logger.exception("Error en la API embebida (%s %s): %s", method, path, e)
+                return 500, {"detail": "Internal Server Error"}
+            finally:
+                db.close()
+
+        return 404, {"detail": "Not Found"}
+
+    @staticmethod
+    async def request(method, endpoint, data=None, params=None, headers=None):
+        """Ejecuta una solicitud sin pasar por HTTP.
+
+        Args:
+            method: Método HTTP (GET, POST, PUT, DELETE)
+            endpoint: Endpoint de la API
+            data: Cuerpo de la solicitud (opcional)
+            params: Parámetros de consulta (opcional)
+            headers: Cabeceras de la solicitud (opcional)
+
+        Returns:
+            tuple: (status_code, response_data)
+        """
+        if EmbeddedApi._executor is None:
+            EmbeddedApi._executor = ThreadPoolExecutor(
+                max_workers=EMBEDDED_DB_WORKERS, thread_name_prefix="embedded-api"
+            )
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            EmbeddedApi._executor, EmbeddedApi._call, method, endpoint, data, params or {}, headers or {}
+        )
+
+    @staticmethod
+    def shutdown():
+        """Cierra el pool de hilos al apagar el bot."""
+        if EmbeddedApi._executor is not None:
+            EmbeddedApi._executor.shutdown(wait=True)
+            EmbeddedApi._executor = None
@@ -1,11 +1,13 @@
+import logging
 from services.api_service import ApiService
-import traceback
+
+logger = logging.getLogger(__name__)
 
 class ExpenseService:
     """Servicio para interactuar con gastos."""
     
     @staticmethod
-    def create_expense(description, amount, paid_by, telegram_id=None):
+    async def create_expense(description, amount, paid_by, telegram_id=None, idempotency_key=None):
         """Crea un nuevo gasto.
         
         Args:
@@ -13,57 +15,87 @@ class ExpenseService:
             amount: Monto del gasto
             paid_by: ID del miembro que pagó
             telegram_id: ID de Telegram del usuario que crea el gasto (opcional)
+            idempotency_key: Clave para que la API no duplique el gasto si
+                la solicitud se repite (opcional)
             
         Returns:
             tuple: (status_code, response)
         """
         try:
-            print(f"Creando gasto: description={description}, amount={amount}, paid_by={paid_by}, telegram_id={telegram_id}")
+            logger.debug("Creando gasto: description=%s, amount=%s, paid_by=%s, telegram_id=%s", description, amount, paid_by, telegram_id)
             data = {
                 "description": description,
                 "amount": amount,
                 "paid_by": paid_by
             }
-            status_code, response = ApiService.request("POST", "/expenses", data, token=telegram_id, check_status=False)
-            print(f"Resultado de create_expense: status_code={status_code}, response={response}")
+            headers = {"Idempotency-Key": idempotency_key} if idempotency_key else None
+            status_code, response = await ApiService.request("POST", "/expenses/", data, token=telegram_id, check_status=False, headers=headers)
+            logger.debug("Resultado de create_expense: status_code=%s, response=%s", status_code, response)
             
             # Verificar si la respuesta es válida
             if status_code in [200, 201] and response:
-                print(f"Gasto creado exitosamente: {response}")
+                logger.debug("Gasto creado exitosamente: %s", response)
                 return status_code, response
             else:
-                print(f"Error al crear gasto: status_code={status_code}, response={response}")
+                logger.error("Error al crear gasto: status_code=%s, response=%s", status_code, response)
                 return status_code, response
         except Exception as e:
-            print(f"Excepción en create_expense: {str(e)}")
-            traceback.print_exc()
+            logger.exception("Excepción en create_expense: %s", e)
             return 500, {"error": f"Error al crear gasto: {str(e)}"}
     
     @staticmethod
-    def get_family_expenses(family_id, telegram_id=None):
+    async def create_expenses(expenses, telegram_id=None, idempotency_key=None):
+        """Crea varios gastos de una familia con una sola solicitud.
+        
+        La API los crea en una sola transacción: o se registran todos o
+        ninguno.
+        
+        Args:
+            expenses: Lista de dicts con description, amount y paid_by
+            telegram_id: ID de Telegram del usuario que crea los gastos (opcional)
+            idempotency_key: Clave para que la API no duplique los gastos si
+                la solicitud se repite (opcional)
+            
+        Returns:
+            tuple: (status_code, response) con la lista de gastos creados
+        """
+        logger.debug("Creando %s gastos, telegram_id=%s", len(expenses), telegram_id)
+        headers = {"Idempotency-Key": idempotency_key} if idempotency_key else None
+        status_code, response = await ApiService.request(
+            "POST", "/expenses/bulk", {"expenses": expenses}, token=telegram_id, check_status=False, headers=headers
+        )
+        if status_code not in [200, 201]:
+            logger.error("Error al crear gastos: status_code=%s, response=%s", status_code, response)
+        return status_code, response
+    
+    @staticmethod
+    async def get_family_expenses(family_id, telegram_id=None, offset=0, limit=None):
         """Obtiene los gastos de una familia.
         
         Args:
             family_id: ID de la familia (UUID como string) 
             telegram_id: ID de Telegram del usuario (opcional)
+            offset: Gastos a omitir (opcional)
+            limit: Tamaño de página; si es None se obtienen todos
             
         Returns:
             tuple: (status_code, response)
         """
-        print(f"Obteniendo gastos para la familia con ID: {family_id}, telegram_id: {telegram_id}")
+        logger.debug("Obteniendo gastos para la familia con ID: %s, telegram_id: %s", family_id, telegram_id)
         
         # Verificar que family_id sea un valor válido
         if not family_id:
-            print("Error: family_id es None o vacío")
+            logger.error("Error: family_id es None o vacío")
             return 400, {"error": "ID de familia no válido"}
         
         # Ya no necesitamos convertir family_id a entero, ahora es un UUID como string
         
         # Llamar a la API con el ID de Telegram si está disponible
-        return ApiService.request("GET", f"/expenses/family/{family_id}", token=telegram_id, check_status=False)
+        params = {"offset": offset, "limit": limit} if limit else None
+        return await ApiService.request("GET", f"/expenses/family/{family_id}", token=telegram_id, check_status=False, params=params)
     
     @staticmethod
-    def get_expense(expense_id):
+    async def get_expense(expense_id):
         """Obtiene información de un gasto.
         
         Args:
@@ -72,10 +104,10 @@ class ExpenseService:
         Returns:
             tuple: (status_code, response)
         """
-        return ApiService.request("GET", f"/expenses/{expense_id}", check_status=False)
+        return await ApiService.request("GET", f"/expenses/{expense_id}", check_status=False)
     
     @staticmethod
-    def update_expense(expense_id, data, telegram_id=None):
+    async def update_expense(expense_id, data, telegram_id=None):
         """Actualiza un gasto existente.
         
         Args:
@@ -87,23 +119,22 @@ class ExpenseService:
             tuple: (status_code, response)
         """
         try:
-            print(f"Actualizando gasto con ID: {expense_id}, datos: {data}, telegram_id: {telegram_id}")
+            logger.debug("Actualizando gasto con ID: %s, datos: %s, telegram_id: %s", expense_id, data, telegram_id)
             
             # Usar el endpoint PUT para actualizar el gasto
-            status_code, response = ApiService.request("PUT", f"/expenses/{expense_id}", data, token=telegram_id, check_status=False)
-            print(f"Resultado de update_expense: status_code={status_code}, response={response}")
+            status_code, response = await ApiService.request("PUT", f"/expenses/{expense_id}", data, token=telegram_id, check_status=False)
+            logger.debug("Resultado de update_expense: status_code=%s, response=%s", status_code, response)
             
             if status_code >= 400:
-                print(f"Error al actualizar gasto: status_code={status_code}, response={response}")
+                logger.error("Error al actualizar gasto: status_code=%s, response=%s", status_code, response)
             
             return status_code, response
         except Exception as e:
-            print(f"Excepción en update_expense: {str(e)}")
-            traceback.print_exc()
+            logger.exception("Excepción en update_expense: %s", e)
             return 500, {"error": f"Error al actualizar gasto: {str(e)}"}
     
     @staticmethod
-    def delete_expense(expense_id):
+    async def delete_expense(expense_id):
         """Elimina un gasto.
         
         Args:
@@ -112,4 +143,4 @@ class ExpenseService:
         Returns:
             tuple: (status_code, response)
         """
-        return ApiService.request("DELETE", f"/expenses/{expense_id}", check_status=False) 
\ No newline at end of file
+        return await ApiService.request("DELETE", f"/expenses/{expense_id}", check_status=False) 
\ No newline at end of file
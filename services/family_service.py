@@ -1,11 +1,14 @@
+import logging
 from services.api_service import ApiService
-import traceback
+from services.cache_service import CacheService, CACHE_FAMILY_TTL
+
+logger = logging.getLogger(__name__)
 
 class FamilyService:
     """Servicio para interactuar con familias."""
     
     @staticmethod
-    def create_family(name, members, token=None):
+    async def create_family(name, members, token=None):
         """Crea una nueva familia.
         
         Args:
@@ -16,19 +19,24 @@ class FamilyService:
         Returns:
             tuple: (status_code, response)
         """
-        print(f"Creando familia con nombre '{name}' y miembros: {members}")
+        logger.debug("Creando familia con nombre '%s' y miembros: %s", name, members)
         data = {
             "name": name,
             "members": members
         }
-        status_code, response = ApiService.request("POST", "/families/", data, token=token, check_status=False)
-        print(f"Respuesta de create_family: status_code={status_code}, response={response}")
+        status_code, response = await ApiService.request("POST", "/families/", data, token=token, check_status=False)
+        # Los miembros dejan de ser usuarios desconocidos
+        for member in members:
+            CacheService.invalidate("member", str(member.get("telegram_id")))
+        logger.debug("Respuesta de create_family: status_code=%s, response=%s", status_code, response)
         return status_code, response
     
     @staticmethod
-    def get_family(family_id, token=None):
+    async def get_family(family_id, token=None):
         """Obtiene información de una familia.
         
+        La respuesta se cachea durante CACHE_FAMILY_TTL segundos.
+        
         Args:
             family_id: ID de la familia
             token: Token de autenticación (opcional)
@@ -36,13 +44,17 @@ class FamilyService:
         Returns:
             tuple: (status_code, response)
         """
-        print(f"Obteniendo información de la familia con ID: {family_id}")
-        status_code, response = ApiService.request("GET", f"/families/{family_id}", token=token, check_status=False)
-        print(f"Respuesta de get_family: status_code={status_code}, response={response}")
+        logger.debug("Obteniendo información de la familia con ID: %s", family_id)
+        status_code, response = await CacheService.get_or_fetch(
+            ("family", str(family_id), token),
+            lambda: ApiService.request("GET", f"/families/{family_id}", token=token, check_status=False),
+            CACHE_FAMILY_TTL
+        )
+        logger.debug("Respuesta de get_family: status_code=%s, response=%s", status_code, response)
         return status_code, response
     
     @staticmethod
-    def get_family_members(family_id, token=None):
+    async def get_family_members(family_id, token=None):
         """Obtiene los miembros de una familia.
         
         Args:
@@ -52,13 +64,13 @@ class FamilyService:
         Returns:
             tuple: (status_code, response)
         """
-        print(f"Obteniendo miembros de la familia con ID: {family_id}")
-        status_code, response = ApiService.request("GET", f"/families/{family_id}/members", token=token, check_status=False)
-        print(f"Respuesta de get_family_members: status_code={status_code}, response={response}")
+        logger.debug("Obteniendo miembros de la familia con ID: %s", family_id)
+        status_code, response = await ApiService.request("GET", f"/families/{family_id}/members", token=token, check_status=False)
+        logger.debug("Respuesta de get_family_members: status_code=%s, response=%s", status_code, response)
         return status_code, response
     
     @staticmethod
-    def add_member_to_family(family_id, telegram_id, name, token=None):
+    async def add_member_to_family(family_id, telegram_id, name, token=None):
         """Añade un miembro a una familia.
         
         Args:
@@ -70,17 +82,19 @@ class FamilyService:
         Returns:
             tuple: (status_code, response)
         """
-        print(f"Añadiendo miembro a la familia {family_id}: telegram_id={telegram_id}, name={name}")
+        logger.debug("Añadiendo miembro a la familia %s: telegram_id=%s, name=%s", family_id, telegram_id, name)
         data = {
             "telegram_id": telegram_id,
             "name": name
         }
-        status_code, response = ApiService.request("POST", f"/families/{family_id}/members", data, token=token, check_status=False)
-        print(f"Respuesta de add_member_to_family: status_code={status_code}, response={response}")
+        status_code, response = await ApiService.request("POST", f"/families/{family_id}/members", data, token=token, check_status=False)
+        CacheService.invalidate("member", str(telegram_id))
+        CacheService.invalidate("family", str(family_id))
+        logger.debug("Respuesta de add_member_to_family: status_code=%s, response=%s", status_code, response)
         return status_code, response
     
     @staticmethod
-    def get_family_balances(family_id, token=None):
+    async def get_family_balances(family_id, token=None):
         """Obtiene los balances de una familia.
         
         Args:
@@ -91,22 +105,44 @@ class FamilyService:
             tuple: (status_code, response)
         """
         try:
-            print(f"Solicitando balances para la familia {family_id}")
-            status_code, response = ApiService.request("GET", f"/families/{family_id}/balances", token=token, check_status=False)
-            print(f"Respuesta de get_family_balances: status_code={status_code}, response={response}")
+            logger.debug("Solicitando balances para la familia %s", family_id)
+            status_code, response = await ApiService.request("GET", f"/families/{family_id}/balances", token=token, check_status=False)
+            logger.debug("Respuesta de get_family_balances: status_code=%s, response=%s", status_code, response)
             
             # Verificar si la respuesta es válida
             if status_code >= 400:
-                print(f"Error al obtener balances: status_code={status_code}, response={response}")
+                logger.error("Error al obtener balances: status_code=%s, response=%s", status_code, response)
                 return status_code, response
                 
             # Verificar si la respuesta es una lista o un diccionario
             if not isinstance(response, list) and not isinstance(response, dict):
-                print(f"Respuesta de balances no es una lista ni un diccionario: {response}")
+                logger.warning("Respuesta de balances no es una lista ni un diccionario: %s", response)
                 return status_code, []
                 
             return status_code, response
         except Exception as e:
-            print(f"Error en get_family_balances: {str(e)}")
-            traceback.print_exc()
-            return 500, {"error": f"Error al obtener balances: {str(e)}"} 
\ No newline at end of file
+            logger.exception("Error en get_family_balances: %s", e)
+            return 500, {"error": f"Error al obtener balances: {str(e)}"}
+    
+    @staticmethod
+    async def get_families_balances(after=None, limit=100, since=None, token=None):
+        """Obtiene los balances resumidos de una página de familias.
+        
+        Args:
+            after: ID de la última familia de la página anterior (None para la primera)
+            limit: Familias por página (máximo 500)
+            since: datetime desde el que contar los gastos de cada familia (opcional)
+            token: Token de autenticación (opcional)
+            
+        Returns:
+            tuple: (status_code, response), con response
+                {"families": [...], "next_after": ...}
+        """
+        params = {"limit": limit}
+        if after:
+            params["after"] = after
+        if since is not None:
+            params["since"] = since.isoformat()
+        logger.debug("Solicitando balances de familias después de %s", after)
+        return await ApiService.request("GET", "/families/balances", token=token, check_status=False, params=params)
+
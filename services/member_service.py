@@ -1,12 +1,19 @@
+import logging
 from services.api_service import ApiService
+from services.cache_service import CacheService, CACHE_MEMBER_TTL
+
+logger = logging.getLogger(__name__)
 
 class MemberService:
     """Servicio para interactuar con miembros."""
     
     @staticmethod
-    def get_member(telegram_id, token=None):
+    async def get_member(telegram_id, token=None):
         """Obtiene información de un miembro por su ID de Telegram.
         
+        La respuesta se cachea durante CACHE_MEMBER_TTL segundos; si el
+        usuario no existe, el 404 también se cachea durante un tiempo menor.
+        
         Args:
             telegram_id: ID de Telegram del miembro
             token: Token de autenticación (opcional)
@@ -14,13 +21,17 @@ class MemberService:
         Returns:
             tuple: (status_code, response)
         """
-        print(f"Obteniendo información del miembro con telegram_id: {telegram_id}")
-        status_code, response = ApiService.request("GET", f"/members/{telegram_id}", token=token, check_status=False)
-        print(f"Respuesta de get_member: status_code={status_code}, response={response}")
+        logger.debug("Obteniendo información del miembro con telegram_id: %s", telegram_id)
+        status_code, response = await CacheService.get_or_fetch(
+            ("member", str(telegram_id), token),
+            lambda: ApiService.request("GET", f"/members/{telegram_id}", token=token, check_status=False),
+            CACHE_MEMBER_TTL
+        )
+        logger.debug("Respuesta de get_member: status_code=%s, response=%s", status_code, response)
         return status_code, response
     
     @staticmethod
-    def get_member_by_id(member_id, token=None):
+    async def get_member_by_id(member_id, token=None):
         """Obtiene información de un miembro por su ID.
         
         Args:
@@ -30,13 +41,13 @@ class MemberService:
         Returns:
             tuple: (status_code, response)
         """
-        print(f"Obteniendo información del miembro con ID: {member_id}")
-        status_code, response = ApiService.request("GET", f"/members/id/{member_id}", token=token, check_status=False)
-        print(f"Respuesta de get_member_by_id: status_code={status_code}, response={response}")
+        logger.debug("Obteniendo información del miembro con ID: %s", member_id)
+        status_code, response = await ApiService.request("GET", f"/members/id/{member_id}", token=token, check_status=False)
+        logger.debug("Respuesta de get_member_by_id: status_code=%s, response=%s", status_code, response)
         return status_code, response
     
     @staticmethod
-    def update_member(member_id, data, token=None):
+    async def update_member(member_id, data, token=None):
         """Actualiza la información de un miembro.
         
         Args:
@@ -47,7 +58,10 @@ class MemberService:
         Returns:
             tuple: (status_code, response)
         """
-        print(f"Actualizando información del miembro con ID: {member_id}")
-        status_code, response = ApiService.request("PUT", f"/members/{member_id}", data, token=token, check_status=False)
-        print(f"Respuesta de update_member: status_code={status_code}, response={response}")
+        logger.debug("Actualizando información del miembro con ID: %s", member_id)
+        status_code, response = await ApiService.request("PUT", f"/members/{member_id}", data, token=token, check_status=False)
+        # Solo conocemos el ID interno: invalidar todos los miembros y familias
+        CacheService.invalidate("member")
+        CacheService.invalidate("family")
+        logger.debug("Respuesta de update_member: status_code=%s, response=%s", status_code, response)
         return status_code, response 
\ No newline at end of file
@@ -0,0 +1,397 @@
+import asyncio
+import json
+import logging
+import random
+import sqlite3
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+import config
+from services.expense_service import ExpenseService
+from services.payment_service import PaymentService
+from ui.messages import Messages
+from utils.metrics import Metrics
+
+logger = logging.getLogger(__name__)
+
+# Archivo SQLite con las creaciones pendientes de enviar a la API (None para
+# desactivar la cola y enviarlas directamente desde el manejador)
+OUTBOX_FILE = getattr(config, "OUTBOX_FILE", "bot_outbox.sqlite3")
+
+# Familias cuyas creaciones se envían a la vez
+OUTBOX_CONCURRENCY = getattr(config, "OUTBOX_CONCURRENCY", 4)
+
+# Segundos que el manejador espera el envío antes de responder que la
+# operación queda pendiente
+OUTBOX_ACK_TIMEOUT = getattr(config, "OUTBOX_ACK_TIMEOUT", 2.0)
+
+# Espera entre reintentos: exponencial desde OUTBOX_RETRY_BASE con jitter,
+# limitada a OUTBOX_RETRY_MAX_DELAY segundos
+OUTBOX_RETRY_BASE = getattr(config, "OUTBOX_RETRY_BASE", 1.0)
+OUTBOX_RETRY_MAX_DELAY = getattr(config, "OUTBOX_RETRY_MAX_DELAY", 300.0)
+
+# Segundos tras los que se abandona una creación que no se ha podido enviar
+OUTBOX_MAX_AGE = getattr(config, "OUTBOX_MAX_AGE", 7 * 24 * 3600)
+
+# Status codes que indican un fallo transitorio (los errores de conexión y
+# timeouts llegan como 503 y 504); con cualquier otro error la creación se
+# descarta, porque repetir la misma solicitud daría el mismo resultado
+RETRY_STATUS_CODES = (408, 429, 502, 503, 504)
+
+PENDING = "pending"
+DONE = "done"
+FAILED = "failed"
+
+class OutboxService:
+    """Cola local y persistente de creaciones de gastos y pagos.
+
+    Los manejadores guardan la creación en un archivo SQLite y responden al
+    usuario sin esperar a la API; una tarea en segundo plano las envía.
+    Así una caída o un reinicio de la API no hace perder lo que el usuario
+    ya confirmó, y la respuesta no depende de lo que tarde la API.
+
+    - Cada creación lleva una clave de idempotencia (cabecera
+      Idempotency-Key), de modo que reenviarla tras un timeout no la duplica.
+    - Las creaciones de una misma familia se envían en el orden en que se
+      guardaron: mientras la primera pendiente no se envía, las siguientes
+      esperan. Las de familias distintas se envían en paralelo (hasta
+      OUTBOX_CONCURRENCY a la vez).
+    - Los errores de conexión, timeouts, 408, 429, 502, 503 y 504 se
+      reintentan con espera exponencial; con cualquier otro error la
+      creación se descarta y se avisa al usuario en su chat.
+
+    Métricas (con la etiqueta kind):
+        outbox_enqueued: Creaciones guardadas en la cola
+        outbox_delivered: Creaciones enviadas a la API
+        outbox_retries: Envíos fallidos que se reintentarán
+        outbox_failed: Creaciones descartadas
+        outbox_pending: Creaciones pendientes (indicador, sin etiqueta)
+        outbox_delay_seconds: Tiempo desde que se guardó hasta que se envió
+    """
+
+    _executor = None
+    _connection = None
+    _wakeup = None
+    _task = None
+    _bot = None
+    _waiters = {}
+
+    @staticmethod
+    def enabled():
+        """Indica si la cola está activada."""
+        return bool(OUTBOX_FILE)
+
+    @staticmethod
+    async def _run(func, *args):
+        # Un solo hilo: la conexión SQLite se usa siempre desde el mismo hilo
+        if OutboxService._executor is None:
+            OutboxService._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="outbox")
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(OutboxService._executor, func, *args)
+
+    @staticmethod
+    def _connect():
+        if OutboxService._connection is None:
+            connection = sqlite3.connect(OUTBOX_FILE)
+            connection.row_factory = sqlite3.Row
+            connection.execute("PRAGMA journal_mode=WAL")
+            # FULL: una creación confirmada al usuario no se pierde si se cae la máquina
+            connection.execute("PRAGMA synchronous=FULL")
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS outbox ("
+                "id INTEGER PRIMARY KEY AUTOINCREMENT, "
+                "kind TEXT NOT NULL, "
+                "family_id TEXT NOT NULL, "
+                "idempotency_key TEXT NOT NULL UNIQUE, "
+                "payload TEXT NOT NULL, "
+                "telegram_id TEXT, "
+                "chat_id INTEGER, "
+                "status TEXT NOT NULL, "
+                "attempts INTEGER NOT NULL DEFAULT 0, "
+                "next_attempt_at REAL NOT NULL, "
+                "last_error TEXT, "
+                "created_at REAL NOT NULL)"
+            )
+            connection.execute(
+                "CREATE INDEX IF NOT EXISTS outbox_pending ON outbox (status, family_id, id)"
+            )
+            connection.commit()
+            OutboxService._connection = connection
+        return OutboxService._connection
+
+    @staticmethod
+    def _insert(kind, family_id, payload, telegram_id, chat_id):
+        connection = OutboxService._connect()
+        now = time.time()
+        cursor = connection.execute(
+            "INSERT INTO outbox (kind, family_id, idempotency_key, payload, telegram_id, chat_id, "
+            "status, next_attempt_at, created_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (kind, family_id, str(uuid.uuid4()), json.dumps(payload), telegram_id, chat_id, PENDING, now, now)
+        )
+        connection.commit()
+        return cursor.lastrowid
+
+    @staticmethod
+    def _due(now, busy, limit):
+        """Primera creación pendiente de cada familia que ya puede enviarse.
+
+        Args:
+            now: Hora actual (time.time())
+            busy: Familias con un envío en curso, que se omiten
+            limit: Máximo de filas
+
+        Returns:
+            list: Filas a enviar
+        """
+        exclude = ""
+        if busy:
+            exclude = f"AND o.family_id NOT IN ({', '.join('?' * len(busy))}) "
+        return [dict(row) for row in OutboxService._connect().execute(
+            "SELECT o.* FROM outbox o WHERE o.status = ? "
+            "AND o.id = (SELECT MIN(id) FROM outbox WHERE status = ? AND family_id = o.family_id) "
+            "AND o.next_attempt_at <= ? " + exclude +
+            "ORDER BY o.next_attempt_at, o.id LIMIT ?",
+            (PENDING, PENDING, now, *busy, limit)
+        ).fetchall()]
+
+    @staticmethod
+    def _next_attempt(busy):
+        """Hora del próximo envío programado de las familias sin envío en curso."""
+        exclude = ""
+        if busy:
+            exclude = f"AND o.family_id NOT IN ({', '.join('?' * len(busy))})"
+        # Solo cuenta la primera pendiente de cada familia: las siguientes esperan a esa
+        row = OutboxService._connect().execute(
+            "SELECT MIN(o.next_attempt_at) FROM outbox o WHERE o.status = ? "
+            "AND o.id = (SELECT MIN(id) FROM outbox WHERE status = ? AND family_id = o.family_id) " + exclude,
+            (PENDING, PENDING, *busy)
+        ).fetchone()
+        return row[0]
+
+    @staticmethod
+    def _update(item_id, status, attempts, next_attempt_at, error):
+        connection = OutboxService._connect()
+        if status == DONE:
+            # Las creaciones enviadas no se conservan; las descartadas sí, para revisarlas
+            connection.execute("DELETE FROM outbox WHERE id = ?", (item_id,))
+        else:
+            connection.execute(
+                "UPDATE outbox SET status = ?, attempts = ?, next_attempt_at = ?, last_error = ? WHERE id = ?",
+                (status, attempts, next_attempt_at, error, item_id)
+            )
+        connection.commit()
+
+    @staticmethod
+    def _count(family_id=None):
+        query = "SELECT COUNT(*) FROM outbox WHERE status = ?"
+        args = (PENDING,)
+        if family_id is not None:
+            query += " AND family_id = ?"
+            args += (str(family_id),)
+        return OutboxService._connect().execute(query, args).fetchone()[0]
+
+    @staticmethod
+    async def enqueue(kind, payload, family_id, telegram_id=None, chat_id=None):
+        """Guarda una creación para enviarla a la API.
+
+        Args:
+            kind: "expense", "expense_bulk" o "payment"
+            payload: Argumentos de ExpenseService.create_expense,
+                ExpenseService.create_expenses o PaymentService.create_payment
+            family_id: Familia a la que pertenece (define el orden de envío)
+            telegram_id: ID de Telegram del usuario que la crea (opcional)
+            chat_id: Chat al que avisar si no se puede registrar (opcional)
+
+        Returns:
+            int: ID de la creación en la cola
+        """
+        item_id = await OutboxService._run(
+            OutboxService._insert, kind, str(family_id), payload,
+            str(telegram_id) if telegram_id else None, chat_id
+        )
+        Metrics.inc("outbox_enqueued", kind=kind)
+        Metrics.add_gauge("outbox_pending", 1)
+        if OutboxService._wakeup is not None:
+            OutboxService._wakeup.set()
+        logger.debug("Creación %s (%s) guardada en la cola para la familia %s", item_id, kind, family_id)
+        return item_id
+
+    @staticmethod
+    async def submit(kind, payload, family_id, telegram_id=None, chat_id=None, timeout=OUTBOX_ACK_TIMEOUT):
+        """Guarda una creación y espera como mucho `timeout` segundos a que se envíe.
+
+        Si en ese tiempo no se ha enviado, el resultado se avisa después en
+        el chat `chat_id`.
+
+        Args:
+            kind, payload, family_id, telegram_id, chat_id: Ver `enqueue`
+            timeout: Segundos de espera (por defecto OUTBOX_ACK_TIMEOUT)
+
+        Returns:
+            tuple: (status_code, response) de la API, o None si sigue pendiente
+        """
+        item_id = await OutboxService.enqueue(kind, payload, family_id, telegram_id, chat_id)
+        if OutboxService._task is None:
+            return None
+        future = OutboxService._waiters[item_id] = asyncio.get_running_loop().create_future()
+        try:
+            return await asyncio.wait_for(future, timeout)
+        except asyncio.TimeoutError:
+            return None
+        finally:
+            OutboxService._waiters.pop(item_id, None)
+
+    @staticmethod
+    async def pending_count(family_id=None):
+        """Número de creaciones pendientes (de una familia o de todas)."""
+        if not OutboxService.enabled():
+            return 0
+        return await OutboxService._run(OutboxService._count, family_id)
+
+    @staticmethod
+    async def start(application):
+        """Arranca la tarea que envía la cola. Se registra como post_init."""
+        if not OutboxService.enabled() or OutboxService._task is not None:
+            return
+        OutboxService._bot = application.bot
+        OutboxService._wakeup = asyncio.Event()
+        pending = await OutboxService._run(OutboxService._count)
+        Metrics.set_gauge("outbox_pending", pending)
+        if pending:
+            logger.info("Hay %s creaciones pendientes en la cola", pending)
+        OutboxService._task = asyncio.ensure_future(OutboxService._drain())
+
+    @staticmethod
+    async def stop(application=None):
+        """Detiene el envío y cierra el archivo. Lo pendiente se envía al volver a arrancar."""
+        if OutboxService._task is not None:
+            OutboxService._task.cancel()
+            try:
+                await OutboxService._task
+            except asyncio.CancelledError:
+                pass
+            OutboxService._task = None
+
+        def close():
+            if OutboxService._connection is not None:
+                OutboxService._connection.close()
+                OutboxService._connection = None
+
+        if OutboxService._executor is not None:
+            await OutboxService._run(close)
+            OutboxService._executor.shutdown(wait=True)
+            OutboxService._executor = None
+
+    @staticmethod
+    async def _drain():
+        """Envía las creaciones pendientes hasta que se cancela la tarea."""
+        running = {}
+        try:
+            while True:
+                OutboxService._wakeup.clear()
+                busy = list(running)
+                slots = OUTBOX_CONCURRENCY - len(running)
+                if slots > 0:
+                    for item in await OutboxService._run(OutboxService._due, time.time(), busy, slots):
+                        running[item["family_id"]] = asyncio.ensure_future(OutboxService._deliver(item))
+                    busy = list(running)
+
+                next_attempt = await OutboxService._run(OutboxService._next_attempt, busy)
+                timeout = None if next_attempt is None else max(0.0, next_attempt - time.time())
+
+                wakeup = asyncio.ensure_future(OutboxService._wakeup.wait())
+                try:
+                    await asyncio.wait(
+                        [wakeup, *running.values()], timeout=timeout, return_when=asyncio.FIRST_COMPLETED
+                    )
+                finally:
+                    wakeup.cancel()
+                for family_id, task in list(running.items()):
+                    if task.done():
+                        del running[family_id]
+                        if not task.cancelled() and task.exception() is not None:
+                            logger.error("Error enviando la cola de la familia %s: %r", family_id, task.exception())
+        finally:
+            for task in running.values():
+                task.cancel()
+
+    @staticmethod
+    async def _deliver(item):
+        """Envía una creación y actualiza su estado según la respuesta."""
+        kind = item["kind"]
+        payload = json.loads(item["payload"])
+        if kind == "expense":
+            status_code, response = await ExpenseService.create_expense(
+                **payload, telegram_id=item["telegram_id"], idempotency_key=item["idempotency_key"]
+            )
+        elif kind == "expense_bulk":
+            status_code, response = await ExpenseService.create_expenses(
+                **payload, telegram_id=item["telegram_id"], idempotency_key=item["idempotency_key"]
+            )
+        else:
+            status_code, response = await PaymentService.create_payment(
+                **payload, idempotency_key=item["idempotency_key"]
+            )
+
+        attempts = item["attempts"] + 1
+        now = time.time()
+        if status_code in (200, 201):
+            await OutboxService._run(OutboxService._update, item["id"], DONE, attempts, now, None)
+            Metrics.inc("outbox_delivered", kind=kind)
+            Metrics.add_gauge("outbox_pending", -1)
+            Metrics.observe("outbox_delay_seconds", now - item["created_at"], kind=kind)
+            logger.debug("Creación %s (%s) enviada en el intento %s", item["id"], kind, attempts)
+            # Si el manejador ya respondió que quedaba pendiente, avisar de que se registró
+            if not OutboxService._resolve(item["id"], (status_code, response)):
+                await OutboxService._notify(item, Messages.OUTBOX_DELIVERED, payload)
+            return
+
+        error = response.get("detail", response.get("error")) if isinstance(response, dict) else None
+        if not isinstance(error, str):
+            error = f"código de error {status_code}"
+        if status_code in RETRY_STATUS_CODES and now - item["created_at"] < OUTBOX_MAX_AGE:
+            delay = random.uniform(0, min(OUTBOX_RETRY_MAX_DELAY, OUTBOX_RETRY_BASE * 2 ** item["attempts"]))
+            await OutboxService._run(OutboxService._update, item["id"], PENDING, attempts, now + delay, error)
+            Metrics.inc("outbox_retries", kind=kind)
+            logger.warning(
+                "No se pudo enviar la creación %s (%s), status %s; reintento %s en %.1f s",
+                item["id"], kind, status_code, attempts, delay
+            )
+            return
+
+        await OutboxService._run(OutboxService._update, item["id"], FAILED, attempts, now, error)
+        Metrics.inc("outbox_failed", kind=kind)
+        Metrics.add_gauge("outbox_pending", -1)
+        logger.error("Creación %s (%s) descartada, status %s: %s", item["id"], kind, status_code, error)
+        if not OutboxService._resolve(item["id"], (status_code, response)):
+            await OutboxService._notify(item, Messages.OUTBOX_FAILED, payload, error=error)
+
+    @staticmethod
+    def _resolve(item_id, result):
+        """Entrega el resultado al manejador que lo espera.
+
+        Returns:
+            bool: True si el manejador seguía esperando la respuesta
+        """
+        future = OutboxService._waiters.pop(item_id, None)
+        if future is None or future.done():
+            return False
+        future.set_result(result)
+        return True
+
+    @staticmethod
+    async def _notify(item, template, payload, **kwargs):
+        """Avisa en el chat del usuario del resultado de una creación pendiente."""
+        if not item["chat_id"] or OutboxService._bot is None:
+            return
+        if item["kind"] == "expense":
+            summary = f"gasto \"{payload['description']}\" de ${payload['amount']:.2f}"
+        elif item["kind"] == "expense_bulk":
+            total = sum(expense["amount"] for expense in payload["expenses"])
+            summary = f"lote de {len(payload['expenses'])} gastos por ${total:.2f}"
+        else:
+            summary = f"pago de ${payload['amount']:.2f}"
+        try:
+            await OutboxService._bot.send_message(item["chat_id"], template.format(summary=summary, **kwargs))
+        except Exception as e:
+            logger.warning("No se pudo avisar al chat %s: %s", item["chat_id"], e)
@@ -4,13 +4,15 @@ class PaymentService:
     """Servicio para interactuar con pagos."""
     
     @staticmethod
-    def create_payment(from_member, to_member, amount):
+    async def create_payment(from_member, to_member, amount, idempotency_key=None):
         """Crea un nuevo pago.
         
         Args:
             from_member: ID del miembro que realiza el pago
             to_member: ID del miembro que recibe el pago
             amount: Monto del pago
+            idempotency_key: Clave para que la API no duplique el pago si
+                la solicitud se repite (opcional)
             
         Returns:
             tuple: (status_code, response)
@@ -21,22 +23,39 @@ class PaymentService:
             "amount": amount
         }
         
-        return ApiService.request("POST", "/payments", data, check_status=False)
+        headers = {"Idempotency-Key": idempotency_key} if idempotency_key else None
+        return await ApiService.request("POST", "/payments/", data, check_status=False, headers=headers)
     
     @staticmethod
-    def get_family_payments(family_id):
+    async def get_family_payments(family_id, telegram_id=None, offset=0, limit=None):
         """Obtiene los pagos de una familia.
         
         Args:
             family_id: ID de la familia
+            telegram_id: ID de Telegram del usuario (opcional)
+            offset: Pagos a omitir (opcional)
+            limit: Tamaño de página; si es None se obtienen todos
             
         Returns:
             tuple: (status_code, response)
         """
-        return ApiService.request("GET", f"/families/{family_id}/payments", check_status=False)
+        params = {"offset": offset, "limit": limit} if limit else None
+        return await ApiService.request("GET", f"/payments/family/{family_id}", token=telegram_id, check_status=False, params=params)
     
     @staticmethod
-    def delete_payment(payment_id):
+    async def get_payment(payment_id):
+        """Obtiene información de un pago.
+        
+        Args:
+            payment_id: ID del pago (UUID como string)
+            
+        Returns:
+            tuple: (status_code, response)
+        """
+        return await ApiService.request("GET", f"/payments/{payment_id}", check_status=False)
+    
+    @staticmethod
+    async def delete_payment(payment_id):
         """Elimina un pago.
         
         Args:
@@ -45,4 +64,4 @@ class PaymentService:
         Returns:
             tuple: (status_code, response)
         """
-        return ApiService.request("DELETE", f"/payments/{payment_id}", check_status=False) 
\ No newline at end of file
+        return await ApiService.request("DELETE", f"/payments/{payment_id}", check_status=False) 
\ No newline at end of file
@@ -0,0 +1,458 @@
+#!/usr/bin/env python3
+"""
+Simula conversaciones completas con el bot para medir sus flujos de punta a punta.
+
+Usa la aplicación real del bot (main.build_application, con sus
+ConversationHandler, el procesador de actualizaciones y la cola de
+creaciones) y le entrega actualizaciones sintéticas como si llegaran de
+Telegram. La Bot API se sustituye por FakeTelegram, que responde en local y
+guarda los mensajes que envía el bot, y la API se ejecuta en el mismo
+proceso:
+
+- asgi (por defecto): la aplicación FastAPI real a través de
+  httpx.ASGITransport, con su enrutado y validación
+- embedded: la capa de servicios de la API sin HTTP (ver EmbeddedApi)
+- http: la API configurada en API_BASE_URL
+
+Cada hogar simulado tiene dos usuarios que recorren estos flujos:
+crear_familia, unirse, gasto, balances, pago, editar, eliminar y, con los
+comandos de un solo mensaje, gasto_rapido (/gasto), pago_rapido (/pago),
+gastos_lote (/gastos con diez gastos) e importar (un CSV de 250 gastos
+enviado como documento).
+Al final se muestra, por flujo, cuántos se completaron, los errores,
+cuántos quedaron en la cola local (🕓), el rendimiento y la latencia.
+
+Uso:
+    python simulate_flows.py [--users 200] [--ramp 2] [--think 0]
+                             [--api asgi|embedded|http] [--database-url URL]
+                             [--telegram-latency 0] [--no-outbox] [--handlers]
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import re
+import tempfile
+import time
+import httpx
+from collections import Counter, defaultdict
+from contextlib import asynccontextmanager
+from telegram import Update
+from telegram.request import BaseRequest
+
+# Flujos en el orden en que los recorre cada hogar
+FLOWS = ("crear_familia", "unirse", "gasto", "balances", "pago", "editar", "eliminar", "gasto_rapido", "pago_rapido", "gastos_lote", "importar")
+
+# Filas del CSV que importa cada hogar
+IMPORT_ROWS = 250
+
+class FakeTelegram(BaseRequest):
+    """Sustituto local de la Bot API de Telegram.
+
+    Responde a cada método con un resultado mínimo válido y guarda los
+    mensajes que el bot envía o edita, por chat, para que los usuarios
+    simulados puedan leerlos (textos, teclados y botones en línea).
+    """
+
+    def __init__(self, latency=0.0):
+        super().__init__()
+        self.latency = latency
+        self.sent = defaultdict(list)
+        self.calls = Counter()
+        self.files = {}
+        self._message_id = 0
+
+    @property
+    def read_timeout(self):
+        return None
+
+    async def initialize(self):
+        pass
+
+    async def shutdown(self):
+        pass
+
+    async def do_request(self, url, method, request_data=None, read_timeout=None,
+                         write_timeout=None, connect_timeout=None, pool_timeout=None):
+        api_method = url.rsplit("/", 1)[-1]
+        params = request_data.parameters if request_data else {}
+        self.calls[api_method] += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        result = self._result(api_method, params)
+        return 200, json.dumps({"ok": True, "result": result}).encode()
+
+    def _result(self, api_method, params):
+        if api_method == "getMe":
+            return {"id": 1, "is_bot": True, "first_name": "Simulador", "username": "simulador_bot"}
+        if api_method == "getFile":
+            # Ruta local, como con un servidor propio de la Bot API
+            path = self.files[params["file_id"]]
+            return {"file_id": params["file_id"], "file_unique_id": params["file_id"],
+                    "file_size": os.path.getsize(path), "file_path": path}
+        if api_method not in ("sendMessage", "sendPhoto", "editMessageText", "editMessageReplyMarkup"):
+            return True
+
+        chat_id = int(params.get("chat_id", 0))
+        if api_method.startswith("edit"):
+            message_id = int(params.get("message_id", 0))
+        else:
+            self._message_id += 1
+            message_id = self._message_id
+        text = params.get("text") or params.get("caption") or ""
+        reply_markup = params.get("reply_markup")
+        if isinstance(reply_markup, str):
+            reply_markup = json.loads(reply_markup)
+        self.sent[chat_id].append({
+            "method": api_method, "message_id": message_id, "text": text, "reply_markup": reply_markup or {}
+        })
+
+        message = {
+            "message_id": message_id,
+            "date": int(time.time()),
+            "chat": {"id": chat_id, "type": "private"},
+            "text": text
+        }
+        if reply_markup and "inline_keyboard" in reply_markup:
+            message["reply_markup"] = reply_markup
+        if api_method == "sendPhoto":
+            del message["text"]
+            message["caption"] = text
+            message["photo"] = [{"file_id": f"foto{message_id}", "file_unique_id": f"u{message_id}", "width": 300, "height": 300}]
+        return message
+
+class LimitedASGITransport(httpx.AsyncBaseTransport):
+    """httpx.ASGITransport con un máximo de peticiones simultáneas.
+
+    El cliente HTTP real nunca tiene más de API_MAX_CONNECTIONS peticiones
+    en curso; ASGITransport no tiene ese límite y dejaría entrar a la API
+    todas las peticiones a la vez.
+    """
+
+    def __init__(self, transport, limit):
+        self._transport = transport
+        self._semaphore = asyncio.Semaphore(limit)
+
+    async def handle_async_request(self, request):
+        async with self._semaphore:
+            response = await self._transport.handle_async_request(request)
+            await response.aread()
+            return response
+
+    async def aclose(self):
+        await self._transport.aclose()
+
+class FlowFailed(Exception):
+    """El bot no respondió lo esperado en un paso del flujo."""
+
+class Simulator:
+    """Entrega actualizaciones a la aplicación y espera a que se procesen."""
+
+    def __init__(self, application, telegram):
+        self.application = application
+        self.telegram = telegram
+        self.latencies = defaultdict(list)
+        self.errors = Counter()
+        self.queued = Counter()
+        self.steps = []
+        self._update_id = 0
+        self._message_id = 10 ** 9
+        self._done = {}
+
+        # Avisar cuando termina cada actualización (también si el manejador falla)
+        processor = application.update_processor
+        do_process_update = processor.do_process_update
+
+        async def tracked(update, coroutine):
+            try:
+                await do_process_update(update, coroutine)
+            finally:
+                future = self._done.pop(getattr(update, "update_id", None), None)
+                if future is not None and not future.done():
+                    future.set_result(None)
+
+        processor.do_process_update = tracked
+
+    async def step(self, user_id, name, text=None, callback_data=None, message_id=None, document=None):
+        """Envía un mensaje de texto, un documento (ruta local) o la pulsación de un botón en línea.
+
+        Returns:
+            list: Mensajes que el bot envió o editó en el chat durante el paso
+        """
+        self._update_id += 1
+        user = {"id": user_id, "is_bot": False, "first_name": name}
+        chat = {"id": user_id, "type": "private", "first_name": name}
+        if callback_data is not None:
+            data = {"update_id": self._update_id, "callback_query": {
+                "id": str(self._update_id),
+                "from": user,
+                "chat_instance": str(user_id),
+                "data": callback_data,
+                "message": {"message_id": message_id, "date": int(time.time()), "chat": chat, "text": "lista"}
+            }}
+        else:
+            self._message_id += 1
+            data = {"update_id": self._update_id, "message": {
+                "message_id": self._message_id, "date": int(time.time()), "chat": chat, "from": user
+            }}
+            if document is not None:
+                file_id = f"doc{self._message_id}"
+                self.telegram.files[file_id] = document
+                data["message"]["document"] = {
+                    "file_id": file_id, "file_unique_id": file_id, "file_name": os.path.basename(document),
+                    "mime_type": "text/csv", "file_size": os.path.getsize(document)
+                }
+            else:
+                data["message"]["text"] = text
+            if text and text.startswith("/"):
+                data["message"]["entities"] = [{"type": "bot_command", "offset": 0, "length": len(text.split(None, 1)[0])}]
+
+        update = Update.de_json(data, self.application.bot)
+        future = asyncio.get_running_loop().create_future()
+        self._done[update.update_id] = future
+        sent = self.telegram.sent[user_id]
+        first = len(sent)
+        start = time.perf_counter()
+        await self.application.update_queue.put(update)
+        await future
+        self.steps.append(time.perf_counter() - start)
+        return sent[first:]
+
+    @asynccontextmanager
+    async def flow(self, name):
+        """Mide un flujo; cuenta como error si falla o el bot responde con ❌."""
+        start = time.perf_counter()
+        try:
+            yield
+        except FlowFailed as e:
+            self.errors[name] += 1
+            logging.getLogger(__name__).debug("Flujo %s fallido: %s", name, e)
+            raise
+        self.latencies[name].append(time.perf_counter() - start)
+
+def _texts(messages):
+    return " | ".join(message["text"] for message in messages)
+
+def _check(messages, *expected):
+    """Falla si el bot no respondió, respondió con ❌ o, si se indican textos
+    esperados, si ninguna respuesta contiene alguno de ellos."""
+    if not messages or any(message["text"].startswith("❌") for message in messages):
+        raise FlowFailed(_texts(messages)[:200])
+    if expected and not any(text in message["text"] for message in messages for text in expected):
+        raise FlowFailed(f"Se esperaba {' o '.join(expected)}: {_texts(messages)[:200]}")
+    return messages
+
+def _reply_buttons(messages):
+    """Botones del último teclado normal enviado."""
+    for message in reversed(messages):
+        keyboard = message["reply_markup"].get("keyboard")
+        if keyboard:
+            return [button if isinstance(button, str) else button["text"] for row in keyboard for button in row]
+    return []
+
+def _inline_buttons(messages):
+    """(message_id, [callback_data...]) del último teclado en línea enviado."""
+    for message in reversed(messages):
+        keyboard = message["reply_markup"].get("inline_keyboard")
+        if keyboard:
+            return message["message_id"], [button["callback_data"] for row in keyboard for button in row]
+    return None, []
+
+async def _settle(sim, flow, family_id, messages):
+    """Si la creación quedó en la cola (🕓), espera a que se entregue a la API."""
+    from services.outbox_service import OutboxService
+
+    if not any(message["text"].startswith("🕓") for message in messages):
+        return
+    sim.queued[flow] += 1
+    while await OutboxService.pending_count(family_id):
+        await asyncio.sleep(0.05)
+
+def write_import_csv(path, rows=IMPORT_ROWS):
+    """Escribe un extracto de ejemplo como los que exportan las hojas de cálculo."""
+    with open(path, "w", encoding="cp1252", newline="") as f:
+        f.write("Extracto de la cuenta;;;\r\n;;;\r\nFecha;Concepto;Importe;Pagado por\r\n")
+        for i in range(rows):
+            payer = "Ana" if i % 2 else "Beto"
+            f.write(f'{i % 28 + 1:02d}/01/2024;"Compra {i + 1}; línea\r\nnº {i + 1}";{i % 90 + 1},{i % 100:02d};{payer}\r\n')
+    return path
+
+async def household(sim, index, think, csv_file):
+    """Recorre todos los flujos con los dos usuarios de un hogar."""
+    a, b = 10_000 + 2 * index, 10_000 + 2 * index + 1
+
+    async def step(user_id, name, text=None, **kwargs):
+        if think:
+            await asyncio.sleep(think)
+        return await sim.step(user_id, name, text, **kwargs)
+
+    try:
+        async with sim.flow("crear_familia"):
+            await step(a, "Ana", "/start")
+            await step(a, "Ana", "🏠 Crear Familia")
+            await step(a, "Ana", f"Familia {index}")
+            messages = _check(await step(a, "Ana", "Ana"), "creada con éxito")
+            match = re.search(r"`([0-9a-fA-F-]{36})`", _texts(messages))
+            if not match:
+                raise FlowFailed("No se recibió el ID de la familia")
+            family_id = match.group(1)
+
+        async with sim.flow("unirse"):
+            _check(await step(b, "Beto", f"/start join_{family_id}"), "Te has unido")
+
+        async with sim.flow("gasto"):
+            await step(a, "Ana", "💸 Crear Gasto")
+            await step(a, "Ana", "Cena")
+            await step(a, "Ana", "30")
+            messages = _check(await step(a, "Ana", "✅ Confirmar"), "Gasto Creado Exitosamente", "🕓 Gasto guardado")
+        await _settle(sim, "gasto", family_id, messages)
+
+        async with sim.flow("balances"):
+            _check(await step(b, "Beto", "💰 Ver Balances"), "Balances de la Familia")
+
+        async with sim.flow("pago"):
+            buttons = [button for button in _reply_buttons(_check(await step(b, "Beto", "💳 Registrar Pago"))) if "$" in button]
+            if not buttons:
+                raise FlowFailed("No hay a quién pagar")
+            await step(b, "Beto", buttons[0])
+            await step(b, "Beto", "10")
+            messages = _check(await step(b, "Beto", "✅ Confirmar"), "Pago registrado con éxito", "🕓 Pago de")
+        await _settle(sim, "pago", family_id, messages)
+
+        for flow, option, last, expected in (
+            ("editar", "📝 Editar Gastos", "25", "Gasto actualizado con éxito"),
+            ("eliminar", "🗑️ Eliminar Gastos", "✅ Confirmar", "Gasto eliminado con éxito")
+        ):
+            async with sim.flow(flow):
+                await step(a, "Ana", "✏️ Editar/Eliminar")
+                message_id, callbacks = _inline_buttons(_check(await step(a, "Ana", option)))
+                if not callbacks:
+                    raise FlowFailed("No se mostró la lista de gastos")
+                _check(await step(a, "Ana", callback_data=callbacks[0], message_id=message_id))
+                _check(await step(a, "Ana", last), expected)
+
+        async with sim.flow("gasto_rapido"):
+            messages = _check(await step(a, "Ana", "/gasto 12.50 café"), "Gasto registrado", "🕓 Gasto guardado")
+        await _settle(sim, "gasto_rapido", family_id, messages)
+
+        async with sim.flow("pago_rapido"):
+            messages = _check(await step(b, "Beto", "/pago @Ana 5"), "✅ Pago de", "🕓 Pago de")
+        await _settle(sim, "pago_rapido", family_id, messages)
+
+        async with sim.flow("gastos_lote"):
+            lines = "\n".join(f"{i + 1}.50 compra {i + 1}" + (" @Beto" if i % 2 else "") for i in range(10))
+            _check(await step(a, "Ana", f"/gastos\n{lines}"))
+            messages = _check(await step(a, "Ana", "✅ Confirmar"), "gastos registrados", "gastos guardados")
+        await _settle(sim, "gastos_lote", family_id, messages)
+
+        async with sim.flow("importar"):
+            status = _check(await step(b, "Beto", document=csv_file))[-1]
+            # La importación sigue en segundo plano: esperar al resumen final
+            deadline = time.perf_counter() + 60
+            while not status["text"].startswith(("✅", "❌")):
+                if time.perf_counter() > deadline:
+                    raise FlowFailed("La importación no terminó")
+                await asyncio.sleep(0.01)
+                status = [m for m in sim.telegram.sent[b] if m["message_id"] == status["message_id"]][-1]
+            _check([status], "Importación terminada")
+    except FlowFailed:
+        pass
+
+def percentile(values, fraction):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(fraction * len(values)))]
+
+def setup_api(mode, database_url):
+    """Prepara la API en el mismo proceso según el modo elegido."""
+    import services.api_service as api_service
+    import services.embedded_api as embedded_api
+    from services.api_service import ApiService
+    from services.embedded_api import EmbeddedApi
+
+    if mode == "http":
+        api_service.API_MODE = "http"
+        return
+    os.environ["SQLALCHEMY_DATABASE_URL"] = database_url
+    embedded_api.EMBEDDED_DATABASE_URL = database_url
+    if mode == "embedded":
+        api_service.API_MODE = "embedded"
+        EmbeddedApi.load()
+        return
+
+    api_service.API_MODE = "http"
+    api = EmbeddedApi.import_modules("main", init_db=True)
+    ApiService.set_client(httpx.AsyncClient(
+        transport=LimitedASGITransport(httpx.ASGITransport(app=api["main"].app), api_service.API_MAX_CONNECTIONS),
+        base_url="http://api",
+        headers={"Content-Type": "application/json"},
+        timeout=api_service.API_TIMEOUT
+    ))
+
+async def run(args):
+    import main as bot_main
+    import services.outbox_service as outbox_service
+    from utils.metrics_server import MetricsExporter
+
+    logging.getLogger().setLevel(args.log_level)
+    workdir = tempfile.mkdtemp(prefix="simulate_flows_")
+    setup_api(args.api, args.database_url or f"sqlite:///{os.path.join(workdir, 'api.db')}")
+    outbox_service.OUTBOX_FILE = None if args.no_outbox else os.path.join(workdir, "outbox.sqlite3")
+
+    telegram = FakeTelegram(args.telegram_latency)
+    application = bot_main.build_application(request=telegram, persistence_file=None)
+    await application.initialize()
+    await application.post_init(application)
+    await application.start()
+
+    sim = Simulator(application, telegram)
+    households = max(1, args.users // 2)
+    csv_file = write_import_csv(os.path.join(workdir, "extracto.csv"))
+
+    async def delayed(index):
+        await asyncio.sleep(args.ramp * index / households)
+        await household(sim, index, args.think, csv_file)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(delayed(i) for i in range(households)))
+    elapsed = time.perf_counter() - start
+
+    await application.stop()
+    await application.shutdown()
+    await application.post_shutdown(application)
+
+    print(f"{households * 2} usuarios ({households} hogares) con la API en modo {args.api} en {elapsed:.2f} s")
+    print(f"  {len(sim.steps)} actualizaciones ({len(sim.steps) / elapsed:.0f}/s), "
+          f"latencia por paso p50 {percentile(sim.steps, 0.5) * 1000:.1f} ms, "
+          f"p95 {percentile(sim.steps, 0.95) * 1000:.1f} ms, máx {max(sim.steps, default=0) * 1000:.1f} ms")
+    print(f"  {'flujo':<14} {'ok':>6} {'errores':>8} {'en cola':>8} {'flujos/s':>9} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'máx ms':>8}")
+    for flow in FLOWS:
+        values = sim.latencies[flow]
+        print(f"  {flow:<14} {len(values):>6} {sim.errors[flow]:>8} {sim.queued[flow]:>8} {len(values) / elapsed:>9.1f} "
+              f"{percentile(values, 0.5) * 1000:>8.1f} {percentile(values, 0.95) * 1000:>8.1f} "
+              f"{percentile(values, 0.99) * 1000:>8.1f} {max(values, default=0) * 1000:>8.1f}")
+    print(f"  Llamadas a Telegram: {dict(telegram.calls)}")
+    if args.handlers:
+        print("Manejadores:")
+        for line in MetricsExporter.summary():
+            print(f"  {line}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Simula conversaciones completas con el bot")
+    parser.add_argument("--users", type=int, default=200, help="Usuarios simulados (dos por hogar)")
+    parser.add_argument("--ramp", type=float, default=2.0, help="Segundos en los que repartir el inicio de los hogares")
+    parser.add_argument("--think", type=float, default=0.0, help="Pausa de cada usuario entre mensajes (segundos)")
+    parser.add_argument("--api", choices=("asgi", "embedded", "http"), default="asgi")
+    parser.add_argument("--database-url", default=None, help="Base de datos de la API (por defecto, SQLite temporal)")
+    parser.add_argument("--telegram-latency", type=float, default=0.0, help="Latencia de cada llamada a Telegram (segundos)")
+    parser.add_argument("--no-outbox", action="store_true", help="Crear gastos y pagos sin la cola local")
+    parser.add_argument("--handlers", action="store_true", help="Mostrar el resumen por manejador")
+    parser.add_argument("--log-level", default="WARNING")
+    args = parser.parse_args()
+    # Como main.main(): los procesos de renderizado arrancan antes que otros hilos
+    from utils.render_executor import RenderExecutor
+    RenderExecutor.start()
+    asyncio.run(run(args))
@@ -1,3 +1,7 @@
+import logging
+
+logger = logging.getLogger(__name__)
+
 class Formatters:
     """Formateadores para mostrar datos en Telegram."""
     
@@ -17,7 +21,7 @@ class Formatters:
         Returns:
             str: Texto formateado con los gastos
         """
-        print(f"Formateando gastos: {expenses}")
+        logger.debug("Formateando gastos: %s", expenses)
         
         if not expenses:
             return "No hay gastos registrados."
@@ -26,12 +30,12 @@ class Formatters:
         if member_names is None:
             member_names = {}
         
-        print(f"Nombres de miembros disponibles: {member_names}")
+        logger.debug("Nombres de miembros disponibles: %s", member_names)
         
         result = []
         for expense in expenses:
             try:
-                print(f"Procesando gasto: {expense}")
+                logger.debug("Procesando gasto: %s", expense)
                 
                 # Formatear la fecha
                 created_at = expense.get("created_at", "")
@@ -70,9 +74,7 @@ class Formatters:
                 )
                 result.append(expense_text)
             except Exception as e:
-                print(f"Error al formatear gasto: {e}")
-                import traceback
-                traceback.print_exc()
+                logger.exception("Error al formatear gasto: %s", e)
                 continue
         
         if not result:
@@ -92,7 +94,7 @@ class Formatters:
             balances: Lista de balances o transacciones
             member_names: Diccionario de ID -> nombre para mostrar nombres en lugar de IDs
         """
-        print(f"Formateando balances: {balances}")
+        logger.debug("Formateando balances: %s", balances)
         
         # Si no hay balances, mostrar un mensaje
         if not balances:
@@ -102,7 +104,7 @@ class Formatters:
         if member_names is None:
             member_names = {}
             
-        print(f"Nombres de miembros disponibles: {member_names}")
+        logger.debug("Nombres de miembros disponibles: %s", member_names)
         
         # Determinar el formato de los balances
         if isinstance(balances, list) and len(balances) > 0:
@@ -114,7 +116,7 @@ class Formatters:
                 return Formatters._format_pending_transactions(balances, member_names)
         
         # Si no se puede determinar el formato, mostrar los datos en bruto
-        print(f"Formato de balances no reconocido: {balances}")
+        logger.warning("Formato de balances no reconocido: %s", balances)
         return f"Datos de balances en formato no reconocido: {balances}"
     
     @staticmethod
@@ -122,7 +124,7 @@ class Formatters:
         """Formatea los balances por miembro."""
         result = []
         
-        print(f"Formateando balances de miembros con nombres: {member_names}")
+        logger.debug("Formateando balances de miembros con nombres: %s", member_names)
         
         # Crear un diccionario inverso para buscar nombres por ID numérico
         id_to_name = {}
@@ -136,13 +138,13 @@ class Formatters:
                 # Si no se puede convertir, mantener el ID original
                 pass
         
-        print(f"Mapa de ID a nombre: {id_to_name}")
+        logger.debug("Mapa de ID a nombre: %s", id_to_name)
         
         for balance in balances:
             try:
                 # Verificar que balance sea un diccionario
                 if not isinstance(balance, dict):
-                    print(f"Error: balance no es un diccionario, es {type(balance)}")
+                    logger.error("Error: balance no es un diccionario, es %s", type(balance))
                     continue
                 
                 # Obtener el ID del miembro (puede ser string o int)
@@ -167,7 +169,7 @@ class Formatters:
                 if not member_name:
                     member_name = f"Usuario {member_id}"
                 
-                print(f"Miembro ID: {member_id}, Nombre: {member_name}")
+                logger.debug("Miembro ID: %s, Nombre: %s", member_id, member_name)
                     
                 # Formatear deudas (lo que debe a otros)
                 debts = balance.get('debts', [])
@@ -251,9 +253,7 @@ class Formatters:
                 )
                 result.append(member_text)
             except Exception as e:
-                print(f"Error al formatear balance: {e}")
-                import traceback
-                traceback.print_exc()
+                logger.exception("Error al formatear balance: %s", e)
                 continue
         
         # Si no hay balances formateados, mostrar un mensaje
@@ -281,7 +281,7 @@ class Formatters:
                 transaction_text = f"💸 *{from_name}* debe pagar *${amount:.2f}* a *{to_name}*"
                 result.append(transaction_text)
             except Exception as e:
-                print(f"Error al formatear transacción: {e}")
+                logger.exception("Error al formatear transacción: %s", e)
                 continue
                 
         if not result:
@@ -1,4 +1,4 @@
-from telegram import ReplyKeyboardMarkup, ReplyKeyboardRemove
+from telegram import ReplyKeyboardMarkup, ReplyKeyboardRemove, InlineKeyboardMarkup, InlineKeyboardButton
 
 class Keyboards:
     """Teclados personalizados para Telegram."""
@@ -47,6 +47,36 @@ class Keyboards:
         keyboard = [["❌ Cancelar"]]
         return ReplyKeyboardMarkup(keyboard, resize_keyboard=True, one_time_keyboard=True)
     
+    @staticmethod
+    def get_paged_inline_keyboard(prefix, page, labels, has_next):
+        """Devuelve un teclado en línea con una página de elementos.
+        
+        El callback_data de cada botón es un token corto: "<prefix>:s:<page>:<i>"
+        para seleccionar el elemento i de la página, "<prefix>:p:<page>" para
+        cambiar de página y "<prefix>:x" para volver al menú.
+        
+        Args:
+            prefix: Prefijo del tipo de elemento ("e" gastos, "p" pagos)
+            page: Número de página (desde 0)
+            labels: Textos de los botones de la página
+            has_next: Si hay una página siguiente
+        """
+        keyboard = [
+            [InlineKeyboardButton(label, callback_data=f"{prefix}:s:{page}:{i}")]
+            for i, label in enumerate(labels)
+        ]
+        
+        navigation = []
+        if page > 0:
+            navigation.append(InlineKeyboardButton("⬅️ Anterior", callback_data=f"{prefix}:p:{page - 1}"))
+        if has_next:
+            navigation.append(InlineKeyboardButton("Siguiente ➡️", callback_data=f"{prefix}:p:{page + 1}"))
+        if navigation:
+            keyboard.append(navigation)
+        
+        keyboard.append([InlineKeyboardButton("↩️ Volver al Menú", callback_data=f"{prefix}:x")])
+        return InlineKeyboardMarkup(keyboard)
+    
     @staticmethod
     def remove_keyboard():
         """Devuelve un objeto para eliminar el teclado."""
@@ -25,6 +25,8 @@ class Messages:
     ERROR_DELETING_EXPENSE = "❌ Error al eliminar el gasto. Por favor, intenta nuevamente más tarde."
     ERROR_DELETING_PAYMENT = "❌ Error al eliminar el pago. Por favor, intenta nuevamente más tarde."
     ERROR_UPDATING_EXPENSE = "❌ Error al actualizar el gasto. Por favor, intenta nuevamente más tarde."
+    ERROR_EXPENSE_CONFLICT = "⚠️ Otra persona modificó este gasto mientras lo editabas. " \
+                             "No se aplicó tu cambio; vuelve a seleccionarlo para ver sus datos actuales."
     
     # Mensajes de éxito
     SUCCESS_FAMILY_CREATED = "✅ Familia '{name}' creada con éxito.\n*ID:* `{id}`"
@@ -35,6 +37,15 @@ class Messages:
     SUCCESS_PAYMENT_DELETED = "✅ Pago eliminado con éxito."
     SUCCESS_EXPENSE_UPDATED = "✅ Gasto actualizado con éxito."
     
+    # Mensajes de la cola de creaciones pendientes
+    EXPENSE_QUEUED = "🕓 Gasto guardado: *{description}* por ${amount:.2f}.\n\n" \
+                     "La API está tardando en responder; se registrará automáticamente y te avisaré."
+    PAYMENT_QUEUED = "🕓 Pago de ${amount:.2f} guardado.\n\n" \
+                     "La API está tardando en responder; se registrará automáticamente y te avisaré."
+    OUTBOX_DELIVERED = "✅ Se registró el {summary} que estaba pendiente."
+    OUTBOX_FAILED = "❌ No se pudo registrar el {summary}: {error}"
+    PENDING_OPERATIONS = "🕓 {count} gasto(s) o pago(s) pendiente(s) de registrar no aparecen todavía."
+    
     # Mensajes de flujo de creación de familia
     CREATE_FAMILY_INTRO = "🏠 Vamos a crear una nueva familia.\n\n" \
                          "¿Cómo se llamará tu familia?"
@@ -64,10 +75,59 @@ class Messages:
                             "*Pagado por:* {paid_by}\n\n" \
                             "¿Confirmas este gasto?"
     
+    # Comandos de registro rápido (/gasto y /pago)
+    QUICK_EXPENSE_USAGE = "💸 Usa: `/gasto <monto> <descripción>`\n\nEjemplo: `/gasto 25.50 pizza`"
+    QUICK_EXPENSE_CREATED = "✅ Gasto registrado: *{description}* por ${amount:.2f}."
+    QUICK_PAYMENT_USAGE = "💳 Usa: `/pago <nombre> <monto>`\n\nEjemplo: `/pago @Ana 40`"
+    QUICK_PAYMENT_CREATED = "✅ Pago de ${amount:.2f} a *{to_member}* registrado."
+    QUICK_PAYMENT_UNKNOWN_MEMBER = "❌ No encontré a \"{name}\" en tu familia.\n\nMiembros: {members}"
+    QUICK_PAYMENT_AMBIGUOUS_MEMBER = "❌ Hay varios miembros que se llaman \"{name}\". " \
+                                     "Usa el flujo \"💳 Registrar Pago\" para elegir."
+    QUICK_PAYMENT_SELF = "❌ No puedes registrar un pago a ti mismo."
+    
+    # Varios gastos en un mensaje (/gastos)
+    BATCH_EXPENSE_USAGE = "🧾 Escribe un gasto por línea después del comando:\n\n" \
+                          "`/gastos`\n`25.50 pizza`\n`12 taxi @Beto`\n\n" \
+                          "Formato: `monto descripción [@quién pagó]` (por defecto, tú)."
+    BATCH_EXPENSE_TOO_MANY = "❌ Puedes registrar como máximo {max} gastos por mensaje."
+    BATCH_EXPENSE_INVALID = "❌ No pude entender estas líneas:\n\n{errors}\n\nCorrige el mensaje y vuelve a enviarlo."
+    BATCH_EXPENSE_CONFIRM = "📝 Resumen de {count} gastos:\n\n{items}\n\n*Total:* ${total:.2f}\n\n¿Confirmas estos gastos?"
+    BATCH_EXPENSE_CREATED = "✅ {count} gastos registrados por un total de ${total:.2f}."
+    BATCH_EXPENSE_QUEUED = "🕓 {count} gastos guardados por un total de ${total:.2f}.\n\n" \
+                           "La API está tardando en responder; se registrarán automáticamente y te avisaré."
+    
+    # Importación de gastos desde un archivo CSV
+    IMPORT_UNSUPPORTED = "📎 Puedo importar gastos desde un archivo CSV (exporta tu hoja de cálculo o extracto " \
+                         "como CSV). Debe tener una columna de monto y otra de descripción y, si quieres, " \
+                         "una de quién pagó."
+    IMPORT_TOO_LARGE = "❌ El archivo es demasiado grande. El máximo es {max_mb} MB."
+    IMPORT_ALREADY_RUNNING = "⏳ Ya hay una importación en curso. Espera a que termine para enviar otro archivo."
+    IMPORT_STARTED = "⏳ Importando gastos del archivo..."
+    IMPORT_PROGRESS = "⏳ Importando gastos... {rows} filas leídas, {imported} gastos registrados."
+    IMPORT_NO_HEADER = "❌ No encontré las columnas del archivo. La cabecera debe incluir una columna de monto " \
+                       "(monto, importe, cargo...) y otra de descripción (descripción, concepto, detalle...)."
+    IMPORT_FAILED = "❌ La importación se detuvo en la fila {row}: {error}\n\n" \
+                    "Se registraron {imported} gastos antes del error."
+    IMPORT_DONE = "✅ Importación terminada: {imported} gastos registrados por un total de ${total:.2f} " \
+                  "({rows} filas leídas)."
+    IMPORT_INCOME_SKIPPED = "\n\n↪️ {income} filas de ingresos o devoluciones no se importaron."
+    IMPORT_SKIPPED = "\n\n⚠️ {skipped} filas omitidas:\n{errors}"
+    IMPORT_TRUNCATED = "\n\n⚠️ Solo se importan las primeras {max} filas de cada archivo."
+    
+    # Resumen periódico de balances
+    DIGEST_HEADER = "📬 *Resumen de {family_name}*\n\n" \
+                    "En los últimos {days} días: {count} gastos por ${total:.2f}.\n\n"
+    DIGEST_OWED = "🟢 Te deben ${amount:.2f} en total."
+    DIGEST_OWES = "🔴 Debes ${amount:.2f} en total."
+    DIGEST_SETTLED = "✅ Estás al día."
+    DIGEST_FOOTER = "\n\nPulsa 💰 Ver Balances para ver el detalle."
+    
     # Mensajes de flujo de pagos
     CREATE_PAYMENT_INTRO = "💳 Vamos a registrar un nuevo pago.\n\n" \
                           "¿A quién le estás pagando?"
     
+    CREATE_PAYMENT_NO_DEBTS = "👍 No tienes deudas pendientes con nadie de la familia."
+    
     CREATE_PAYMENT_AMOUNT = "👍 Destinatario seleccionado: *{to_member}*\n\n" \
                            "Ahora, ¿cuál es el monto del pago? (Ej: 100.50)"
     
@@ -86,6 +146,9 @@ class Messages:
     SELECT_PAYMENT_TO_EDIT = "📝 Selecciona el pago que deseas editar:"
     SELECT_PAYMENT_TO_DELETE = "🗑️ Selecciona el pago que deseas eliminar:"
     
+    SELECT_FROM_LIST = "👆 Usa los botones de la lista para elegir, o pulsa \"↩️ Volver al Menú\"."
+    LIST_CHANGED = "⚠️ La lista ha cambiado. Esta es la versión actualizada:"
+    
     CONFIRM_DELETE_EXPENSE = "⚠️ ¿Estás seguro de que deseas eliminar este gasto?\n\n{details}"
     CONFIRM_DELETE_PAYMENT = "⚠️ ¿Estás seguro de que deseas eliminar este pago?\n\n{details}"
     
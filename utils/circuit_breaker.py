@@ -0,0 +1,80 @@
+import time
+from utils.metrics import Metrics
+
+# Valores del indicador api_circuit_state
+CLOSED = 0
+HALF_OPEN = 1
+OPEN = 2
+
+_STATE_NAMES = {CLOSED: "cerrado", HALF_OPEN: "semiabierto", OPEN: "abierto"}
+
+class CircuitBreaker:
+    """Corta las llamadas a un endpoint mientras está fallando.
+
+    Cerrado: las llamadas pasan. Tras `failure_threshold` fallos seguidos se
+    abre y durante `reset_timeout` segundos las llamadas se rechazan sin
+    llegar a la API. Pasado ese tiempo queda semiabierto: se deja pasar una
+    única llamada de prueba; si tiene éxito se cierra y si falla vuelve a
+    abrirse.
+
+    El estado se publica en el indicador api_circuit_state (0 cerrado,
+    1 semiabierto, 2 abierto) con la etiqueta endpoint.
+    """
+
+    def __init__(self, name, failure_threshold=5, reset_timeout=30.0):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self._probing = False
+        Metrics.set_gauge("api_circuit_state", CLOSED, endpoint=name)
+
+    def _set_state(self, state):
+        if state != self.state:
+            self.state = state
+            Metrics.set_gauge("api_circuit_state", state, endpoint=self.name)
+            Metrics.inc("api_circuit_transitions", endpoint=self.name, state=_STATE_NAMES[state])
+
+    def allow(self):
+        """Indica si se puede hacer una llamada ahora.
+
+        Returns:
+            bool: False si el circuito está abierto o ya hay una llamada de
+                prueba en curso
+        """
+        if self.state == CLOSED:
+            return True
+        if self.state == OPEN:
+            if time.monotonic() - self.opened_at < self.reset_timeout:
+                return False
+            self._set_state(HALF_OPEN)
+        if self._probing:
+            return False
+        self._probing = True
+        return True
+
+    def record_success(self):
+        """Registra una llamada correcta."""
+        self.failures = 0
+        self._probing = False
+        self._set_state(CLOSED)
+
+    def record_failure(self):
+        """Registra una llamada fallida (error de conexión, timeout o 5xx)."""
+        self.failures += 1
+        self._probing = False
+        if self.state == HALF_OPEN or self.failures >= self.failure_threshold:
+            self.opened_at = time.monotonic()
+            self._set_state(OPEN)
+
+    def release(self):
+        """Libera la llamada de prueba si se canceló antes de terminar."""
+        self._probing = False
+
+    def retry_after(self):
+        """Segundos que faltan para volver a probar el endpoint."""
+        if self.state != OPEN:
+            return 0.0
+        return max(0.0, self.reset_timeout - (time.monotonic() - self.opened_at))
@@ -1,8 +1,10 @@
+import logging
 from telegram.ext import ContextTypes
 from services.family_service import FamilyService
 from services.member_service import MemberService
 from services.auth_service import AuthService
-import traceback
+
+logger = logging.getLogger(__name__)
 
 class ContextManager:
     """Gestor de contexto para manejar los datos del usuario."""
@@ -20,32 +22,31 @@ class ContextManager:
         """
         # Si ya tenemos el family_id en el contexto, no necesitamos verificar
         if "family_id" in context.user_data:
-            print(f"Usuario ya tiene family_id en el contexto: {context.user_data['family_id']}")
+            logger.debug("Usuario ya tiene family_id en el contexto: %s", context.user_data['family_id'])
             return True
         
         # Verificar si el usuario está en una familia
-        print(f"Verificando si el usuario {telegram_id} está en una familia con la API")
+        logger.debug("Verificando si el usuario %s está en una familia con la API", telegram_id)
         try:
             # Guardar el ID de Telegram en el contexto para usarlo como identificación
             context.user_data["telegram_id"] = telegram_id
             
             # Obtener información del miembro directamente
-            status_code, response = MemberService.get_member(telegram_id)
+            status_code, response = await MemberService.get_member(telegram_id)
             
-            print(f"Respuesta de get_member: status_code={status_code}, response={response}")
+            logger.debug("Respuesta de get_member: status_code=%s, response=%s", status_code, response)
             
             if status_code == 200 and response and response.get("family_id"):
                 # Guardar el ID de la familia en el contexto
                 family_id = response.get("family_id")
                 context.user_data["family_id"] = family_id
-                print(f"ID de familia guardado en el contexto: {family_id}")
+                logger.debug("ID de familia guardado en el contexto: %s", family_id)
                 return True
             
-            print("Usuario no está en ninguna familia según la API")
+            logger.debug("Usuario no está en ninguna familia según la API")
             return False
         except Exception as e:
-            print(f"Error en check_user_in_family: {str(e)}")
-            traceback.print_exc()
+            logger.exception("Error en check_user_in_family: %s", e)
             return False
     
     @staticmethod
@@ -59,31 +60,31 @@ class ContextManager:
         Returns:
             bool: True si se cargaron los miembros correctamente, False en caso contrario
         """
-        print(f"Cargando miembros de la familia {family_id}")
+        logger.debug("Cargando miembros de la familia %s", family_id)
         
         try:
             # Obtener el ID de Telegram del contexto
             telegram_id = context.user_data.get("telegram_id")
             
             # Obtener información de la familia
-            status_code, family = FamilyService.get_family(family_id, telegram_id)
-            print(f"Respuesta de get_family: status_code={status_code}, family={family}")
+            status_code, family = await FamilyService.get_family(family_id, telegram_id)
+            logger.debug("Respuesta de get_family: status_code=%s, family=%s", status_code, family)
             
             if status_code == 200 and family and "members" in family:
                 # Guardar la familia completa en el contexto
                 context.user_data["family_info"] = family
-                print(f"Familia guardada en el contexto: {family}")
+                logger.debug("Familia guardada en el contexto: %s", family)
                 
                 # Crear y guardar un diccionario de ID -> nombre para facilitar la búsqueda
                 member_names = {}
-                print(f"Miembros encontrados: {len(family['members'])}")
+                logger.debug("Miembros encontrados: %s", len(family['members']))
                 
                 for member in family["members"]:
                     member_id = member.get("id", "")
                     member_name = member.get("name", f"Usuario {member_id}")
                     telegram_id = member.get("telegram_id", "")
                     
-                    print(f"Miembro: id={member_id}, name={member_name}, telegram_id={telegram_id}")
+                    logger.debug("Miembro: id=%s, name=%s, telegram_id=%s", member_id, member_name, telegram_id)
                     
                     # Guardar por ID como string (para asegurar compatibilidad)
                     member_names[str(member_id)] = member_name
@@ -100,14 +101,13 @@ class ContextManager:
                         member_names[telegram_id] = member_name
                 
                 context.user_data["member_names"] = member_names
-                print(f"Nombres de miembros guardados en el contexto: {member_names}")
+                logger.debug("Nombres de miembros guardados en el contexto: %s", member_names)
                 return True
             else:
-                print(f"Error al cargar miembros: status_code={status_code}, family={family}")
+                logger.error("Error al cargar miembros: status_code=%s, family=%s", status_code, family)
                 return False
         except Exception as e:
-            print(f"Error en load_family_members: {str(e)}")
-            traceback.print_exc()
+            logger.exception("Error en load_family_members: %s", e)
             return False
     
     @staticmethod
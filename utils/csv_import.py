@@ -0,0 +1,235 @@
+import asyncio
+import codecs
+import csv
+import os
+import re
+import unicodedata
+import httpx
+
+# Bytes que se leen del archivo en cada paso
+CHUNK_SIZE = 64 * 1024
+
+# Tamaño máximo de un registro (una fila, que puede ocupar varias líneas si
+# tiene campos entre comillas)
+MAX_RECORD_SIZE = 1024 * 1024
+
+# Filas del principio del archivo en las que se busca la cabecera (los
+# extractos bancarios suelen empezar con datos de la cuenta)
+HEADER_SEARCH_ROWS = 20
+
+# Nombres de columna reconocidos (sin tildes, en minúsculas y sin espacios)
+DEBIT_COLUMNS = ("cargo", "cargos", "debito", "debitos", "debit", "debits", "retiro", "retiros", "egreso", "egresos")
+# Columnas que solo tienen los extractos bancarios: con ellas los montos
+# negativos son cargos y los positivos ingresos
+STATEMENT_COLUMNS = (
+    "abono", "abonos", "credito", "creditos", "credit", "credits", "deposito", "depositos",
+    "ingreso", "ingresos", "saldo", "saldos", "saldodisponible", "saldocontable", "balance"
+)
+AMOUNT_COLUMNS = ("monto", "importe", "amount", "valor", "cantidad", "total", "precio", "price")
+DESCRIPTION_COLUMNS = (
+    "descripcion", "description", "concepto", "detalle", "glosa", "memo", "movimiento",
+    "comercio", "referencia", "nombre", "gasto", "name", "payee"
+)
+PAYER_COLUMNS = ("pagadopor", "pagador", "pagado", "quienpago", "quien", "payer", "paidby")
+
+class CsvImportError(Exception):
+    """El archivo no se puede importar (formato o columnas no reconocidas)."""
+
+def _normalize(name):
+    """Nombre de columna sin tildes, mayúsculas, espacios ni signos."""
+    text = unicodedata.normalize("NFKD", str(name)).encode("ascii", "ignore").decode()
+    return re.sub(r"[^a-z0-9]", "", text.lower())
+
+def parse_csv_amount(text):
+    """Convierte un monto de una hoja de cálculo o un extracto en un número.
+
+    Admite símbolos de moneda, signo, paréntesis para negativos y los
+    separadores de miles y decimales habituales ("1.234,56" y "1,234.56").
+
+    Returns:
+        float: El monto (puede ser negativo), o None si no es un número
+    """
+    value = str(text).strip()
+    negative = value.startswith("(") and value.endswith(")")
+    value = re.sub(r"[^0-9,.\-]", "", value)
+    if not value or not re.search(r"\d", value):
+        return None
+    if "," in value and "." in value:
+        # El último separador es el decimal
+        if value.rfind(",") > value.rfind("."):
+            value = value.replace(".", "").replace(",", ".")
+        else:
+            value = value.replace(",", "")
+    elif "," in value:
+        # Una sola coma seguida de 1 o 2 cifras es decimal; si no, separa miles
+        integer, _, decimals = value.rpartition(",")
+        if value.count(",") == 1 and len(decimals) <= 2:
+            value = f"{integer}.{decimals}"
+        else:
+            value = value.replace(",", "")
+    try:
+        amount = float(value)
+    except ValueError:
+        return None
+    return -abs(amount) if negative else amount
+
+class ColumnMapping:
+    """Columnas del archivo que corresponden a cada campo del gasto."""
+
+    def __init__(self, amount, description, payer=None, debit=False, statement=None):
+        self.amount = amount
+        self.description = description
+        self.payer = payer
+        # True si la columna del monto solo contiene cargos (extracto bancario)
+        self.debit = debit
+        # True si la cabecera es la de un extracto (los gastos son los montos
+        # negativos); None si la cabecera no lo indica
+        self.statement = True if debit else statement
+
+    @staticmethod
+    def from_header(row):
+        """Reconoce una fila de cabecera.
+
+        Returns:
+            ColumnMapping: Las columnas encontradas, o None si la fila no
+                tiene al menos una columna de monto y otra de descripción
+        """
+        names = [_normalize(cell) for cell in row]
+
+        def find(candidates):
+            for candidate in candidates:
+                if candidate in names:
+                    return names.index(candidate)
+            return None
+
+        debit = find(DEBIT_COLUMNS)
+        amount = debit if debit is not None else find(AMOUNT_COLUMNS)
+        description = find(DESCRIPTION_COLUMNS)
+        if amount is None or description is None or amount == description:
+            return None
+        statement = True if find(STATEMENT_COLUMNS) is not None else None
+        return ColumnMapping(amount, description, find(PAYER_COLUMNS), debit is not None, statement)
+
+async def iter_file_chunks(file, chunk_size=CHUNK_SIZE):
+    """Lee un archivo de Telegram por partes, sin cargarlo entero en memoria.
+
+    Args:
+        file: telegram.File obtenido con get_file()
+        chunk_size: Bytes por parte
+
+    Yields:
+        bytes: Cada parte del archivo
+    """
+    if not file.file_path.startswith(("http://", "https://")):
+        # Servidor local de la Bot API: el archivo ya está en disco
+        loop = asyncio.get_running_loop()
+        with open(file.file_path, "rb") as f:
+            while True:
+                chunk = await loop.run_in_executor(None, f.read, chunk_size)
+                if not chunk:
+                    return
+                yield chunk
+    else:
+        async with httpx.AsyncClient(timeout=httpx.Timeout(30.0)) as client:
+            async with client.stream("GET", file.file_path) as response:
+                response.raise_for_status()
+                async for chunk in response.aiter_bytes(chunk_size):
+                    yield chunk
+
+async def iter_csv_rows(chunks):
+    """Convierte las partes de un CSV en filas, a medida que llegan.
+
+    El separador (coma, punto y coma, tabulador o barra) se detecta con la
+    primera parte. El archivo se lee como UTF-8 y, en cuanto una parte no
+    lo es, como Windows-1252 (un archivo de Excel puede empezar solo con
+    caracteres ASCII y tener las tildes más adelante). Los saltos de línea
+    dentro de un campo entre comillas se respetan: solo se procesan los
+    registros completos de cada parte.
+
+    Args:
+        chunks: Iterador asíncrono de bytes
+
+    Yields:
+        list: Filas de la parte recibida, cada una como (número de fila, campos)
+    """
+    dialect = None
+    pending = ""
+    row_number = 0
+
+    def decode(chunk, final=False):
+        nonlocal decoder
+        try:
+            return decoder.decode(chunk, final)
+        except UnicodeDecodeError:
+            # No es UTF-8: seguir en Windows-1252 desde los bytes aún sin decodificar
+            buffered = decoder.getstate()[0]
+            decoder = codecs.getincrementaldecoder("cp1252")(errors="replace")
+            return decoder.decode(buffered + chunk, final)
+
+    decoder = codecs.getincrementaldecoder("utf-8-sig")()
+    async for chunk in chunks:
+        text = pending + decode(chunk)
+
+        if dialect is None:
+            try:
+                dialect = csv.Sniffer().sniff(text[:CHUNK_SIZE], delimiters=",;\t|")
+            except csv.Error:
+                dialect = csv.excel
+
+        # Cada registro está completo, así que el lector devuelve una fila por registro
+        records, pending = _split_records(text, dialect)
+        if len(pending) > MAX_RECORD_SIZE:
+            raise CsvImportError(
+                f"❌ La fila {row_number + len(records) + 1} es demasiado larga o tiene una comilla sin cerrar."
+            )
+        rows = list(enumerate(csv.reader(records, dialect), start=row_number + 1))
+        row_number += len(rows)
+        if rows:
+            yield rows
+
+    pending += decode(b"", final=True)
+    if pending.strip():
+        yield [(row_number + 1, row) for row in csv.reader([pending], dialect or csv.excel)]
+
+def _split_records(text, dialect):
+    """Separa los registros completos del texto y devuelve también el resto.
+
+    Un salto de línea termina el registro salvo dentro de un campo entre
+    comillas. Como en el módulo csv, un campo solo va entre comillas si
+    empieza por una: una comilla en medio de un campo (`pizza 12" grande`)
+    es un carácter más.
+    """
+    records = []
+    start = 0
+    field_start = 0
+    quoted = False
+    # Posición de la última comilla que cerró un campo: otra justo detrás
+    # es una comilla escapada ("") y el campo sigue entre comillas
+    closed = -2
+    quote = dialect.quotechar or '"'
+    pattern = f"[{re.escape(dialect.delimiter)}{re.escape(quote)}\n]"
+    for match in re.finditer(pattern, text):
+        char, position = match.group(), match.start()
+        if char == quote:
+            if quoted:
+                quoted = False
+                closed = position
+            elif position == closed + 1 or position == field_start or (
+                dialect.skipinitialspace and not text[field_start:position].strip(" ")
+            ):
+                quoted = True
+        elif quoted:
+            continue
+        elif char == "\n":
+            records.append(text[start:position + 1])
+            start = field_start = position + 1
+        else:
+            field_start = position + 1
+    return records, text[start:]
+
+def is_csv_document(file_name, mime_type):
+    """Indica si un documento parece un CSV por su extensión o su tipo MIME."""
+    extension = os.path.splitext(file_name or "")[1].lower()
+    return extension in (".csv", ".tsv", ".txt") or mime_type in (
+        "text/csv", "text/comma-separated-values", "text/tab-separated-values", "text/plain"
+    )
@@ -1,7 +1,25 @@
+import asyncio
+import logging
+import math
 import qrcode
+from collections import OrderedDict
 from io import BytesIO
 from telegram import Update
+from telegram.error import BadRequest
 from telegram.ext import ContextTypes
+import config
+from utils.render_executor import RenderExecutor, RenderQueueFull
+
+logger = logging.getLogger(__name__)
+
+# Número de imágenes QR que se mantienen en memoria
+QR_CACHE_SIZE = getattr(config, "QR_CACHE_SIZE", 256)
+
+# Número máximo de file_id de Telegram guardados en bot_data
+QR_FILE_ID_MAX = getattr(config, "QR_FILE_ID_MAX", 10000)
+
+# Imágenes QR ya generadas: datos -> bytes PNG
+_qr_cache = OrderedDict()
 
 async def send_error(update: Update, context: ContextTypes.DEFAULT_TYPE, message: str):
     """Envía un mensaje de error al usuario.
@@ -13,15 +31,95 @@ async def send_error(update: Update, context: ContextTypes.DEFAULT_TYPE, message
     """
     await update.message.reply_text(f"❌ Error: {message}")
 
-def create_qr_code(data):
+def parse_amount(text):
+    """Convierte un monto escrito por el usuario en un número.
+    
+    Acepta coma o punto decimal y el símbolo $ (por ejemplo "$25,50").
+    
+    Args:
+        text: Texto con el monto
+        
+    Returns:
+        float: El monto, o None si no es un número positivo
+    """
+    try:
+        amount = float(text.replace(',', '.').replace('$', '').strip())
+    except (AttributeError, ValueError):
+        return None
+    if not math.isfinite(amount) or amount <= 0:
+        return None
+    return amount
+
+def find_members_by_name(members, name):
+    """Busca miembros por nombre, sin distinguir mayúsculas ni la @ inicial.
+    
+    Primero por nombre completo y, si no hay ninguno, por el comienzo del
+    nombre (por ejemplo "ana" encuentra a "Ana María").
+    
+    Args:
+        members: Miembros de la familia (dicts con "name")
+        name: Nombre escrito por el usuario, por ejemplo "@ana"
+        
+    Returns:
+        list: Miembros que coinciden
+    """
+    wanted = name.lstrip("@").strip().casefold()
+    exact = [m for m in members if str(m.get("name", "")).casefold() == wanted]
+    if exact or not wanted:
+        return exact
+    return [m for m in members if str(m.get("name", "")).casefold().startswith(wanted)]
+
+async def gather_api_calls(*calls):
+    """Ejecuta a la vez varias llamadas independientes a los servicios.
+    
+    El tiempo total es el de la llamada más lenta en lugar de la suma. Si una
+    llamada lanza una excepción, su resultado se convierte en un error
+    (500, {"error": ...}) y el resto de resultados se pueden usar igualmente.
+    
+    Args:
+        calls: Corrutinas que devuelven (status_code, response)
+        
+    Returns:
+        list: Un (status_code, response) por llamada, en el mismo orden
+    """
+    results = await asyncio.gather(*calls, return_exceptions=True)
+    for i, result in enumerate(results):
+        if isinstance(result, Exception):
+            logger.error("Error en una llamada concurrente: %s", result, exc_info=result)
+            results[i] = (500, {"error": f"Error inesperado: {result}"})
+    return results
+
+async def create_qr_code(data):
     """Crea un código QR con los datos proporcionados.
     
+    La imagen se genera en el RenderExecutor, sin bloquear el bucle de
+    eventos, y se cachea en memoria (LRU de QR_CACHE_SIZE entradas), así que
+    repetir los mismos datos no vuelve a generar el PNG.
+    
     Args:
         data: Datos para el código QR
         
     Returns:
         BytesIO: Objeto con la imagen del código QR
+        
+    Raises:
+        RenderQueueFull: Si hay demasiadas imágenes pendientes de generar
     """
+    png = _qr_cache.get(data)
+    if png is None:
+        png = await RenderExecutor.run(render_qr_png, data)
+        _qr_cache[data] = png
+        while len(_qr_cache) > QR_CACHE_SIZE:
+            _qr_cache.popitem(last=False)
+    else:
+        _qr_cache.move_to_end(data)
+    
+    bio = BytesIO(png)
+    bio.name = 'codigo_qr.png'  # Nombre "ficticio" para el archivo
+    return bio
+
+def render_qr_png(data):
+    """Genera el PNG de un código QR y devuelve sus bytes."""
     # Crear un objeto QR
     qr = qrcode.QRCode(
         version=1,               # Controla el tamaño del QR (1 es el más pequeño)
@@ -38,11 +136,50 @@ def create_qr_code(data):
     img = qr.make_image(fill_color="black", back_color="white")
 
     bio = BytesIO()
-    bio.name = 'codigo_qr.png'  # Nombre "ficticio" para el archivo
     img.save(bio, 'PNG')
-    bio.seek(0)
+    return bio.getvalue()
 
-    return bio
+async def reply_with_qr_code(update: Update, context: ContextTypes.DEFAULT_TYPE, data, caption):
+    """Responde con la imagen del código QR de `data`.
+    
+    La primera vez se sube la imagen y se guarda en bot_data el file_id que
+    devuelve Telegram; las siguientes se envía ese file_id, sin generar ni
+    subir de nuevo la imagen.
+    
+    Args:
+        update: Objeto Update de Telegram
+        context: Contexto de Telegram
+        data: Datos para el código QR
+        caption: Texto de la imagen
+    """
+    file_ids = context.bot_data.setdefault("qr_file_ids", {})
+    
+    file_id = file_ids.get(data)
+    if file_id:
+        try:
+            return await update.message.reply_photo(photo=file_id, caption=caption)
+        except BadRequest as e:
+            # El file_id ya no es válido: volver a subir la imagen
+            logger.warning("No se pudo reutilizar el QR guardado: %s", e)
+            file_ids.pop(data, None)
+    
+    try:
+        photo = await create_qr_code(data)
+    except RenderQueueFull as e:
+        # Sin capacidad para generar la imagen: enviar solo el texto
+        logger.warning("No se generó el QR: %s", e)
+        text = caption if data in caption else f"{caption}\n\n{data}"
+        return await update.message.reply_text(text)
+    
+    message = await update.message.reply_photo(photo=photo, caption=caption)
+    
+    if message and message.photo:
+        file_ids[data] = message.photo[-1].file_id
+        # Descartar los más antiguos si se supera el límite
+        while len(file_ids) > QR_FILE_ID_MAX:
+            del file_ids[next(iter(file_ids))]
+    
+    return message
 
 def parse_deep_link(args):
     """Parsea los argumentos de un enlace profundo.
@@ -0,0 +1,129 @@
+import contextvars
+import functools
+import logging
+import time
+from telegram.ext import ConversationHandler
+from telegram.request import HTTPXRequest
+from utils.metrics import Metrics
+
+logger = logging.getLogger(__name__)
+
+# Estadísticas del manejador que se está ejecutando en la tarea actual
+_current = contextvars.ContextVar("handler_stats", default=None)
+
+class HandlerStats:
+    """Llamadas a la API y a Telegram hechas durante una ejecución de un manejador."""
+
+    __slots__ = ("api_calls", "api_seconds", "telegram_calls", "telegram_seconds")
+
+    def __init__(self):
+        self.api_calls = 0
+        self.api_seconds = 0.0
+        self.telegram_calls = 0
+        self.telegram_seconds = 0.0
+
+def record_api_call(seconds):
+    """Suma una llamada a la API al manejador en curso (si lo hay)."""
+    stats = _current.get()
+    if stats is not None:
+        stats.api_calls += 1
+        stats.api_seconds += seconds
+
+def handler_name(callback):
+    """Nombre del manejador para las métricas, por ejemplo "expense_handler.crear_gasto"."""
+    module = getattr(callback, "__module__", "") or ""
+    return f"{module.rsplit('.', 1)[-1]}.{getattr(callback, '__name__', 'handler')}"
+
+def instrument(callback, name=None):
+    """Envuelve un manejador para medir su ejecución.
+
+    Métricas (con la etiqueta handler):
+        handler_seconds: Duración de cada ejecución (histograma)
+        handler_calls: Ejecuciones
+        handler_errors: Ejecuciones que lanzaron una excepción (etiqueta error)
+        handler_api_calls, handler_api_seconds: Llamadas a la API y tiempo
+            total esperándolas
+        handler_telegram_calls, handler_telegram_seconds: Llamadas a
+            Telegram (mensajes enviados, respuestas a botones...) y tiempo
+            total esperándolas
+
+    Las llamadas se atribuyen al manejador por la tarea en la que se hacen
+    (contextvars), así que no hace falta pasar nada a los servicios.
+    """
+    if getattr(callback, "__instrumented__", False):
+        return callback
+    name = name or handler_name(callback)
+
+    @functools.wraps(callback)
+    async def wrapper(update, context):
+        stats = HandlerStats()
+        token = _current.set(stats)
+        start = time.monotonic()
+        try:
+            return await callback(update, context)
+        except Exception as e:
+            Metrics.inc("handler_errors", handler=name, error=type(e).__name__)
+            raise
+        finally:
+            _current.reset(token)
+            elapsed = time.monotonic() - start
+            Metrics.inc("handler_calls", handler=name)
+            Metrics.observe("handler_seconds", elapsed, handler=name)
+            if stats.api_calls:
+                Metrics.inc("handler_api_calls", stats.api_calls, handler=name)
+                Metrics.inc("handler_api_seconds", stats.api_seconds, handler=name)
+            if stats.telegram_calls:
+                Metrics.inc("handler_telegram_calls", stats.telegram_calls, handler=name)
+                Metrics.inc("handler_telegram_seconds", stats.telegram_seconds, handler=name)
+            logger.debug(
+                "%s: %.1f ms, %s llamadas a la API (%.1f ms), %s a Telegram (%.1f ms)",
+                name, elapsed * 1000, stats.api_calls, stats.api_seconds * 1000,
+                stats.telegram_calls, stats.telegram_seconds * 1000
+            )
+
+    wrapper.__instrumented__ = True
+    return wrapper
+
+def instrument_handlers(application):
+    """Instrumenta todos los manejadores registrados en la aplicación.
+
+    Incluye los puntos de entrada, estados y fallbacks de los
+    ConversationHandler. Debe llamarse después de registrar los manejadores.
+    """
+    def visit(handler):
+        if isinstance(handler, ConversationHandler):
+            for inner in handler.entry_points + handler.fallbacks:
+                visit(inner)
+            for handlers in handler.states.values():
+                for inner in handlers:
+                    visit(inner)
+        elif getattr(handler, "callback", None) is not None:
+            handler.callback = instrument(handler.callback)
+
+    for handlers in application.handlers.values():
+        for handler in handlers:
+            visit(handler)
+
+class InstrumentedRequest(HTTPXRequest):
+    """Cliente de la Bot API de Telegram que mide cada llamada.
+
+    Métricas (con la etiqueta method, por ejemplo "sendMessage"):
+        telegram_request_seconds: Duración de cada llamada (histograma)
+        telegram_errors: Llamadas que lanzaron una excepción
+    """
+
+    async def do_request(self, url, method, request_data=None, **kwargs):
+        api_method = url.rsplit("/", 1)[-1]
+        start = time.monotonic()
+        try:
+            return await super().do_request(url, method, request_data, **kwargs)
+        except Exception as e:
+            Metrics.inc("telegram_errors", method=api_method, error=type(e).__name__)
+            raise
+        finally:
+            elapsed = time.monotonic() - start
+            Metrics.observe("telegram_request_seconds", elapsed, method=api_method)
+            stats = _current.get()
+            if stats is not None:
+                stats.telegram_calls += 1
+                stats.telegram_seconds += elapsed
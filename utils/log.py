@@ -0,0 +1,68 @@
+import json
+import logging
+import sys
+import threading
+from datetime import datetime, timezone
+
+class JsonFormatter(logging.Formatter):
+    """Formatea cada registro como una línea JSON."""
+
+    def format(self, record):
+        entry = {
+            "time": datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage()
+        }
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+class SamplingFilter(logging.Filter):
+    """Deja pasar solo 1 de cada `rate` registros DEBUG de cada línea.
+
+    Las líneas se identifican por el logger y la plantilla del mensaje (sin
+    formatear), así que una línea que se repite en un bucle se muestrea sin
+    afectar a las demás. Los niveles INFO y superiores no se muestrean.
+    """
+
+    def __init__(self, rate=1):
+        super().__init__()
+        self.rate = max(1, int(rate))
+        self._counts = {}
+        self._lock = threading.Lock()
+
+    def filter(self, record):
+        if self.rate == 1 or record.levelno > logging.DEBUG:
+            return True
+        key = (record.name, record.msg)
+        with self._lock:
+            count = self._counts.get(key, 0)
+            self._counts[key] = count + 1
+        return count % self.rate == 0
+
+def setup_logging(level="INFO", json_output=False, debug_sample_rate=1):
+    """Configura el logging del bot.
+
+    Los módulos usan `logging.getLogger(__name__)` y mensajes con
+    argumentos (`logger.debug("Datos: %s", data)`), de modo que con un nivel
+    superior a DEBUG las líneas suprimidas no llegan a formatearse.
+
+    Args:
+        level: Nivel mínimo ("DEBUG", "INFO", "WARNING"...)
+        json_output: Si es True, cada línea se escribe como JSON
+        debug_sample_rate: Escribir solo 1 de cada N líneas DEBUG repetidas
+    """
+    handler = logging.StreamHandler(sys.stdout)
+    if json_output:
+        handler.setFormatter(JsonFormatter())
+    else:
+        handler.setFormatter(logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s'))
+    handler.addFilter(SamplingFilter(debug_sample_rate))
+
+    root = logging.getLogger()
+    root.handlers[:] = [handler]
+    root.setLevel(level)
+
+    # httpx registra cada solicitud a la API con nivel INFO
+    logging.getLogger("httpx").setLevel(logging.WARNING)
@@ -0,0 +1,146 @@
+import threading
+
+# Límites superiores (segundos) de los intervalos de los histogramas
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+class Histogram:
+    """Distribución de valores observados, con intervalos acumulados."""
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * len(self.buckets)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, value):
+        self.count += 1
+        self.sum += value
+        self.max = max(self.max, value)
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+
+    def snapshot(self):
+        return {
+            "count": self.count,
+            "sum": self.sum,
+            "avg": self.sum / self.count if self.count else 0.0,
+            "max": self.max,
+            "buckets": dict(zip(self.buckets, self.counts))
+        }
+
+class Metrics:
+    """Registro en memoria de las métricas del bot.
+
+    Cada métrica se identifica por su nombre y, opcionalmente, por etiquetas
+    (por ejemplo `handler="show_balances"`). Hay contadores, indicadores
+    (valores que suben y bajan) e histogramas.
+    """
+
+    _counters = {}
+    _gauges = {}
+    _histograms = {}
+    _lock = threading.Lock()
+
+    @staticmethod
+    def _key(name, labels):
+        return (name, tuple(sorted(labels.items())))
+
+    @staticmethod
+    def inc(name, value=1, **labels):
+        """Incrementa un contador."""
+        key = Metrics._key(name, labels)
+        with Metrics._lock:
+            Metrics._counters[key] = Metrics._counters.get(key, 0) + value
+
+    @staticmethod
+    def set_gauge(name, value, **labels):
+        """Fija el valor de un indicador."""
+        with Metrics._lock:
+            Metrics._gauges[Metrics._key(name, labels)] = value
+
+    @staticmethod
+    def add_gauge(name, value, **labels):
+        """Suma `value` (puede ser negativo) a un indicador."""
+        key = Metrics._key(name, labels)
+        with Metrics._lock:
+            Metrics._gauges[key] = Metrics._gauges.get(key, 0) + value
+
+    @staticmethod
+    def observe(name, value, **labels):
+        """Registra un valor en un histograma."""
+        key = Metrics._key(name, labels)
+        with Metrics._lock:
+            histogram = Metrics._histograms.get(key)
+            if histogram is None:
+                histogram = Metrics._histograms[key] = Histogram()
+            histogram.observe(value)
+
+    @staticmethod
+    def get(name, **labels):
+        """Obtiene el valor actual de un contador o indicador (0 si no existe)."""
+        key = Metrics._key(name, labels)
+        with Metrics._lock:
+            return Metrics._counters.get(key, Metrics._gauges.get(key, 0))
+
+    @staticmethod
+    def snapshot():
+        """Devuelve una copia de todas las métricas.
+
+        Returns:
+            dict: {"counters": ..., "gauges": ..., "histograms": ...} con
+                claves (nombre, etiquetas)
+        """
+        with Metrics._lock:
+            return {
+                "counters": dict(Metrics._counters),
+                "gauges": dict(Metrics._gauges),
+                "histograms": {key: h.snapshot() for key, h in Metrics._histograms.items()}
+            }
+
+    @staticmethod
+    def render_prometheus():
+        """Devuelve todas las métricas en el formato de texto de Prometheus.
+
+        Los histogramas se exportan como `nombre_bucket{le="..."}`,
+        `nombre_sum` y `nombre_count`.
+        """
+        snapshot = Metrics.snapshot()
+        lines = []
+
+        def labels_text(labels, extra=()):
+            pairs = [
+                '{}="{}"'.format(name, str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n"))
+                for name, value in tuple(labels) + tuple(extra)
+            ]
+            return "{" + ",".join(pairs) + "}" if pairs else ""
+
+        for kind, values in (("counter", snapshot["counters"]), ("gauge", snapshot["gauges"])):
+            declared = set()
+            for (name, labels), value in sorted(values.items(), key=lambda item: (item[0][0], str(item[0][1]))):
+                if name not in declared:
+                    lines.append(f"# TYPE {name} {kind}")
+                    declared.add(name)
+                lines.append(f"{name}{labels_text(labels)} {value}")
+
+        declared = set()
+        for (name, labels), h in sorted(snapshot["histograms"].items(), key=lambda item: (item[0][0], str(item[0][1]))):
+            if name not in declared:
+                lines.append(f"# TYPE {name} histogram")
+                declared.add(name)
+            for bound, count in h["buckets"].items():
+                lines.append(f"{name}_bucket{labels_text(labels, (('le', bound),))} {count}")
+            lines.append(f"{name}_bucket{labels_text(labels, (('le', '+Inf'),))} {h['count']}")
+            lines.append(f"{name}_sum{labels_text(labels)} {h['sum']}")
+            lines.append(f"{name}_count{labels_text(labels)} {h['count']}")
+
+        return "\n".join(lines) + "\n"
+
+    @staticmethod
+    def reset():
+        """Elimina todas las métricas."""
+        with Metrics._lock:
+            Metrics._counters.clear()
+            Metrics._gauges.clear()
+            Metrics._histograms.clear()
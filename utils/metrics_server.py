@@ -0,0 +1,126 @@
+import asyncio
+import logging
+import config
+from utils.metrics import Metrics
+
+logger = logging.getLogger(__name__)
+
+# Puerto local en el que se sirven las métricas (None para no servirlas)
+METRICS_PORT = getattr(config, "METRICS_PORT", None)
+METRICS_LISTEN = getattr(config, "METRICS_LISTEN", "127.0.0.1")
+
+# Segundos entre resúmenes de los manejadores en el log (None para no escribirlos)
+METRICS_LOG_INTERVAL = getattr(config, "METRICS_LOG_INTERVAL", None)
+
+class MetricsExporter:
+    """Expone las métricas del bot fuera del proceso.
+
+    - Con METRICS_PORT, un servidor HTTP local responde a `GET /metrics`
+      con todas las métricas en el formato de texto de Prometheus.
+    - Con METRICS_LOG_INTERVAL, cada ese número de segundos se escribe en
+      el log un resumen por manejador (ejecuciones, duración, llamadas a la
+      API y a Telegram y errores).
+    """
+
+    _server = None
+    _task = None
+
+    @staticmethod
+    async def start(application=None):
+        """Arranca el servidor y el resumen periódico. Se llama en post_init."""
+        if METRICS_PORT and MetricsExporter._server is None:
+            try:
+                MetricsExporter._server = await asyncio.start_server(
+                    MetricsExporter._handle_connection, METRICS_LISTEN, METRICS_PORT
+                )
+                logger.info("Métricas en http://%s:%s/metrics", METRICS_LISTEN, METRICS_PORT)
+            except OSError as e:
+                logger.warning("No se pudo abrir el puerto de métricas %s: %s", METRICS_PORT, e)
+        if METRICS_LOG_INTERVAL and MetricsExporter._task is None:
+            MetricsExporter._task = asyncio.ensure_future(MetricsExporter._log_periodically())
+
+    @staticmethod
+    async def stop(application=None):
+        """Detiene el servidor y el resumen periódico."""
+        if MetricsExporter._task is not None:
+            MetricsExporter._task.cancel()
+            try:
+                await MetricsExporter._task
+            except asyncio.CancelledError:
+                pass
+            MetricsExporter._task = None
+        if MetricsExporter._server is not None:
+            MetricsExporter._server.close()
+            await MetricsExporter._server.wait_closed()
+            MetricsExporter._server = None
+
+    @staticmethod
+    async def _handle_connection(reader, writer):
+        try:
+            request_line = await reader.readline()
+            while True:
+                line = await reader.readline()
+                if line in (b"\r\n", b"\n", b""):
+                    break
+
+            try:
+                method, target, _ = request_line.decode("latin-1").split(" ", 2)
+            except ValueError:
+                method, target = "", ""
+            if method != "GET":
+                status, body = "405 Method Not Allowed", b""
+            elif target.split("?", 1)[0] != "/metrics":
+                status, body = "404 Not Found", b""
+            else:
+                status, body = "200 OK", Metrics.render_prometheus().encode()
+
+            writer.write(
+                f"HTTP/1.1 {status}\r\n"
+                f"Content-Type: text/plain; version=0.0.4; charset=utf-8\r\n"
+                f"Content-Length: {len(body)}\r\n"
+                f"Connection: close\r\n\r\n".encode("latin-1") + body
+            )
+            await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    @staticmethod
+    def summary():
+        """Resumen por manejador, del más lento (de media) al más rápido.
+
+        Returns:
+            list: Líneas de texto, una por manejador
+        """
+        snapshot = Metrics.snapshot()
+        counters = snapshot["counters"]
+        errors = {}
+        for (name, labels), value in counters.items():
+            if name == "handler_errors":
+                handler = dict(labels)["handler"]
+                errors[handler] = errors.get(handler, 0) + value
+
+        rows = []
+        for (name, labels), h in snapshot["histograms"].items():
+            if name != "handler_seconds" or not h["count"]:
+                continue
+            handler = dict(labels)["handler"]
+            key = (("handler", handler),)
+            calls = h["count"]
+            rows.append((h["avg"], (
+                f"{handler}: {calls} ejecuciones, media {h['avg'] * 1000:.1f} ms, máx {h['max'] * 1000:.1f} ms, "
+                f"API {counters.get(('handler_api_calls', key), 0) / calls:.1f} llamadas "
+                f"({counters.get(('handler_api_seconds', key), 0) / calls * 1000:.1f} ms), "
+                f"Telegram {counters.get(('handler_telegram_calls', key), 0) / calls:.1f} llamadas "
+                f"({counters.get(('handler_telegram_seconds', key), 0) / calls * 1000:.1f} ms), "
+                f"{errors.get(handler, 0)} errores"
+            )))
+        return [line for _, line in sorted(rows, reverse=True)]
+
+    @staticmethod
+    async def _log_periodically():
+        while True:
+            await asyncio.sleep(METRICS_LOG_INTERVAL)
+            for line in MetricsExporter.summary():
+                logger.info("Métricas de %s", line)
@@ -0,0 +1,147 @@
+import asyncio
+import json
+import logging
+import pickle
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor
+from telegram.ext import BasePersistence, PersistenceInput
+
+logger = logging.getLogger(__name__)
+
+class SQLitePersistence(BasePersistence):
+    """Persistencia del bot en un archivo SQLite local.
+
+    Cada usuario, chat y conversación ocupa su propia fila, de modo que al
+    guardar solo se escriben las filas que han cambiado desde la última
+    escritura en lugar de serializar todos los datos del bot. Las escrituras
+    se hacen en un hilo dedicado para no bloquear el bucle de eventos.
+    """
+
+    def __init__(self, filepath, store_data: PersistenceInput = None, update_interval: float = 60):
+        """Inicializa la persistencia.
+
+        Args:
+            filepath: Ruta del archivo SQLite
+            store_data: Qué datos se guardan (por defecto todos)
+            update_interval: Segundos entre escrituras periódicas
+        """
+        super().__init__(store_data=store_data, update_interval=update_interval)
+        self.filepath = filepath
+        # Un solo hilo: la conexión SQLite se usa siempre desde el mismo hilo
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="persistence")
+        self._connection = None
+        # Última versión guardada de cada fila, para detectar cambios
+        self._saved = {}
+
+    async def _run(self, func, *args):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, func, *args)
+
+    def _connect(self):
+        if self._connection is None:
+            self._connection = sqlite3.connect(self.filepath)
+            self._connection.execute("PRAGMA journal_mode=WAL")
+            self._connection.execute("PRAGMA synchronous=NORMAL")
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS bot_state ("
+                "kind TEXT NOT NULL, key TEXT NOT NULL, data BLOB NOT NULL, "
+                "PRIMARY KEY (kind, key))"
+            )
+            self._connection.commit()
+        return self._connection
+
+    def _load(self, kind):
+        rows = self._connect().execute(
+            "SELECT key, data FROM bot_state WHERE kind = ?", (kind,)
+        ).fetchall()
+        result = {}
+        for key, data in rows:
+            try:
+                result[key] = pickle.loads(data)
+            except Exception as e:
+                logger.warning("No se pudo cargar %s/%s de la persistencia: %s", kind, key, e)
+                continue
+            self._saved[(kind, key)] = data
+        return result
+
+    def _write(self, kind, key, data):
+        connection = self._connect()
+        if data is None:
+            connection.execute("DELETE FROM bot_state WHERE kind = ? AND key = ?", (kind, key))
+        else:
+            connection.execute(
+                "INSERT OR REPLACE INTO bot_state (kind, key, data) VALUES (?, ?, ?)",
+                (kind, key, data)
+            )
+        connection.commit()
+
+    async def _save(self, kind, key, value):
+        """Guarda una fila solo si su contenido ha cambiado."""
+        data = None if value is None else pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        if self._saved.get((kind, key)) == data:
+            return
+        if data is None:
+            self._saved.pop((kind, key), None)
+        else:
+            self._saved[(kind, key)] = data
+        await self._run(self._write, kind, key, data)
+
+    async def get_user_data(self):
+        rows = await self._run(self._load, "user_data")
+        return {int(key): value for key, value in rows.items()}
+
+    async def get_chat_data(self):
+        rows = await self._run(self._load, "chat_data")
+        return {int(key): value for key, value in rows.items()}
+
+    async def get_bot_data(self):
+        rows = await self._run(self._load, "bot_data")
+        return rows.get("bot_data", {})
+
+    async def get_callback_data(self):
+        rows = await self._run(self._load, "callback_data")
+        return rows.get("callback_data")
+
+    async def get_conversations(self, name):
+        rows = await self._run(self._load, f"conversation:{name}")
+        return {tuple(json.loads(key)): state for key, state in rows.items()}
+
+    async def update_user_data(self, user_id, data):
+        await self._save("user_data", str(user_id), data)
+
+    async def update_chat_data(self, chat_id, data):
+        await self._save("chat_data", str(chat_id), data)
+
+    async def update_bot_data(self, data):
+        await self._save("bot_data", "bot_data", data)
+
+    async def update_callback_data(self, data):
+        await self._save("callback_data", "callback_data", data)
+
+    async def update_conversation(self, name, key, new_state):
+        await self._save(f"conversation:{name}", json.dumps(list(key)), new_state)
+
+    async def drop_user_data(self, user_id):
+        await self._save("user_data", str(user_id), None)
+
+    async def drop_chat_data(self, chat_id):
+        await self._save("chat_data", str(chat_id), None)
+
+    async def refresh_user_data(self, user_id, user_data):
+        pass
+
+    async def refresh_chat_data(self, chat_id, chat_data):
+        pass
+
+    async def refresh_bot_data(self, bot_data):
+        pass
+
+    async def flush(self):
+        """Cierra la conexión al apagar el bot."""
+        def close():
+            if self._connection is not None:
+                self._connection.close()
+                self._connection = None
+
+        await self._run(close)
+        self._executor.shutdown(wait=True)
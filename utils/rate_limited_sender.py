@@ -0,0 +1,106 @@
+import asyncio
+import logging
+import time
+from telegram.error import BadRequest, Forbidden, RetryAfter, TelegramError
+from utils.metrics import Metrics
+
+logger = logging.getLogger(__name__)
+
+# Intentos por mensaje cuando Telegram responde RetryAfter o falla la red
+MAX_ATTEMPTS = 3
+
+class RateLimitedSender:
+    """Cola acotada de mensajes que se envían a un ritmo máximo.
+
+    Telegram limita los mensajes de un bot a unos 30 por segundo; los envíos
+    masivos (como los resúmenes periódicos) pasan por esta cola para no
+    superarlo y no quitar capacidad a las respuestas a los usuarios.
+
+    - put() espera si la cola está llena, de modo que quien genera los
+      mensajes avanza al ritmo del envío y la memoria usada no crece con el
+      número de destinatarios.
+    - Los envíos se reparten a `rate` por segundo, con hasta `concurrency`
+      en curso para que la latencia de Telegram no reduzca el ritmo.
+    - Si Telegram responde RetryAfter, todos los envíos se pausan el tiempo
+      indicado y el mensaje se reintenta. Los chats bloqueados o inexistentes
+      (Forbidden, BadRequest) se cuentan como fallidos y no se reintentan.
+    """
+
+    def __init__(self, bot, rate=25, concurrency=8, max_queue=100, name="sender"):
+        self.bot = bot
+        self.name = name
+        self.sent = 0
+        self.failed = 0
+        self._interval = 1.0 / rate
+        self._queue = asyncio.Queue(maxsize=max_queue)
+        self._slots = asyncio.Semaphore(concurrency)
+        self._paused_until = 0.0
+        self._tasks = set()
+        self._worker = None
+
+    async def start(self):
+        """Arranca el envío de los mensajes de la cola."""
+        if self._worker is None:
+            self._worker = asyncio.ensure_future(self._run())
+
+    async def put(self, chat_id, text, **kwargs):
+        """Añade un mensaje a la cola (espera si está llena).
+
+        Args:
+            chat_id: Chat de destino
+            text: Texto del mensaje
+            **kwargs: Otros argumentos de bot.send_message (parse_mode, ...)
+        """
+        await self._queue.put((chat_id, text, kwargs))
+
+    async def close(self):
+        """Espera a que se envíen todos los mensajes de la cola y se detiene."""
+        if self._worker is None:
+            return
+        await self._queue.put(None)
+        await self._worker
+        self._worker = None
+        if self._tasks:
+            await asyncio.gather(*self._tasks)
+
+    async def _run(self):
+        next_send = time.monotonic()
+        while True:
+            item = await self._queue.get()
+            if item is None:
+                return
+            await self._slots.acquire()
+            now = time.monotonic()
+            next_send = max(next_send, now, self._paused_until)
+            if next_send > now:
+                await asyncio.sleep(next_send - now)
+            next_send += self._interval
+
+            task = asyncio.ensure_future(self._send(*item))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _send(self, chat_id, text, kwargs):
+        try:
+            for attempt in range(1, MAX_ATTEMPTS + 1):
+                try:
+                    await self.bot.send_message(chat_id=chat_id, text=text, **kwargs)
+                    self.sent += 1
+                    Metrics.inc("bulk_messages", sender=self.name, result="sent")
+                    return
+                except RetryAfter as e:
+                    retry_after = e.retry_after.total_seconds() if hasattr(e.retry_after, "total_seconds") else e.retry_after
+                    logger.warning("Telegram pide esperar %s s antes de seguir enviando (%s)", retry_after, self.name)
+                    self._paused_until = max(self._paused_until, time.monotonic() + retry_after)
+                    await asyncio.sleep(retry_after)
+                except (Forbidden, BadRequest) as e:
+                    # El usuario bloqueó el bot o el chat ya no existe
+                    logger.debug("No se pudo enviar a %s: %s", chat_id, e)
+                    break
+                except TelegramError as e:
+                    logger.warning("Error al enviar a %s (intento %s de %s): %s", chat_id, attempt, MAX_ATTEMPTS, e)
+                    await asyncio.sleep(self._interval * 2 ** attempt)
+            self.failed += 1
+            Metrics.inc("bulk_messages", sender=self.name, result="failed")
+        finally:
+            self._slots.release()
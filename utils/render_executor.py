@@ -0,0 +1,116 @@
+import asyncio
+import logging
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+import config
+from utils.metrics import Metrics
+
+logger = logging.getLogger(__name__)
+
+# "process" para trabajo que usa la CPU en Python puro, "thread" si el
+# trabajo libera el GIL o no se pueden usar procesos
+RENDER_EXECUTOR = getattr(config, "RENDER_EXECUTOR", "process")
+
+# Renderizados que se ejecutan a la vez
+RENDER_WORKERS = getattr(config, "RENDER_WORKERS", 2)
+
+# Renderizados que pueden esperar turno; por encima se rechazan
+RENDER_MAX_QUEUE = getattr(config, "RENDER_MAX_QUEUE", 64)
+
+class RenderQueueFull(Exception):
+    """Hay demasiados renderizados pendientes."""
+
+class RenderExecutor:
+    """Ejecuta trabajo que usa mucha CPU (códigos QR, imágenes) fuera del bucle de eventos.
+
+    Como mucho RENDER_WORKERS tareas se ejecutan a la vez en un pool de
+    procesos o hilos, y como mucho RENDER_MAX_QUEUE esperan su turno. Si la
+    cola está llena, `run` lanza RenderQueueFull en lugar de acumular
+    trabajo, para que el manejador pueda responder sin la imagen.
+
+    Métricas (con la etiqueta task):
+        render_queued: Tareas esperando turno
+        render_running: Tareas en ejecución
+        render_wait_seconds: Tiempo de espera en la cola
+        render_seconds: Tiempo total hasta obtener el resultado
+        render_rejected: Tareas rechazadas por cola llena
+    """
+
+    _pool = None
+    _semaphore = None
+    _pending = 0
+
+    @staticmethod
+    def start():
+        """Crea el pool y arranca sus procesos.
+
+        Debe llamarse al iniciar el bot, antes de que arranquen otros hilos
+        (persistencia, API embebida, cola de creaciones).
+        """
+        pool = RenderExecutor._get_pool()
+        if isinstance(pool, ProcessPoolExecutor):
+            pool.submit(int).result()
+
+    @staticmethod
+    def _get_pool():
+        if RenderExecutor._pool is None:
+            if RENDER_EXECUTOR == "thread":
+                RenderExecutor._pool = ThreadPoolExecutor(max_workers=RENDER_WORKERS, thread_name_prefix="render")
+            else:
+                # Los procesos no se crean con fork: copiar un proceso con
+                # varios hilos puede dejar al hijo bloqueado en un lock que
+                # otro hilo tenía en ese momento
+                method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+                RenderExecutor._pool = ProcessPoolExecutor(
+                    max_workers=RENDER_WORKERS, mp_context=multiprocessing.get_context(method)
+                )
+        return RenderExecutor._pool
+
+    @staticmethod
+    async def run(func, *args):
+        """Ejecuta `func(*args)` en el pool y espera el resultado.
+
+        Con el pool de procesos, `func` debe ser una función de nivel de
+        módulo y sus argumentos y resultado deben poder serializarse.
+
+        Raises:
+            RenderQueueFull: Si ya hay RENDER_MAX_QUEUE tareas esperando
+        """
+        task = getattr(func, "__name__", "render")
+        if RenderExecutor._semaphore is None:
+            RenderExecutor._semaphore = asyncio.Semaphore(RENDER_WORKERS)
+
+        queued = RenderExecutor._pending - RENDER_WORKERS
+        if queued >= RENDER_MAX_QUEUE:
+            Metrics.inc("render_rejected", task=task)
+            raise RenderQueueFull(f"Hay {queued} renderizados pendientes")
+
+        start = time.monotonic()
+        RenderExecutor._pending += 1
+        Metrics.add_gauge("render_queued", 1, task=task)
+        waiting = True
+        try:
+            async with RenderExecutor._semaphore:
+                waiting = False
+                Metrics.add_gauge("render_queued", -1, task=task)
+                Metrics.observe("render_wait_seconds", time.monotonic() - start, task=task)
+                Metrics.add_gauge("render_running", 1, task=task)
+                try:
+                    loop = asyncio.get_running_loop()
+                    return await loop.run_in_executor(RenderExecutor._get_pool(), func, *args)
+                finally:
+                    Metrics.add_gauge("render_running", -1, task=task)
+                    Metrics.observe("render_seconds", time.monotonic() - start, task=task)
+        finally:
+            if waiting:
+                Metrics.add_gauge("render_queued", -1, task=task)
+            RenderExecutor._pending -= 1
+
+    @staticmethod
+    def shutdown():
+        """Cierra el pool al apagar el bot."""
+        if RenderExecutor._pool is not None:
+            RenderExecutor._pool.shutdown(wait=False, cancel_futures=True)
+            RenderExecutor._pool = None
+        RenderExecutor._semaphore = None
@@ -0,0 +1,89 @@
+import asyncio
+import time
+from telegram import Update
+from telegram.ext import BaseUpdateProcessor
+from utils.metrics import Metrics
+
+class ChatOrderedUpdateProcessor(BaseUpdateProcessor):
+    """Procesa actualizaciones en paralelo manteniendo el orden de cada chat.
+
+    Las actualizaciones de chats distintos se ejecutan a la vez, como mucho
+    `max_running_updates` al mismo tiempo. Las de un mismo chat se ejecutan
+    de una en una y en el orden de llegada, porque los estados de los
+    ConversationHandler dependen de ello.
+
+    El semáforo de BaseUpdateProcessor (`max_concurrent_updates`) limita el
+    total de actualizaciones pendientes, en espera o en ejecución.
+
+    Métricas:
+        updates_pending: Actualizaciones esperando su turno
+        updates_running: Actualizaciones en ejecución
+        update_wait_seconds: Tiempo de espera antes de ejecutarse
+        updates_processed: Actualizaciones procesadas
+    """
+
+    def __init__(self, max_running_updates: int, max_pending_updates: int = None):
+        """Inicializa el procesador.
+
+        Args:
+            max_running_updates: Actualizaciones ejecutándose a la vez
+            max_pending_updates: Límite de actualizaciones en espera o en
+                ejecución (por defecto 16 veces max_running_updates)
+        """
+        super().__init__(max_pending_updates or max_running_updates * 16)
+        self.max_running_updates = max_running_updates
+        self._running = None
+        # Última actualización de cada chat: la siguiente espera a que termine
+        self._tails = {}
+
+    async def initialize(self):
+        self._running = asyncio.BoundedSemaphore(self.max_running_updates)
+
+    async def shutdown(self):
+        self._tails.clear()
+
+    @staticmethod
+    def _get_chat_key(update):
+        """Clave que ordena las actualizaciones: chat o, si no hay, usuario."""
+        if isinstance(update, Update):
+            if update.effective_chat is not None:
+                return ("chat", update.effective_chat.id)
+            if update.effective_user is not None:
+                return ("user", update.effective_user.id)
+        return None
+
+    async def do_process_update(self, update, coroutine):
+        key = self._get_chat_key(update)
+        received_at = time.monotonic()
+
+        # Registrar esta actualización como la última del chat antes de
+        # cualquier await, para que el orden sea el de llegada
+        previous = self._tails.get(key) if key is not None else None
+        done = asyncio.get_running_loop().create_future()
+        if key is not None:
+            self._tails[key] = done
+
+        Metrics.add_gauge("updates_pending", 1)
+        waiting = True
+        try:
+            if previous is not None:
+                # shield: si esta tarea se cancela, la anterior no se ve afectada
+                await asyncio.shield(previous)
+            async with self._running:
+                waiting = False
+                Metrics.add_gauge("updates_pending", -1)
+                Metrics.observe("update_wait_seconds", time.monotonic() - received_at)
+                Metrics.add_gauge("updates_running", 1)
+                try:
+                    await coroutine
+                finally:
+                    Metrics.add_gauge("updates_running", -1)
+                    Metrics.inc("updates_processed")
+        finally:
+            if waiting:
+                # Cancelada antes de ejecutarse
+                Metrics.add_gauge("updates_pending", -1)
+                coroutine.close()
+            done.set_result(None)
+            if key is not None and self._tails.get(key) is done:
+                del self._tails[key]
@@ -0,0 +1,187 @@
+import asyncio
+import hmac
+import json
+import logging
+import platform
+import signal
+from telegram import Update
+from telegram.error import TelegramError
+from telegram.ext import Application
+
+logger = logging.getLogger(__name__)
+
+# Tamaño máximo aceptado para el cuerpo de una actualización (bytes)
+MAX_BODY_SIZE = 1024 * 1024
+
+class WebhookReceiver:
+    """Servidor HTTP mínimo que recibe las actualizaciones de Telegram.
+
+    Acepta solicitudes POST en `path`, comprueba la cabecera
+    X-Telegram-Bot-Api-Secret-Token y deja cada actualización en la cola de
+    la aplicación, que las procesa igual que en modo polling. Las conexiones
+    se mantienen abiertas (keep-alive) y como mucho `workers` solicitudes se
+    atienden a la vez.
+    """
+
+    def __init__(self, application: Application, listen="127.0.0.1", port=8443,
+                 path="/telegram", secret_token=None, workers=40):
+        self.application = application
+        self.listen = listen
+        self.port = port
+        self.path = path
+        self.secret_token = secret_token
+        self.workers = workers
+        self._semaphore = asyncio.Semaphore(workers)
+        self._server = None
+
+    async def start(self):
+        """Empieza a escuchar en el puerto configurado."""
+        self._server = await asyncio.start_server(self._handle_connection, self.listen, self.port)
+        logger.info("Webhook escuchando en http://%s:%s%s con %s workers", self.listen, self.port, self.path, self.workers)
+
+    async def stop(self):
+        """Deja de aceptar conexiones."""
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+
+    async def _handle_connection(self, reader, writer):
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+
+                try:
+                    length = int(headers.get("content-length", "0"))
+                except ValueError:
+                    length = -1
+                if length < 0 or length > MAX_BODY_SIZE:
+                    await self._respond(writer, 413, "Payload Too Large", keep_alive=False)
+                    break
+                body = await reader.readexactly(length) if length else b""
+
+                async with self._semaphore:
+                    status, reason = await self._handle_request(request_line, headers, body)
+
+                keep_alive = headers.get("connection", "").lower() != "close"
+                await self._respond(writer, status, reason, keep_alive)
+                if not keep_alive:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    async def _handle_request(self, request_line, headers, body):
+        """Valida una solicitud y encola la actualización.
+
+        Returns:
+            tuple: (status_code, reason)
+        """
+        try:
+            method, target, _ = request_line.decode("latin-1").split(" ", 2)
+        except ValueError:
+            return 400, "Bad Request"
+
+        if target.split("?", 1)[0] != self.path:
+            return 404, "Not Found"
+        if method != "POST":
+            return 405, "Method Not Allowed"
+
+        if self.secret_token:
+            received = headers.get("x-telegram-bot-api-secret-token", "")
+            if not hmac.compare_digest(received.encode(), self.secret_token.encode()):
+                return 403, "Forbidden"
+
+        try:
+            update = Update.de_json(json.loads(body), self.application.bot)
+        except Exception as e:
+            logger.warning("Actualización no válida recibida por el webhook: %s", e)
+            return 400, "Bad Request"
+
+        await self.application.update_queue.put(update)
+        return 200, "OK"
+
+    @staticmethod
+    async def _respond(writer, status, reason, keep_alive=True):
+        writer.write(
+            f"HTTP/1.1 {status} {reason}\r\n"
+            f"Content-Length: 0\r\n"
+            f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n".encode("latin-1")
+        )
+        await writer.drain()
+
+def run_webhook(application: Application, url, listen="127.0.0.1", port=8443,
+                path="/telegram", secret_token=None, workers=40):
+    """Ejecuta el bot en modo webhook hasta recibir una señal de parada.
+
+    Registra `url` como webhook en Telegram y arranca el receptor local. Si
+    el registro o el arranque fallan, el bot continúa en modo polling.
+
+    Args:
+        application: Aplicación del bot
+        url: URL pública que Telegram usará para enviar las actualizaciones
+        listen: Dirección local en la que escuchar
+        port: Puerto local
+        path: Ruta local que recibe las actualizaciones
+        secret_token: Token que Telegram envía en cada solicitud (opcional)
+        workers: Solicitudes atendidas a la vez; también se pide a Telegram
+            como número máximo de conexiones simultáneas (1-100)
+    """
+    try:
+        loop = asyncio.get_event_loop()
+    except RuntimeError:
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+
+    if platform.system() != "Windows":
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            loop.add_signal_handler(sig, application.stop_running)
+
+    receiver = WebhookReceiver(application, listen, port, path, secret_token, workers)
+
+    async def start_receiving():
+        try:
+            await receiver.start()
+            await application.bot.set_webhook(
+                url=url,
+                secret_token=secret_token,
+                max_connections=max(1, min(workers, 100)),
+                allowed_updates=Update.ALL_TYPES
+            )
+        except (TelegramError, OSError) as e:
+            logger.warning("No se pudo iniciar el webhook (%s); usando polling", e)
+            await receiver.stop()
+            await application.updater.start_polling(allowed_updates=Update.ALL_TYPES)
+
+    try:
+        loop.run_until_complete(application.initialize())
+        if application.post_init:
+            loop.run_until_complete(application.post_init(application))
+        loop.run_until_complete(start_receiving())
+        loop.run_until_complete(application.start())
+        loop.run_forever()
+    except (KeyboardInterrupt, SystemExit):
+        pass
+    finally:
+        loop.run_until_complete(receiver.stop())
+        if application.updater and application.updater.running:
+            loop.run_until_complete(application.updater.stop())
+        if application.running:
+            loop.run_until_complete(application.stop())
+            if application.post_stop:
+                loop.run_until_complete(application.post_stop(application))
+        loop.run_until_complete(application.shutdown())
+        if application.post_shutdown:
+            loop.run_until_complete(application.post_shutdown(application))
+        loop.close()